@@ -296,6 +296,7 @@ IMPORTANT DISCLAIMERS:
 
             if not tool_calls:
                 # No more tools needed, return response
+                self._record_turn(context, user_input, llm_response, all_tool_calls)
                 return AgentResponse(
                     message=llm_response,
                     tool_calls=all_tool_calls,
@@ -325,13 +326,31 @@ IMPORTANT DISCLAIMERS:
                 conversation += f"\n\nTool {call.tool_name} result: {json.dumps(result.data)}"
 
         # Max iterations reached
+        message = "I need more information to complete this request. Could you provide more details?"
+        self._record_turn(context, user_input, message, all_tool_calls)
         return AgentResponse(
-            message="I need more information to complete this request. Could you provide more details?",
+            message=message,
             tool_calls=all_tool_calls,
             tool_results=tool_results,
             reasoning_trace=reasoning_trace
         )
 
+    def _record_turn(
+        self,
+        context: AgentContext,
+        user_input: str,
+        message: str,
+        tool_calls: list[ToolCall]
+    ) -> None:
+        """Keep the exchange for later turns, if the state store records history."""
+        record_turn = getattr(self.state, "record_turn", None)
+        if record_turn is not None:
+            record_turn(
+                context.user_id, context.session_id, user_input, message,
+                [{"tool": call.tool_name, "params": call.parameters} for call in tool_calls],
+                context.entity_id
+            )
+
     def _build_conversation(
         self,
         user_input: str,
@@ -0,0 +1,130 @@
+"""
+Benchmark: single-pass extraction engine vs per-pattern scanning.
+
+Builds synthetic multi-page documents for each parser and compares
+`ExtractionEngine.extract` (one pass) with `extract_multipass` (one
+`re.search`/`re.findall` per pattern, as the parsers used to do).
+Results must be identical; timings are printed per document type.
+
+Each type is run twice: with labels repeated on every page, and with
+labels only in the header ("sparse"), which is the worst case for
+per-pattern scanning since every missing field costs a full pass.
+
+Usage:
+    python benchmarks/extraction_benchmark.py [--pages 100] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.pdf_parser import (
+    FORM16_ENGINE, FORM26AS_ENGINE, BANK_STATEMENT_ENGINE,
+    INVOICE_ENGINE, ITR_ACK_ENGINE, GENERIC_ENGINE
+)
+
+
+FILLER = (
+    "This statement is generated for the purpose of reporting and reconciliation. "
+    "Particulars of the amounts are shown below as per the records maintained. "
+)
+
+
+def _page(rng: random.Random, lines: list[str]) -> str:
+    body = [FILLER * 3]
+    for _ in range(40):
+        body.append(rng.choice(lines).format(
+            n=rng.randint(100, 999999),
+            t=rng.randint(10000, 99999),
+            d=f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024"
+        ))
+    return "\n".join(body)
+
+
+def build_documents(pages: int, seed: int = 7) -> dict[str, str]:
+    rng = random.Random(seed)
+    head = {
+        "form_16": "FORM NO. 16\nCertificate under section 203\nName of the Employer: Acme Pvt Ltd\n"
+                   "PAN ABCPE1234F  TAN MUMA12345B  Assessment Year: 2024-25\n",
+        "form_26as": "Form 26AS Annual Tax Statement\nPAN ABCPE1234F Assessment Year 2024-25\n",
+        "bank_statement": "Account Statement\nAccount No: 123456789012 IFSC: HDFC0001234\n"
+                          "Period: 01/04/2023 to 31/03/2024\nOpening Balance: 1,20,000.00\n",
+        "invoice": "TAX INVOICE\nGSTIN 27AAPFU0939F1ZV Invoice No: INV/2024/001 Invoice Date: 12/04/2024\n",
+        "itr_ack": "ITR-V Acknowledgement Number: 123456789012345 ITR-4\nPAN ABCPE1234F\n",
+        "unknown": "Memo\n",
+    }
+    lines = {
+        "form_16": ["Salary component {n}", "Perquisite value {n} as on {d}",
+                    "Deduction under 80C {n}", "Gross Salary {n}", "Tax Deducted at Source {n}"],
+        "form_26as": ["MUMA{t}B Deductor paid {n} TDS {n}", "Advance Tax {n}",
+                      "Booking date {d} amount {n}", "Total {n}.00"],
+        "bank_statement": ["{d} UPI/PAYMENT/{n} Grocery store {n}.00",
+                           "{d} NEFT SALARY CREDIT {n}.50", "{d} ATM WITHDRAWAL {n}"],
+        "invoice": ["Item {n} Qty 1 Rate {n}", "Taxable Value: {n}.00", "CGST @9% {n}.00",
+                    "SGST @9% {n}.00", "Grand Total: {n}.00"],
+        "itr_ack": ["Total Income: {n}", "Date: {d}", "Tax Payable: {n}", "Refund: {n}"],
+        "unknown": ["Ref {n} dated {d} for Rs. {n}", "GSTIN 27AAPFU0939F1ZV amount {n}.00"],
+    }
+    documents = {}
+    for doc_type in head:
+        documents[doc_type] = head[doc_type] + "\n".join(
+            _page(rng, lines[doc_type]) for _ in range(pages)
+        )
+        documents[f"{doc_type} sparse"] = head[doc_type] + "\n".join(
+            _page(rng, ["Line {n} recorded on {d}"]) for _ in range(pages)
+        )
+    return documents
+
+
+def _snapshot(found, engine) -> dict:
+    out = {}
+    for spec in engine.specs:
+        if spec.token:
+            out[spec.name] = found.all(spec.name)
+        else:
+            m = found.match(spec.name)
+            out[spec.name] = m.groups() if m else None
+    return out
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engines = {
+        "form_16": FORM16_ENGINE,
+        "form_26as": FORM26AS_ENGINE,
+        "bank_statement": BANK_STATEMENT_ENGINE,
+        "invoice": INVOICE_ENGINE,
+        "itr_ack": ITR_ACK_ENGINE,
+        "unknown": GENERIC_ENGINE,
+    }
+    documents = build_documents(args.pages)
+
+    print(f"{'document':<24}{'size':>10}{'multipass':>12}{'single':>10}{'speedup':>9}  match")
+    for doc_type, text in documents.items():
+        engine = engines[doc_type.split()[0]]
+        same = _snapshot(engine.extract(text), engine) == _snapshot(engine.extract_multipass(text), engine)
+        multi = _time(lambda: engine.extract_multipass(text), args.repeat)
+        single = _time(lambda: engine.extract(text), args.repeat)
+        print(f"{doc_type:<24}{len(text) // 1024:>8}KB{multi * 1000:>10.1f}ms"
+              f"{single * 1000:>8.1f}ms{multi / single:>8.1f}x  {'yes' if same else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: serial vs process-pool page text extraction.
+
+Extracts every page of a PDF in-process and then with 2..N workers,
+checks the merged text is identical, and prints pages/sec per setting.
+Without a PDF argument a synthetic bank statement is generated
+(requires reportlab).
+
+Usage:
+    python benchmarks/page_extraction_benchmark.py [statement.pdf] [--pages 200] [--workers 4]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.pdf_parser import TaxDocumentParser
+
+
+def build_statement(path: str, pages: int) -> None:
+    """Write a synthetic multi-page bank statement."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    pdf = canvas.Canvas(path, pagesize=A4)
+    for page in range(pages):
+        y = 800
+        pdf.drawString(40, y, f"Account Statement - Page {page + 1}")
+        for row in range(45):
+            y -= 16
+            pdf.drawString(
+                40, y,
+                f"{(row % 28) + 1:02d}/04/2024  UPI/PAYMENT/{page * 100 + row}  "
+                f"Grocery store  {1000 + row * 37:,}.00  {250000 - row * 512:,}.00"
+            )
+        pdf.showPage()
+    pdf.save()
+
+
+def _time(fn) -> tuple[float, list[str]]:
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("pdf", nargs="?")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    path = args.pdf
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "statement.pdf")
+        build_statement(path, args.pages)
+
+    serial, expected = _time(lambda: TaxDocumentParser(max_workers=1).extract_pages(path))
+    pages = len(expected)
+    print(f"{pages} pages, {os.cpu_count()} CPUs")
+    print(f"{'workers':<10}{'time':>10}{'pages/s':>10}  match")
+    print(f"{1:<10}{serial:>9.2f}s{pages / serial:>10.1f}  yes")
+
+    for workers in range(2, max(args.workers, 2) + 1):
+        doc_parser = TaxDocumentParser(max_workers=workers, parallel_min_pages=1)
+        elapsed, texts = _time(lambda: doc_parser.extract_pages(path))
+        print(f"{workers:<10}{elapsed:>9.2f}s{pages / elapsed:>10.1f}  "
+              f"{'yes' if texts == expected else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
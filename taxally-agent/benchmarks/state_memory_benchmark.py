@@ -0,0 +1,109 @@
+"""
+Benchmark: memory per state.schema record, plain vs compact dataclasses.
+
+Builds N of each high-volume record (entities, documents, risks,
+deadlines, conversation turns) the way a large InMemoryStateStore holds
+them, once with the compact (slotted, lazy, interned) classes in
+state.schema and once with plain @dataclass copies of the same fields,
+and prints the bytes allocated per object (tracemalloc).
+
+Usage:
+    python benchmarks/state_memory_benchmark.py [--count 100000]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from dataclasses import MISSING, field, fields, make_dataclass
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from state.schema import (
+    ComplianceRisk, ConversationEntry, Deadline, Document, DocumentType,
+    Entity, EntityType, RiskSeverity
+)
+
+
+def plain(cls):
+    """The same fields as a dict-backed @dataclass with eager containers."""
+    spec = []
+    for f in fields(cls):
+        factory = f.metadata.get("lazy", f.default_factory)
+        if factory is not MISSING:
+            spec.append((f.name, f.type, field(default_factory=factory)))
+        elif f.default is not MISSING:
+            spec.append((f.name, f.type, field(default=f.default)))
+        else:
+            spec.append((f.name, f.type))
+    return make_dataclass(f"Plain{cls.__name__}", spec)
+
+
+def build(classes: dict, count: int) -> list:
+    """Records as they arrive from parsing/ingest: fresh strings, no sharing."""
+    due = datetime(2025, 1, 11)
+    records = []
+    for i in range(count):
+        user_id = "user-%d" % (i // 4)
+        entity_id = "entity-%d" % (i // 2)
+        records.append(classes["Entity"](
+            entity_id=entity_id, user_id=user_id, name="Business %d" % i,
+            entity_type=EntityType.PROPRIETORSHIP
+        ))
+        records.append(classes["Document"](
+            document_id="doc-%d" % i, entity_id=entity_id,
+            document_type=DocumentType.INVOICE, filename="invoice_%d.pdf" % i,
+            financial_year="".join(["2024", "-25"]),
+            processing_status="".join(["pro", "cessed"])
+        ))
+        records.append(classes["ComplianceRisk"](
+            risk_id="risk-%d" % i, entity_id=entity_id, category="".join(["g", "st"]),
+            severity=RiskSeverity.MEDIUM, title="Late filing",
+            description="GSTR-3B not filed", financial_year="".join(["2024", "-25"])
+        ))
+        records.append(classes["Deadline"](
+            deadline_id="deadline-%d" % i, entity_id=entity_id,
+            deadline_type="".join(["gstr", "3b"]), due_date=due + timedelta(days=i % 365),
+            financial_year="".join(["2024", "-25"])
+        ))
+        records.append(classes["ConversationEntry"](
+            turn_id="turn-%d" % i, session_id="session-%d" % (i // 10),
+            user_message="What is due?", assistant_message="GSTR-3B on the 20th."
+        ))
+    return records
+
+
+def measure(classes: dict, count: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    records = build(classes, count)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return allocated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args()
+
+    compact = {cls.__name__: cls for cls in (
+        Entity, Document, ComplianceRisk, Deadline, ConversationEntry
+    )}
+    baseline = {name: plain(cls) for name, cls in compact.items()}
+
+    objects = args.count * len(compact)
+    before = measure(baseline, args.count)
+    after = measure(compact, args.count)
+
+    print(f"{objects:,} records ({args.count:,} of each of {', '.join(compact)})")
+    print(f"  plain dataclasses:   {before / objects:7.0f} bytes/record, {before / 2**20:7.1f} MiB")
+    print(f"  compact dataclasses: {after / objects:7.0f} bytes/record, {after / 2**20:7.1f} MiB")
+    print(f"  saved: {1 - after / before:.0%}")
+
+
+if __name__ == "__main__":
+    main()
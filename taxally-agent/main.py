@@ -18,6 +18,24 @@ from tools.mvp_tools import create_mvp_tools
 from state.schema import InMemoryStateStore
 
 
+def create_state_store():
+    """
+    State store named by DATABASE_URL.
+
+    `sqlite:///taxally.db` (relative) or `sqlite:////var/lib/taxally.db`
+    (absolute) keeps state in SQLite, shared by every worker process;
+    unset keeps it in memory for this process only.
+    """
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        return InMemoryStateStore()
+    if not url.startswith("sqlite:///"):
+        raise ValueError(f"Unsupported DATABASE_URL (expected sqlite:///path): {url}")
+
+    from state.sqlite_state_store import SQLiteStateStore
+    return SQLiteStateStore(url[len("sqlite:///"):])
+
+
 def create_agent(provider: str = "groq") -> TaxAllyAgent:
     """Create and configure the TaxAlly agent."""
 
@@ -30,7 +48,7 @@ def create_agent(provider: str = "groq") -> TaxAllyAgent:
         tool_registry.register(tool)
 
     # Initialize state store
-    state_store = InMemoryStateStore()
+    state_store = create_state_store()
 
     # Create agent
     agent = TaxAllyAgent(
@@ -0,0 +1,459 @@
+"""
+Cached State Store for TaxAlly
+
+Read-through cache for get_user_state(), which the agent calls on every
+turn while profiles, entities and risks rarely change between turns:
+- Wraps any store (InMemoryStateStore, SQLiteStore); every other method
+  passes straight through
+- Per-user entries with a TTL and an LRU size limit
+- Writes made through the wrapper invalidate only the affected user; the
+  owner of an entity, risk, deadline or session comes from cached state
+  and earlier writes, else from the store's record_owners(); only a store
+  without that lookup falls back to clearing the whole cache
+- record_turn(), which the agent calls every turn, appends the exchange to
+  the cached conversation_history instead of dropping the entry
+- Callers get their own copy of cached state, so mutating it is safe
+- Optional invalidation channel so several worker processes drop each
+  other's stale entries (SQLiteInvalidationChannel, or anything with
+  publish() and poll())
+"""
+
+import copy
+import inspect
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+
+from .connection import ConnectionManager
+from .schema import HISTORY_TURNS
+
+
+DEFAULT_TTL = 60.0          # Seconds an entry is served without reloading
+DEFAULT_MAX_USERS = 1024
+CHANNEL_POLL_INTERVAL = 1.0  # Seconds between invalidation channel polls
+MAX_OWNERS = 100_000         # Record-owner mappings kept for invalidation
+
+# Write methods (on either store) -> (argument naming the changed record, record kind).
+# The argument may also be an attribute of the first argument (InMemoryStateStore
+# takes dataclasses, e.g. add_risk(ComplianceRisk)).
+INVALIDATING_WRITES = {
+    "create_user": ("user_id", "user"),        # SQLiteStore returns the new id instead
+    "update_user": ("user_id", "user"),
+    "update_user_state": ("user_id", "user"),
+    "create_entity": ("user_id", "user"),
+    "update_entity": ("entity_id", "entity"),
+    "add_risk": ("entity_id", "entity"),
+    "resolve_risk": ("risk_id", "risk"),
+    "add_deadline": ("entity_id", "entity"),
+    "complete_deadline": ("deadline_id", "deadline"),
+    "update_deadline_status": ("deadline_id", "deadline"),
+    "mark_reminders_sent": ("updates", "deadline"),  # (deadline_id, count) pairs
+    "create_session": ("user_id", "user"),     # May carry conversation turns
+    "add_conversation_turn": ("session_id", "session"),
+    # Bulk imports clear everything rather than consume their iterables twice
+    "add_risks": (None, "all"),
+    "add_deadlines": (None, "all"),
+}
+
+# Writes returning the new record's id (so later writes can find its owner)
+_RETURNS_ID = {"add_risk", "add_deadline"}
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+# ============ Invalidation Channels ============
+
+class SQLiteInvalidationChannel:
+    """
+    Cross-process invalidations through a table in a shared database.
+
+    Each process publishes the user ids it changed and polls for ids
+    other processes published since its last poll. Any object with the
+    same publish() and poll() methods (e.g. Redis pub/sub) can be used
+    instead.
+    """
+
+    def __init__(self, db_path: str = "taxally.db", retention: float = 3600.0):
+        """
+        Args:
+            db_path: Database shared by every worker
+            retention: Seconds published invalidations are kept
+        """
+        self.db = ConnectionManager(db_path)
+        self.retention = retention
+        self.origin = uuid.uuid4().hex  # Own publications are skipped by poll()
+        with self.db.transaction() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS cache_invalidations (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT,                -- NULL: every user
+                    published_at REAL NOT NULL,
+                    origin TEXT
+                )
+            """)
+            cursor.execute("PRAGMA table_info(cache_invalidations)")
+            if "origin" not in {row['name'] for row in cursor.fetchall()}:
+                cursor.execute("ALTER TABLE cache_invalidations ADD COLUMN origin TEXT")
+            cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM cache_invalidations")
+            self._last_seq = cursor.fetchone()[0]  # Only changes from now on
+
+    def publish(self, user_ids: Optional[Iterable[str]]) -> None:
+        """Announce changed users; None means every user."""
+        now = time.time()
+        users = [None] if user_ids is None else user_ids
+        rows = [(uid, now, self.origin) for uid in users]
+        with self.db.transaction() as cursor:
+            cursor.executemany(
+                "INSERT INTO cache_invalidations (user_id, published_at, origin) VALUES (?, ?, ?)",
+                rows
+            )
+            cursor.execute(
+                "DELETE FROM cache_invalidations WHERE published_at < ?", (now - self.retention,)
+            )
+
+    def poll(self) -> list[Optional[str]]:
+        """User ids other processes published since the last poll (None: every user)."""
+        with self.db.cursor() as cursor:
+            cursor.execute(
+                "SELECT seq, user_id, origin FROM cache_invalidations WHERE seq > ? ORDER BY seq",
+                (self._last_seq,)
+            )
+            rows = cursor.fetchall()
+        if rows:
+            self._last_seq = rows[-1]['seq']
+        return [row['user_id'] for row in rows if row['origin'] != self.origin]
+
+    def close(self) -> None:
+        self.db.close()
+
+
+# ============ Cached Store ============
+
+class CachedStateStore:
+    """
+    Read-through get_user_state() cache around a state store.
+
+    Usage:
+        store = CachedStateStore(SQLiteStore("taxally.db"), ttl=60)
+        agent = TaxAllyAgent(llm, tools, store)
+        store.update_entity(entity_id, gstin="...")   # drops that user's entry
+        print(store.cache_stats().hit_rate)
+
+    Every call returns a private copy of the cached state. Writes that
+    bypass the wrapper (another process, or direct SQL) are only seen
+    after the TTL, or through the invalidation channel.
+    """
+
+    def __init__(
+        self,
+        store: Any,
+        ttl: float = DEFAULT_TTL,
+        max_users: int = DEFAULT_MAX_USERS,
+        channel: Optional[Any] = None,
+        poll_interval: float = CHANNEL_POLL_INTERVAL
+    ):
+        """
+        Args:
+            store: Underlying state store
+            ttl: Seconds before an entry is reloaded
+            max_users: Entries kept before the least recently used is evicted
+            channel: Cross-process invalidation channel (publish/poll)
+            poll_interval: Minimum seconds between channel polls
+        """
+        self.store = store
+        self.ttl = ttl
+        self.max_users = max_users
+        self.channel = channel
+        self.poll_interval = poll_interval
+
+        self._lock = threading.RLock()
+        self._entries: OrderedDict[tuple, tuple[float, dict]] = OrderedDict()
+        self._keys_by_user: dict[str, set[tuple]] = {}
+        self._generations: dict[str, int] = {}   # Bumped on invalidation
+        self._epoch = 0                          # Bumped on a full clear
+        self._owners: dict[str, str] = {}        # entity/risk/deadline/session id -> user_id
+        self._writers: dict[str, Callable] = {}  # Wrapped write methods, built once
+        self._stats = CacheStats()
+        self._next_poll = 0.0
+
+    # ============ Reads ============
+
+    def get_user_state(self, user_id: str, **kwargs) -> dict:
+        """Aggregated state, served from the cache while fresh."""
+        self._poll_channel()
+        key = (user_id, _freeze(kwargs))
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._stats.hits += 1
+                    return copy.deepcopy(entry[1])
+                self._drop(key)
+                self._stats.expired += 1
+            self._stats.misses += 1
+            generation = (self._epoch, self._generations.get(user_id, 0))
+
+        state = self.store.get_user_state(user_id, **kwargs)
+
+        with self._lock:
+            # An invalidation during the load means `state` may be stale
+            if (self._epoch, self._generations.get(user_id, 0)) == generation:
+                self._entries[key] = (now + self.ttl, state)
+                self._keys_by_user.setdefault(user_id, set()).add(key)
+                self._learn_owners(user_id, state)
+                while len(self._entries) > self.max_users:
+                    self._drop(next(iter(self._entries)))
+                    self._stats.evictions += 1
+        return copy.deepcopy(state)
+
+    def cache_stats(self) -> CacheStats:
+        with self._lock:
+            self._stats.size = len(self._entries)
+            return CacheStats(**vars(self._stats))
+
+    # ============ Invalidation ============
+
+    def invalidate(self, user_id: Optional[str] = None, publish: bool = True) -> None:
+        """Drop one user's entries, or every entry when user_id is None."""
+        with self._lock:
+            users = list(self._keys_by_user) if user_id is None else [user_id]
+            for uid in users:
+                self._generations[uid] = self._generations.get(uid, 0) + 1
+                for key in self._keys_by_user.pop(uid, ()):
+                    self._entries.pop(key, None)
+            if user_id is None:
+                self._epoch += 1
+                self._generations.clear()
+                self._owners.clear()
+            self._stats.invalidations += 1
+
+        if publish and self.channel is not None:
+            self.channel.publish(None if user_id is None else [user_id])
+
+    def _drop(self, key: tuple) -> None:
+        self._entries.pop(key, None)
+        keys = self._keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[key[0]]
+
+    def _poll_channel(self) -> None:
+        if self.channel is None or time.monotonic() < self._next_poll:
+            return
+        self._next_poll = time.monotonic() + self.poll_interval
+        for user_id in self.channel.poll():
+            self.invalidate(user_id, publish=False)
+
+    def _learn_owners(self, user_id: str, state: dict) -> None:
+        for section, id_field in (
+            ("entities", "entity_id"),
+            ("active_risks", "risk_id"),
+            ("upcoming_deadlines", "deadline_id"),
+        ):
+            for item in state.get(section) or ():
+                if id_field in item:
+                    self._owners[item[id_field]] = user_id
+        if len(self._owners) > MAX_OWNERS:
+            self._owners.clear()  # Relearnt from later loads
+
+    def _owners_of(self, kind: str, record_ids: list) -> Optional[set[str]]:
+        """Users owning the records, or None if they cannot be determined."""
+        if kind == "user":
+            return set(record_ids)
+        with self._lock:
+            owners = {rid: self._owners[rid] for rid in record_ids if rid in self._owners}
+        missing = [rid for rid in record_ids if rid not in owners]
+        if missing:
+            if hasattr(self.store, "record_owners"):
+                # Ids the store does not know have nothing cached to invalidate
+                found = self.store.record_owners(kind, missing)
+            elif kind == "entity" and hasattr(self.store, "get_entity"):
+                found = {rid: _field(self.store.get_entity(rid), "user_id") for rid in missing}
+                if None in found.values():
+                    return None
+            else:
+                return None
+            owners.update(found)
+            with self._lock:
+                self._owners.update(found)
+        return set(owners.values())
+
+    # ============ Writes ============
+
+    def __getattr__(self, name: str) -> Any:
+        writer = self.__dict__["_writers"].get(name)
+        if writer is not None:
+            return writer
+        attr = getattr(self.store, name)
+        if name == "record_turn":
+            writer = self._writers[name] = self._wrap_record_turn(attr)
+            return writer
+        if name not in INVALIDATING_WRITES:
+            return attr
+        writer = self._writers[name] = self._wrap_write(name, attr)
+        return writer
+
+    def _wrap_record_turn(self, attr: Callable) -> Callable:
+        """record_turn() that appends to cached history instead of invalidating."""
+        signature = inspect.signature(attr)
+
+        def record_turn(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs).arguments
+            user_id = bound["user_id"]
+            result = attr(*args, **kwargs)
+
+            turn = {"user": bound["user_message"], "assistant": bound["assistant_message"]}
+            with self._lock:
+                # A load already in flight may have missed the turn; don't cache it
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+                for key in self._keys_by_user.get(user_id, ()):
+                    history = self._entries[key][1].get("conversation_history")
+                    if history is not None:
+                        history.append(turn)
+                        del history[:-HISTORY_TURNS]
+            if self.channel is not None:
+                self.channel.publish([user_id])
+            return result
+
+        return record_turn
+
+    def _wrap_write(self, name: str, attr: Callable) -> Callable:
+        arg_name, kind = INVALIDATING_WRITES[name]
+        signature = inspect.signature(attr)
+
+        def write(*args, **kwargs):
+            if kind == "all":
+                result = attr(*args, **kwargs)
+                self.invalidate()
+                return result
+
+            bound = signature.bind(*args, **kwargs).arguments
+            if arg_name in bound:
+                value = bound[arg_name]
+            else:
+                # Dataclass argument, e.g. InMemoryStateStore.add_risk(risk)
+                value = _field(next(iter(bound.values()), None), arg_name)
+            if value is None and name == "create_user":
+                # SQLiteStore.create_user() generates the id and returns it
+                result = attr(*args, **kwargs)
+                self.invalidate(result)
+                return result
+            if name == "mark_reminders_sent":
+                value = [deadline_id for deadline_id, _ in value]
+            else:
+                value = [value]
+
+            # Resolved before the write, while the records still have their owners
+            owners = self._owners_of(kind, value)
+            result = attr(*args, **kwargs)
+
+            if name == "update_entity" and "user_id" in (bound.get("updates") or {}):
+                owners = None  # Entity (and its risks/deadlines) changed hands
+            if owners is None:
+                self.invalidate()
+                return result
+            for owner in owners:
+                self.invalidate(owner)
+            if name in _RETURNS_ID and result is not None and len(owners) == 1:
+                with self._lock:
+                    self._owners[result] = next(iter(owners))
+            return result
+
+        return write
+
+
+def _field(obj: Any, name: str) -> Any:
+    if obj is None:
+        return None
+    if isinstance(obj, (dict, sqlite3.Row)):
+        return obj[name] if name in obj.keys() else None
+    return getattr(obj, name, None)
+
+
+def _freeze(value: Any) -> Any:
+    """Hashable form of get_user_state() keyword arguments."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+# Test
+if __name__ == "__main__":
+    import os
+    import tempfile
+    from datetime import datetime, timedelta
+    from .sqlite_store import SQLiteStore
+
+    print("Testing Cached State Store...")
+    path = os.path.join(tempfile.mkdtemp(), "cached_store_test.db")
+    backing = SQLiteStore(path)
+    store = CachedStateStore(backing, ttl=30, max_users=2,
+                             channel=SQLiteInvalidationChannel(path), poll_interval=0)
+
+    alice = store.create_user(name="Alice")
+    bob = store.create_user(name="Bob")
+    shop = store.create_entity(user_id=alice, name="Alice Traders")
+    store.create_entity(user_id=bob, name="Bob Consulting")
+
+    for _ in range(5):
+        store.get_user_state(alice)
+        store.get_user_state(bob)
+    print(f"  After 10 reads: {store.cache_stats()}")
+
+    risk_id = store.add_risk(shop, "gst", "high", "GSTR-1 not filed")
+    print(f"  Alice's risks after add_risk: {len(store.get_user_state(alice)['active_risks'])}")
+    store.resolve_risk(risk_id)
+    print(f"  ...after resolve_risk: {len(store.get_user_state(alice)['active_risks'])}")
+    store.add_deadline(shop, "gstr3b", datetime.now() + timedelta(days=3), "2024-25")
+    print(f"  Deadlines after add_deadline: {len(store.get_user_state(alice)['upcoming_deadlines'])}")
+    print(f"  Bob still cached: {store.cache_stats().hits} hits -> ", end="")
+    store.get_user_state(bob)
+    print(store.cache_stats().hits)
+
+    # A second worker process writing to the same database
+    other = CachedStateStore(SQLiteStore(path), channel=SQLiteInvalidationChannel(path))
+    other.update_user(bob, name="Robert")
+    print(f"  Bob after another worker's update: {store.get_user_state(bob)['profile']['name']}")
+
+    store.get_user_state(alice, fields={"entities": ["name"]})
+    print(f"  Final: {store.cache_stats()} (hit rate {store.cache_stats().hit_rate:.0%})")
+
+    # The agent loop: read state, answer, record the turn
+    from .schema import InMemoryStateStore, UserProfile
+    agent_store = CachedStateStore(InMemoryStateStore())
+    print(f"  Unknown user: {agent_store.get_user_state('u9')['profile']}", end="")
+    agent_store.create_user(UserProfile(user_id="u9", name="Uma"))
+    print(f" -> after create_user: {agent_store.get_user_state('u9')['profile']['name']}")
+    for turn in range(10):
+        state = agent_store.get_user_state("u9")
+        agent_store.record_turn("u9", "session-1", f"question {turn}", f"answer {turn}")
+    stats = agent_store.cache_stats()
+    history = agent_store.get_user_state("u9")["conversation_history"]
+    assert history == agent_store.store.get_user_state("u9")["conversation_history"]
+    assert stats.hits >= 10, stats
+    print(f"  Agent loop, 10 turns: {stats} (hit rate {stats.hit_rate:.0%}), "
+          f"last turn {history[-1]['user']!r}")
+    print("\n✅ Cached state store working!")
@@ -0,0 +1,255 @@
+"""
+SQLite Connection Manager for TaxAlly
+
+One persistent connection per thread instead of a connect/close per
+statement:
+- Connections are opened lazily and reused by every call on the thread
+- Tuned pragmas are applied once per connection (WAL, synchronous=NORMAL,
+  mmap, page cache, busy timeout)
+- transaction() groups statements into one commit and nests: an inner
+  transaction() on the same thread joins the outer one
+- `:memory:` databases share a single connection (each connection would
+  otherwise see its own empty database), serialized with a lock
+- A thread's connection is closed once the thread has exited (checked
+  whenever a new connection is opened), so short-lived threads don't
+  pile up open connections and file descriptors
+- close() closes every connection at shutdown; a forked child opens
+  fresh connections instead of reusing its parent's
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,        # KiB, i.e. 64 MB
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,            # ms to wait on another writer
+}
+
+
+class ConnectionManager:
+    """
+    Per-thread persistent SQLite connections.
+
+    Usage:
+        db = ConnectionManager("taxally.db")
+        with db.transaction() as cursor:
+            cursor.execute("INSERT ...")
+            cursor.execute("UPDATE ...")    # committed together
+        with db.cursor() as cursor:
+            cursor.execute("SELECT ...")
+        db.close()
+    """
+
+    def __init__(self, db_path: str, pragmas: Optional[dict] = None):
+        """
+        Args:
+            db_path: SQLite file, or ":memory:"
+            pragmas: Overrides merged into DEFAULT_PRAGMAS
+        """
+        self.db_path = db_path
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+        self.shared = db_path == ":memory:" or db_path.startswith("file::memory:")
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._local = threading.local()
+        # Owning thread (None for the shared connection) -> connection
+        self._connections: dict[Optional[threading.Thread], sqlite3.Connection] = {}
+        self._shared_conn: Optional[sqlite3.Connection] = None
+        self._depth = 0  # Transaction nesting of the shared connection
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode; transaction() issues BEGIN/COMMIT itself
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            if self.shared and name in ("journal_mode", "mmap_size"):
+                continue
+            conn.execute(f"PRAGMA {name} = {value}")
+        with self._lock:
+            self._prune()
+            owner = None if self.shared else threading.current_thread()
+            self._connections[owner] = conn
+        return conn
+
+    def _prune(self) -> None:
+        """Close connections whose thread has exited."""
+        for thread in [t for t in self._connections if t is not None and not t.is_alive()]:
+            self._connections.pop(thread).close()
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use."""
+        if os.getpid() != self._pid:
+            # Forked: the parent's connections must not be used here
+            self._reset()
+
+        if self.shared:
+            with self._lock:
+                if self._shared_conn is None:
+                    self._shared_conn = self._connect()
+                return self._shared_conn
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+
+    @contextmanager
+    def cursor(self) -> Iterator[sqlite3.Cursor]:
+        """A cursor for reads (or single autocommitted writes)."""
+        conn = self.connection()
+        with self._lock if self.shared else _NO_LOCK:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+
+    @contextmanager
+    def transaction(self, immediate: bool = False) -> Iterator[sqlite3.Cursor]:
+        """
+        Run statements in one transaction; rolled back if the block raises.
+
+        Args:
+            immediate: Take the write lock up front (BEGIN IMMEDIATE), for
+                read-then-write blocks that race with other processes
+        """
+        conn = self.connection()
+        with self._lock if self.shared else _NO_LOCK:
+            depth = self._enter()
+            cursor = conn.cursor()
+            try:
+                if depth == 0:
+                    cursor.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+                yield cursor
+                if depth == 0:
+                    cursor.execute("COMMIT")
+            except BaseException:
+                if depth == 0 and conn.in_transaction:
+                    conn.rollback()
+                raise
+            finally:
+                cursor.close()
+                self._exit()
+
+    def _enter(self) -> int:
+        if self.shared:
+            depth, self._depth = self._depth, self._depth + 1
+        else:
+            depth = self._local.depth
+            self._local.depth = depth + 1
+        return depth
+
+    def _exit(self) -> None:
+        if self.shared:
+            self._depth -= 1
+        else:
+            self._local.depth -= 1
+
+    def close(self) -> None:
+        """Close every connection opened by this process."""
+        with self._lock:
+            if os.getpid() == self._pid:
+                for conn in self._connections.values():
+                    conn.close()
+            self._reset()
+
+
+class _NoLock:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_LOCK = _NoLock()
+
+
+# Test
+if __name__ == "__main__":
+    import tempfile
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    print("Testing Connection Manager...")
+    path = os.path.join(tempfile.mkdtemp(), "connection_test.db")
+    db = ConnectionManager(path)
+
+    with db.transaction() as cursor:
+        cursor.execute("CREATE TABLE kv (k TEXT PRIMARY KEY, v INTEGER)")
+    with db.cursor() as cursor:
+        print(f"  journal_mode: {cursor.execute('PRAGMA journal_mode').fetchone()[0]}")
+
+    try:
+        with db.transaction() as cursor:
+            cursor.execute("INSERT INTO kv VALUES ('a', 1)")
+            with db.transaction() as inner:   # Joins the outer transaction
+                inner.execute("INSERT INTO kv VALUES ('b', 2)")
+            raise RuntimeError("rollback both")
+    except RuntimeError:
+        pass
+    with db.cursor() as cursor:
+        print(f"  Rows after rollback: {cursor.execute('SELECT COUNT(*) FROM kv').fetchone()[0]}")
+
+    def write(i: int) -> None:
+        with db.transaction() as cursor:
+            cursor.execute("INSERT INTO kv VALUES (?, ?)", (f"k{i}", i))
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(write, range(200)))
+    with db.cursor() as cursor:
+        print(f"  Rows from 4 threads: {cursor.execute('SELECT COUNT(*) FROM kv').fetchone()[0]}"
+              f" over {len(db._connections)} connections")
+
+    start = time.perf_counter()
+    for _ in range(2000):
+        with db.cursor() as cursor:
+            cursor.execute("SELECT v FROM kv WHERE k = 'k1'").fetchone()
+    pooled = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(2000):
+        conn = sqlite3.connect(path)
+        conn.execute("SELECT v FROM kv WHERE k = 'k1'").fetchone()
+        conn.close()
+    churn = time.perf_counter() - start
+    print(f"  2,000 reads: {pooled * 1000:.0f}ms persistent vs {churn * 1000:.0f}ms connect-per-call")
+
+    memory = ConnectionManager(":memory:")
+    with memory.transaction() as cursor:
+        cursor.execute("CREATE TABLE t (x)")
+
+    def tables() -> list[str]:
+        with memory.cursor() as cursor:
+            return [row[0] for row in cursor.execute("SELECT name FROM sqlite_master")]
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        print(f"  :memory: tables seen from another thread: {pool.submit(tables).result()}")
+
+    def read() -> None:
+        with db.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM kv").fetchone()
+
+    for _ in range(300):
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join()
+    print(f"  Open connections after 300 short-lived threads: {len(db._connections)}")
+    assert len(db._connections) <= 2  # This thread's and the last thread's
+
+    db.close()
+    memory.close()
+    print("\n✅ Connection manager working!")
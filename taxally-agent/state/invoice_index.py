@@ -0,0 +1,379 @@
+"""
+Near-Duplicate Invoice Index for TaxAlly
+
+The same purchase invoice often arrives several times (a scan, an email
+attachment, an accounting export), each with different bytes. This index
+catches those re-uploads in two ways:
+- Exact key: seller GSTIN + invoice number + invoice date, normalized
+- MinHash/LSH over character shingles of the normalized text, which
+  survives OCR noise and layout differences
+
+Signatures and LSH buckets live in SQLite beside the `documents` table.
+A lookup is one indexed probe for the exact key plus one per LSH band,
+with each bucket capped, so it stays constant time as the index grows.
+
+A near match whose invoice number or total clearly differs is rejected:
+invoices printed from the same template are textually very similar.
+"""
+
+import hashlib
+import random
+import re
+import sqlite3
+import struct
+import zlib
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterable, Optional
+
+from .connection import ConnectionManager
+
+
+NUM_PERM = 64
+BANDS = 16                       # 16 bands x 4 rows: candidates from ~50% similarity
+SHINGLE_SIZE = 5                 # Characters per shingle
+DUPLICATE_THRESHOLD = 0.8        # Estimated Jaccard similarity for a near match
+MAX_BUCKET_CANDIDATES = 50       # Per band probe; bounds lookups on huge buckets
+AMOUNT_TOLERANCE = 1.0           # Rupees
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_SEED = 2025
+
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+_ISO_DATE_RE = re.compile(r'(?<!\d)(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})(?!\d)')
+_DATE_RE = re.compile(r'(?<!\d)(\d{1,2})[-/.](\d{1,2})[-/.](\d{4}|\d{2})(?!\d)')
+
+
+# ============ Normalization ============
+
+def normalize_text(text: str) -> str:
+    """Lowercase alphanumerics separated by single spaces."""
+    return _NON_ALNUM_RE.sub(" ", text.lower()).strip()
+
+
+def normalize_invoice_number(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    return re.sub(r'[^A-Z0-9]', '', value.upper()) or None
+
+
+def normalize_date(value: Optional[str]) -> Optional[str]:
+    """
+    yyyy-mm-dd, dd-mm-yyyy, dd/mm/yy etc. as YYYY-MM-DD.
+
+    None if no date is found or it does not exist (month 13, 31 April),
+    so a bad date never produces a key that could collide.
+    """
+    if not value:
+        return None
+    m = _ISO_DATE_RE.search(value)
+    if m:
+        year, month, day = (int(g) for g in m.groups())
+    else:
+        m = _DATE_RE.search(value)
+        if not m:
+            return None
+        day, month, year = (int(g) for g in m.groups())
+        if year < 100:
+            year += 2000
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+def exact_key(fields: dict) -> Optional[str]:
+    """Seller GSTIN + invoice number + date, or None if any is missing."""
+    gstin = (fields.get('seller_gstin') or '').upper()
+    number = normalize_invoice_number(fields.get('invoice_number'))
+    date = normalize_date(fields.get('invoice_date'))
+    if not (gstin and number and date):
+        return None
+    return f"{gstin}|{number}|{date}"
+
+
+# ============ MinHash ============
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set[int]:
+    """32-bit hashes of the character shingles of normalized text."""
+    text = normalize_text(text)
+    if len(text) < size:
+        return {zlib.crc32(text.encode())} if text else set()
+    data = text.encode()
+    return {zlib.crc32(data[i:i + size]) for i in range(len(data) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures with fixed, seeded permutations."""
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS, seed: int = _SEED):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, hashes: Iterable[int]) -> list[int]:
+        hashes = list(hashes)
+        if not hashes:
+            return [_MAX_HASH] * self.num_perm
+        return [
+            min((a * h + b) % _MERSENNE_PRIME for h in hashes) & _MAX_HASH
+            for a, b in self._perms
+        ]
+
+    def band_keys(self, signature: list[int]) -> list[int]:
+        """One signed 64-bit bucket key per band."""
+        keys = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            digest = hashlib.blake2b(struct.pack(f"<{self.rows}I", *rows), digest_size=8).digest()
+            keys.append(int.from_bytes(digest, "big", signed=True))
+        return keys
+
+    @staticmethod
+    def similarity(a: list[int], b: list[int]) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return sum(x == y for x, y in zip(a, b)) / len(a)
+
+    def pack(self, signature: list[int]) -> bytes:
+        return struct.pack(f"<{self.num_perm}I", *signature)
+
+    def unpack(self, blob: bytes) -> list[int]:
+        return list(struct.unpack(f"<{self.num_perm}I", blob))
+
+
+# ============ Index ============
+
+@dataclass
+class DuplicateMatch:
+    """An indexed invoice that a new one duplicates."""
+    document_id: str
+    match_type: str      # "exact" or "near"
+    similarity: float    # 1.0 for exact matches
+
+
+class InvoiceIndex:
+    """
+    Persistent duplicate index over parsed invoices, per entity.
+
+    Usage:
+        index = InvoiceIndex("taxally.db")
+        matches = index.add(entity_id, document_id, doc.extracted_fields, doc.raw_text)
+        if matches:
+            print(f"Duplicate of {matches[0].document_id}")
+    """
+
+    def __init__(
+        self,
+        db_path: str = "taxally.db",
+        threshold: float = DUPLICATE_THRESHOLD,
+        num_perm: int = NUM_PERM,
+        bands: int = BANDS
+    ):
+        """
+        Args:
+            db_path: SQLite database (normally the SQLiteStore file)
+            threshold: Estimated similarity needed for a near match
+            num_perm: MinHash signature length
+            bands: LSH bands; more bands find less similar candidates
+        """
+        self.db_path = db_path
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm, bands)
+        self.db = ConnectionManager(db_path)
+        self._init_db()
+
+    def _init_db(self):
+        """Create the index tables."""
+        with self.db.transaction() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS invoice_signatures (
+                    document_id TEXT PRIMARY KEY,
+                    entity_id TEXT NOT NULL,
+                    exact_key TEXT,
+                    invoice_number TEXT,
+                    total_amount REAL,
+                    signature BLOB NOT NULL
+                )
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_invoice_signatures_key
+                ON invoice_signatures(entity_id, exact_key)
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS invoice_lsh (
+                    entity_id TEXT NOT NULL,
+                    band INTEGER NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    document_id TEXT NOT NULL
+                )
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_invoice_lsh_bucket
+                ON invoice_lsh(entity_id, band, bucket)
+            """)
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_invoice_lsh_document ON invoice_lsh(document_id)"
+            )
+
+    def _fingerprint(self, fields: dict, text: str) -> dict:
+        signature = self.hasher.signature(shingles(text or ""))
+        return {
+            'exact_key': exact_key(fields),
+            'invoice_number': normalize_invoice_number(fields.get('invoice_number')),
+            'total_amount': fields.get('total_amount'),
+            'signature': signature,
+            'band_keys': self.hasher.band_keys(signature),
+        }
+
+    def find_duplicates(self, entity_id: str, fields: dict, text: str) -> list[DuplicateMatch]:
+        """Indexed invoices of the entity that this one duplicates, best first."""
+        fingerprint = self._fingerprint(fields, text)
+        with self.db.cursor() as cursor:
+            return self._find(cursor, entity_id, fingerprint)
+
+    def add(
+        self,
+        entity_id: str,
+        document_id: str,
+        fields: dict,
+        text: str
+    ) -> list[DuplicateMatch]:
+        """
+        Check an invoice against the index, then index it.
+
+        Args:
+            entity_id: Owning entity; duplicates are only found within it
+            document_id: The stored document's id
+            fields: Parsed invoice fields (seller_gstin, invoice_number, ...)
+            text: Document text (e.g. ParsedDocument.raw_text)
+
+        Returns:
+            Duplicates found before this invoice was added
+        """
+        fingerprint = self._fingerprint(fields, text)
+        with self.db.transaction() as cursor:
+            matches = self._find(cursor, entity_id, fingerprint)
+            cursor.execute("""
+                INSERT OR REPLACE INTO invoice_signatures (
+                    document_id, entity_id, exact_key, invoice_number, total_amount, signature
+                ) VALUES (?, ?, ?, ?, ?, ?)
+            """, (
+                document_id, entity_id, fingerprint['exact_key'], fingerprint['invoice_number'],
+                fingerprint['total_amount'], self.hasher.pack(fingerprint['signature'])
+            ))
+            cursor.execute("DELETE FROM invoice_lsh WHERE document_id = ?", (document_id,))
+            cursor.executemany(
+                "INSERT INTO invoice_lsh (entity_id, band, bucket, document_id) VALUES (?, ?, ?, ?)",
+                [(entity_id, band, key, document_id) for band, key in enumerate(fingerprint['band_keys'])]
+            )
+        return matches
+
+    def remove(self, document_id: str) -> bool:
+        """Drop a document from the index."""
+        with self.db.transaction() as cursor:
+            cursor.execute("DELETE FROM invoice_lsh WHERE document_id = ?", (document_id,))
+            cursor.execute("DELETE FROM invoice_signatures WHERE document_id = ?", (document_id,))
+            removed = cursor.rowcount > 0
+        return removed
+
+    def close(self) -> None:
+        self.db.close()
+
+    def _find(self, cursor: sqlite3.Cursor, entity_id: str, fingerprint: dict) -> list[DuplicateMatch]:
+        matches = {}
+        if fingerprint['exact_key']:
+            cursor.execute("""
+                SELECT document_id FROM invoice_signatures
+                WHERE entity_id = ? AND exact_key = ?
+            """, (entity_id, fingerprint['exact_key']))
+            for row in cursor.fetchall():
+                matches[row['document_id']] = DuplicateMatch(row['document_id'], "exact", 1.0)
+
+        candidates = set()
+        for band, key in enumerate(fingerprint['band_keys']):
+            cursor.execute("""
+                SELECT document_id FROM invoice_lsh
+                WHERE entity_id = ? AND band = ? AND bucket = ?
+                ORDER BY rowid DESC LIMIT ?
+            """, (entity_id, band, key, MAX_BUCKET_CANDIDATES))
+            candidates.update(row['document_id'] for row in cursor.fetchall())
+        candidates = [c for c in candidates if c not in matches]
+
+        for i in range(0, len(candidates), 500):
+            chunk = candidates[i:i + 500]
+            cursor.execute(f"""
+                SELECT document_id, invoice_number, total_amount, signature
+                FROM invoice_signatures
+                WHERE document_id IN ({','.join('?' * len(chunk))})
+            """, chunk)
+            for row in cursor.fetchall():
+                if self._conflicts(fingerprint, row):
+                    continue
+                similarity = self.hasher.similarity(
+                    fingerprint['signature'], self.hasher.unpack(row['signature'])
+                )
+                if similarity >= self.threshold:
+                    matches[row['document_id']] = DuplicateMatch(row['document_id'], "near", similarity)
+
+        return sorted(matches.values(), key=lambda m: -m.similarity)
+
+    @staticmethod
+    def _conflicts(fingerprint: dict, row: sqlite3.Row) -> bool:
+        """Whether parsed fields show two similar-looking invoices are different."""
+        number = fingerprint['invoice_number']
+        if number and row['invoice_number'] and number != row['invoice_number']:
+            return True
+        total = fingerprint['total_amount']
+        if total is not None and row['total_amount'] is not None:
+            return abs(total - row['total_amount']) > AMOUNT_TOLERANCE
+        return False
+
+
+# Test
+if __name__ == "__main__":
+    import os
+    import time
+
+    print("Testing Invoice Index...")
+    index = InvoiceIndex("invoice_index_test.db")
+    entity = "entity-1"
+
+    original = """TAX INVOICE
+    Seller: Sharma Traders GSTIN 27AAPFU0939F1ZV
+    Invoice No: INV-2024-0042  Date: 15/04/2024
+    Office chairs (HSN 9401) x 10  Taxable Value 50,000.00
+    CGST 9% 4,500.00  SGST 9% 4,500.00  Total Amount 59,000.00"""
+    fields = {'seller_gstin': '27AAPFU0939F1ZV', 'invoice_number': 'INV-2024-0042',
+              'invoice_date': '15/04/2024', 'total_amount': 59000.0}
+
+    print(f"  Original: {index.add(entity, 'doc-1', fields, original)}")
+
+    export = dict(fields, invoice_date='2024-04-15')  # ISO from an accounting export
+    print(f"  Export (same key): {index.add(entity, 'doc-2', export, original)}")
+
+    scan = original.replace("Office", "0ffice").replace("chairs", "chalrs")
+    ocr_fields = {'total_amount': 59000.0}  # OCR missed the number and GSTIN
+    print(f"  Scan (OCR noise): {index.add(entity, 'doc-3', ocr_fields, scan)}")
+
+    other = original.replace("0042", "0043").replace("59,000", "61,360")
+    other_fields = dict(fields, invoice_number='INV-2024-0043', total_amount=61360.0)
+    print(f"  Next invoice, same template: {index.add(entity, 'doc-4', other_fields, other)}")
+
+    start = time.perf_counter()
+    for i in range(2000):
+        text = original.replace("0042", f"{i:05d}").replace("Office chairs", f"Item {i * 7919}")
+        index.add(entity, f"bulk-{i}", dict(fields, invoice_number=f"B{i}", total_amount=float(i)), text)
+    elapsed = time.perf_counter() - start
+    print(f"  2,000 inserts: {elapsed * 1000 / 2000:.2f}ms each")
+
+    index.close()
+    os.remove("invoice_index_test.db")
+    print("\n✅ Invoice index working!")
@@ -0,0 +1,315 @@
+"""
+Durable Job Queue for TaxAlly
+
+SQLite-backed queue for background work (document parsing first):
+- Jobs survive restarts; they live in a `jobs` table beside the data
+- Claiming a job leases it for `visibility_timeout` seconds; a worker
+  that dies mid-job loses the lease and the job becomes claimable again
+- Failures are retried with exponential backoff (plus jitter) until
+  `max_attempts`, then the job is marked failed
+- Claims run in BEGIN IMMEDIATE transactions, so any number of worker
+  processes can share one database file
+"""
+
+import json
+import random
+import sqlite3
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+from .connection import ConnectionManager
+
+
+DEFAULT_VISIBILITY_TIMEOUT = 300.0   # Seconds a claimed job stays leased
+DEFAULT_MAX_ATTEMPTS = 5
+BACKOFF_BASE = 2.0                   # Seconds before the first retry
+BACKOFF_MAX = 600.0
+
+
+@dataclass
+class Job:
+    """A claimed job."""
+    job_id: str
+    kind: str
+    payload: dict
+    attempts: int        # Including this one
+    max_attempts: int
+    locked_by: str
+    locked_until: float
+
+
+def backoff_delay(attempts: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_MAX) -> float:
+    """Seconds to wait after `attempts` failures: exponential, jittered to 50-100%."""
+    delay = min(cap, base * (2 ** (attempts - 1)))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class JobQueue:
+    """
+    SQLite job queue with leases and retries.
+
+    Usage:
+        queue = JobQueue("taxally.db")
+        queue.enqueue("parse_document", {"document_id": doc_id, "path": path})
+
+        job = queue.claim("worker-1")
+        try:
+            ...
+            queue.complete(job)
+        except Exception as e:
+            queue.fail(job, str(e))
+    """
+
+    def __init__(
+        self,
+        db_path: str = "taxally.db",
+        visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    ):
+        self.db_path = db_path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        # Waits on write locks held by other workers
+        self.db = ConnectionManager(db_path, {"busy_timeout": 30000})
+        self._init_db()
+
+    def _init_db(self):
+        """Create the jobs table."""
+        with self.db.transaction() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT DEFAULT '{}',
+                    status TEXT DEFAULT 'queued',
+                    attempts INTEGER DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    available_at REAL NOT NULL,
+                    locked_by TEXT,
+                    locked_until REAL,
+                    last_error TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    finished_at REAL
+                )
+            """)
+            # Claims scan queued jobs by due time, and running jobs by lease expiry
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_available ON jobs(status, available_at)"
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs(status, locked_until)"
+            )
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: dict,
+        delay: float = 0.0,
+        max_attempts: Optional[int] = None,
+        cursor: Optional[sqlite3.Cursor] = None
+    ) -> str:
+        """
+        Add a job; returns its id.
+
+        Args:
+            cursor: Insert through this cursor (on the same database), so
+                the job commits or rolls back with the caller's transaction
+        """
+        job_id = str(uuid.uuid4())
+        row = (
+            job_id, kind, json.dumps(payload),
+            max_attempts or self.max_attempts, time.time() + delay
+        )
+        query = """
+            INSERT INTO jobs (job_id, kind, payload, max_attempts, available_at)
+            VALUES (?, ?, ?, ?, ?)
+        """
+        if cursor is not None:
+            cursor.execute(query, row)
+            return job_id
+        with self.db.cursor() as cursor:
+            cursor.execute(query, row)
+        return job_id
+
+    def claim(self, worker_id: str, kinds: Optional[list[str]] = None) -> Optional[Job]:
+        """
+        Lease the oldest due job, or None if there is none.
+
+        Due jobs are queued jobs whose retry delay has passed, and running
+        jobs whose lease has expired with attempts left.
+        """
+        now = time.time()
+        kind_filter = ""
+        params: list = []
+        if kinds:
+            kind_filter = f"AND kind IN ({','.join('?' * len(kinds))})"
+            params = list(kinds)
+
+        with self.db.transaction(immediate=True) as cursor:
+            # A lease that expired on the final attempt is not retried
+            cursor.execute("""
+                UPDATE jobs
+                SET status = 'failed', locked_by = NULL, locked_until = NULL,
+                    last_error = COALESCE(last_error, 'Lease expired'), finished_at = ?
+                WHERE status = 'running' AND locked_until <= ? AND attempts >= max_attempts
+            """, (now, now))
+            cursor.execute(f"""
+                SELECT job_id FROM (
+                    SELECT job_id, available_at AS due FROM jobs
+                    WHERE status = 'queued' AND available_at <= ? {kind_filter}
+                    UNION ALL
+                    SELECT job_id, locked_until AS due FROM jobs
+                    WHERE status = 'running' AND locked_until <= ? {kind_filter}
+                ) ORDER BY due LIMIT 1
+            """, [now, *params, now, *params])
+            row = cursor.fetchone()
+            if row is None:
+                return None
+
+            locked_until = now + self.visibility_timeout
+            cursor.execute("""
+                UPDATE jobs
+                SET status = 'running', attempts = attempts + 1,
+                    locked_by = ?, locked_until = ?
+                WHERE job_id = ?
+            """, (worker_id, locked_until, row['job_id']))
+            cursor.execute("SELECT * FROM jobs WHERE job_id = ?", (row['job_id'],))
+            job = cursor.fetchone()
+
+        return Job(
+            job_id=job['job_id'],
+            kind=job['kind'],
+            payload=json.loads(job['payload']),
+            attempts=job['attempts'],
+            max_attempts=job['max_attempts'],
+            locked_by=worker_id,
+            locked_until=locked_until
+        )
+
+    def extend(
+        self,
+        job: Job,
+        seconds: Optional[float] = None,
+        connection: Optional[sqlite3.Connection] = None
+    ) -> bool:
+        """
+        Renew a lease for long jobs; False if the lease was lost.
+
+        Args:
+            connection: Run the update on this connection instead of the
+                calling thread's, e.g. the worker's own connection from a
+                lease-renewal thread (it must be idle meanwhile)
+        """
+        locked_until = time.time() + (seconds or self.visibility_timeout)
+        updated = self._update_owned(job, "locked_until = ?", [locked_until], connection)
+        if updated:
+            job.locked_until = locked_until
+        return updated
+
+    def complete(self, job: Job) -> bool:
+        """Mark a job done; False if its lease had already been lost."""
+        return self._update_owned(
+            job, "status = 'done', locked_by = NULL, locked_until = NULL, finished_at = ?",
+            [time.time()]
+        )
+
+    def fail(self, job: Job, error: str) -> str:
+        """
+        Record a failed attempt.
+
+        Returns:
+            "retry" (requeued with backoff), "failed" (out of attempts)
+            or "lost" (the lease had expired and another worker owns it)
+        """
+        if job.attempts >= job.max_attempts:
+            updated = self._update_owned(
+                job, "status = 'failed', locked_by = NULL, locked_until = NULL, "
+                     "last_error = ?, finished_at = ?",
+                [error, time.time()]
+            )
+            return "failed" if updated else "lost"
+
+        updated = self._update_owned(
+            job, "status = 'queued', locked_by = NULL, locked_until = NULL, "
+                 "last_error = ?, available_at = ?",
+            [error, time.time() + backoff_delay(job.attempts)]
+        )
+        return "retry" if updated else "lost"
+
+    def _update_owned(
+        self,
+        job: Job,
+        set_clause: str,
+        values: list,
+        connection: Optional[sqlite3.Connection] = None
+    ) -> bool:
+        """Update a job only while this worker still holds its lease."""
+        query = f"""
+            UPDATE jobs SET {set_clause}
+            WHERE job_id = ? AND status = 'running' AND locked_by = ? AND attempts = ?
+        """
+        params = [*values, job.job_id, job.locked_by, job.attempts]
+        if connection is not None:
+            # Autocommit connection (see ConnectionManager); one statement
+            return connection.execute(query, params).rowcount > 0
+        with self.db.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.rowcount > 0
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        with self.db.cursor() as cursor:
+            cursor.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,))
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        return {**dict(row), 'payload': json.loads(row['payload'])}
+
+    def stats(self) -> dict:
+        """Job counts by status."""
+        with self.db.cursor() as cursor:
+            cursor.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")
+            counts = {row['status']: row['n'] for row in cursor.fetchall()}
+        return {status: counts.get(status, 0) for status in ("queued", "running", "done", "failed")}
+
+    def purge_finished(self, older_than: float = 7 * 86400) -> int:
+        """Delete done/failed jobs finished more than `older_than` seconds ago."""
+        with self.db.cursor() as cursor:
+            cursor.execute("""
+                DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?
+            """, (time.time() - older_than,))
+            return cursor.rowcount
+
+    def close(self) -> None:
+        self.db.close()
+
+
+# Test
+if __name__ == "__main__":
+    import os
+
+    print("Testing Job Queue...")
+    queue = JobQueue("job_queue_test.db", visibility_timeout=0.2, max_attempts=2)
+
+    first = queue.enqueue("parse_document", {"document_id": "doc-1"})
+    queue.enqueue("parse_document", {"document_id": "doc-2"})
+
+    job = queue.claim("worker-a")
+    print(f"  Claimed {job.payload} (attempt {job.attempts})")
+    print(f"  Completed: {queue.complete(job)}")
+
+    job = queue.claim("worker-a")
+    print(f"  Claimed {job.payload}; worker-a stalls past its lease...")
+    time.sleep(0.25)
+    stolen = queue.claim("worker-b")
+    print(f"  worker-b reclaimed {stolen.payload} (attempt {stolen.attempts})")
+    print(f"  worker-a completing now: {queue.complete(job)}")
+    print(f"  worker-b fails: {queue.fail(stolen, 'ValueError: bad PDF')}")
+
+    print(f"  Stats: {queue.stats()}")
+    print(f"  Backoff delays: {[round(backoff_delay(n), 1) for n in range(1, 6)]}")
+
+    queue.close()
+    os.remove("job_queue_test.db")
+    print("\n✅ Job queue working!")
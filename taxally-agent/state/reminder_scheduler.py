@@ -0,0 +1,303 @@
+"""
+Deadline Reminder Scheduler for TaxAlly
+
+In-process scheduler that fires reminder callbacks ahead of pending
+deadlines. Pending deadlines are loaded from SQLiteStore once and kept
+in a min-heap ordered by the next reminder time, so each tick only
+touches reminders that are actually due plus any newly inserted rows.
+
+Reminder stages:
+- Lead times default to 7d, 3d and 1d before the due date
+- `deadlines.reminder_sent` stores how many stages have been sent
+- If several stages are already overdue (e.g. a deadline added two days
+  before it is due), only the most urgent one is sent
+"""
+
+import heapq
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from .sqlite_store import SQLiteStore
+
+
+DEFAULT_LEAD_TIMES = (timedelta(days=7), timedelta(days=3), timedelta(days=1))
+
+
+@dataclass
+class ReminderEvent:
+    """A single reminder due to be sent."""
+    deadline_id: str
+    entity_id: str
+    deadline_type: str
+    due_date: datetime
+    financial_year: Optional[str]
+    lead_time: timedelta
+    stage: int  # Reminders sent once this one goes out
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    """Parse a SQLite timestamp column into a naive datetime."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+class ReminderScheduler:
+    """
+    Heap-based reminder scheduler over the `deadlines` table.
+
+    Usage:
+        scheduler = ReminderScheduler(store, send_reminders)
+        scheduler.load()
+        scheduler.run(stop_event)   # or call tick() from your own loop
+
+    The callback receives a list of ReminderEvent (at most `batch_size`)
+    and reminders are only marked as sent after it returns. When a batch
+    fails inside run(), the exception is kept in `last_error` and passed
+    to `on_error` if given; the batch is retried on the next tick.
+    """
+
+    def __init__(
+        self,
+        store: SQLiteStore,
+        callback: Callable[[list[ReminderEvent]], None],
+        lead_times: tuple[timedelta, ...] = DEFAULT_LEAD_TIMES,
+        batch_size: int = 1000,
+        poll_interval: float = 60.0,
+        page_size: int = 10000,
+        on_error: Optional[Callable[[Exception], None]] = None
+    ):
+        if not lead_times:
+            raise ValueError("At least one lead time is required")
+
+        self.store = store
+        self.callback = callback
+        # Longest lead first, so stage N is always more urgent than stage N-1
+        self.lead_times = tuple(sorted(lead_times, reverse=True))
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.page_size = page_size
+        self.on_error = on_error
+        self.last_error: Optional[Exception] = None
+
+        # Heap of (fire_at, seq, deadline_id, stage)
+        self._heap: list[tuple[datetime, int, str, int]] = []
+        self._deadlines: dict[str, dict] = {}
+        self._seq = 0
+        self._last_rowid = 0
+        self._lock = threading.Lock()
+
+    # ============ Loading ============
+
+    def load(self, now: Optional[datetime] = None) -> int:
+        """
+        Load pending deadlines added since the last load.
+
+        The first call pages through the whole table once; later calls
+        only read rows with a higher rowid, so new deadlines are picked
+        up without rescanning.
+
+        Returns:
+            Number of deadlines scheduled
+        """
+        now = now or datetime.utcnow()
+        scheduled = 0
+
+        while True:
+            rows = self.store.get_pending_deadlines(
+                after_rowid=self._last_rowid,
+                max_reminders=len(self.lead_times),
+                limit=self.page_size
+            )
+            if not rows:
+                break
+
+            with self._lock:
+                for row in rows:
+                    self._last_rowid = max(self._last_rowid, row['rowid'])
+                    due_date = _parse_timestamp(row['due_date'])
+                    if due_date is None:
+                        continue
+                    row['due_date'] = due_date
+                    if self._schedule(row, int(row['reminder_sent'] or 0), now):
+                        scheduled += 1
+
+            if len(rows) < self.page_size:
+                break
+
+        return scheduled
+
+    def _schedule(self, deadline: dict, sent: int, now: datetime) -> bool:
+        """Push the next reminder stage for a deadline onto the heap."""
+        due_date = deadline['due_date']
+        if due_date <= now or sent >= len(self.lead_times):
+            self._deadlines.pop(deadline['deadline_id'], None)
+            return False
+
+        # Skip ahead past stages whose window has already opened, keeping
+        # only the most urgent one
+        stage = sent
+        while (stage + 1 < len(self.lead_times)
+               and due_date - self.lead_times[stage + 1] <= now):
+            stage += 1
+
+        fire_at = due_date - self.lead_times[stage]
+        self._deadlines[deadline['deadline_id']] = deadline
+        self._seq += 1
+        heapq.heappush(self._heap, (fire_at, self._seq, deadline['deadline_id'], stage))
+        return True
+
+    # ============ Firing ============
+
+    def next_fire_time(self) -> Optional[datetime]:
+        """When the next reminder is due, or None if nothing is scheduled."""
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def tick(self, now: Optional[datetime] = None) -> int:
+        """
+        Pick up new deadlines and fire every reminder that is due.
+
+        Returns:
+            Number of reminders sent
+        """
+        now = now or datetime.utcnow()
+        self.load(now)
+
+        with self._lock:
+            due = []
+            while self._heap and self._heap[0][0] <= now:
+                _, _, deadline_id, stage = heapq.heappop(self._heap)
+                if deadline_id in self._deadlines:
+                    due.append((deadline_id, stage))
+
+        sent = 0
+        for i in range(0, len(due), self.batch_size):
+            sent += self._fire_batch(due[i:i + self.batch_size], now)
+        return sent
+
+    def _fire_batch(self, batch: list[tuple[str, int]], now: datetime) -> int:
+        """Send one batch of reminders and record them in bulk."""
+        # Deadlines completed since loading are dropped here, one indexed
+        # lookup per batch instead of a table scan
+        pending = self.store.filter_pending_deadlines([d for d, _ in batch])
+
+        events = []
+        for deadline_id, stage in batch:
+            deadline = self._deadlines.get(deadline_id)
+            if deadline is None:
+                continue
+            if deadline_id not in pending or deadline['due_date'] <= now:
+                with self._lock:
+                    self._deadlines.pop(deadline_id, None)
+                continue
+            events.append(ReminderEvent(
+                deadline_id=deadline_id,
+                entity_id=deadline['entity_id'],
+                deadline_type=deadline['deadline_type'],
+                due_date=deadline['due_date'],
+                financial_year=deadline.get('financial_year'),
+                lead_time=self.lead_times[stage],
+                stage=stage + 1
+            ))
+
+        if not events:
+            return 0
+
+        try:
+            self.callback(events)
+        except Exception:
+            # Put the batch back so the next tick retries it
+            with self._lock:
+                for event in events:
+                    self._seq += 1
+                    heapq.heappush(
+                        self._heap,
+                        (now, self._seq, event.deadline_id, event.stage - 1)
+                    )
+            raise
+
+        self.store.mark_reminders_sent([(e.deadline_id, e.stage) for e in events])
+
+        with self._lock:
+            for event in events:
+                deadline = self._deadlines.get(event.deadline_id)
+                if deadline is not None:
+                    self._schedule(deadline, event.stage, now)
+
+        return len(events)
+
+    # ============ Run Loop ============
+
+    def run(self, stop_event: Optional[threading.Event] = None) -> None:
+        """
+        Run the scheduler until `stop_event` is set.
+
+        Sleeps until the next reminder is due, but never longer than
+        `poll_interval` so new deadlines are picked up promptly. After a
+        failed tick it waits the full `poll_interval` before retrying.
+        """
+        stop_event = stop_event or threading.Event()
+        self.load()
+
+        while not stop_event.is_set():
+            failed = False
+            try:
+                self.tick()
+            except Exception as e:
+                failed = True
+                self.last_error = e
+                if self.on_error is not None:
+                    self.on_error(e)
+
+            # A failed batch is requeued as due now; back off before retrying
+            wait = self.poll_interval
+            next_fire = self.next_fire_time()
+            if next_fire is not None and not failed:
+                until_next = (next_fire - datetime.utcnow()).total_seconds()
+                wait = max(0.0, min(wait, until_next))
+            stop_event.wait(wait)
+
+    def start(self) -> threading.Event:
+        """Run the scheduler on a daemon thread. Set the returned event to stop."""
+        stop_event = threading.Event()
+        thread = threading.Thread(
+            target=self.run, args=(stop_event,), name="reminder-scheduler", daemon=True
+        )
+        thread.start()
+        return stop_event
+
+
+# Test
+if __name__ == "__main__":
+    print("Testing Reminder Scheduler...")
+    store = SQLiteStore("reminder_test.db")
+
+    user_id = store.create_user(name="Test User")
+    entity_id = store.create_entity(user_id=user_id, name="Test Business")
+
+    now = datetime.utcnow()
+    for days in (2, 5, 10, 40):
+        store.add_deadline(entity_id, f"gstr3b_{days}d", now + timedelta(days=days), "2024-25")
+
+    def send(events: list[ReminderEvent]) -> None:
+        for e in events:
+            print(f"  Reminder {e.stage}: {e.deadline_type} due {e.due_date:%Y-%m-%d} "
+                  f"({e.lead_time.days}d lead)")
+
+    scheduler = ReminderScheduler(store, send)
+    print(f"Scheduled: {scheduler.load(now)}")
+    print(f"Sent now: {scheduler.tick(now)}")
+    print(f"Sent in 6 days: {scheduler.tick(now + timedelta(days=6))}")
+
+    import os
+    store.close()
+    os.remove("reminder_test.db")
+    print("\n✅ Reminder scheduler working!")
@@ -9,12 +9,15 @@ Key design decisions:
 5. Conversation context preserved
 """
 
-from dataclasses import dataclass, field
-from datetime import datetime
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timedelta
 from enum import Enum
 from typing import Any, Optional
 from abc import ABC, abstractmethod
 import json
+import sys
+import uuid
 
 
 # ============ Enums ============
@@ -46,6 +49,15 @@ class DocumentType(Enum):
     OTHER = "other"
 
 
+class ProcessingStatus(Enum):
+    """Document.processing_status values (stored as the plain string)."""
+    PENDING = "pending"
+    PROCESSING = "processing"
+    PROCESSED = "processed"
+    REVIEW_NEEDED = "review_needed"  # Parsed with low confidence
+    FAILED = "failed"
+
+
 class RiskSeverity(Enum):
     LOW = "low"
     MEDIUM = "medium"
@@ -53,9 +65,74 @@ class RiskSeverity(Enum):
     CRITICAL = "critical"
 
 
+# ============ Compact Records ============
+#
+# Stores can hold millions of these records, so they are slotted (no
+# per-instance __dict__), containers that are usually empty stay None
+# until first read, enum fields given as strings become the shared enum
+# member, and repeated short strings (ids, codes, statuses) are interned.
+
+def _lazy(factory):
+    """Container field allocated on first read instead of in __init__."""
+    return field(default=None, metadata={"lazy": factory})
+
+
+class _LazySlot:
+    """Wraps a slot so that reading None allocates the empty container."""
+
+    def __init__(self, slot, factory):
+        self.slot = slot
+        self.factory = factory
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = self.slot.__get__(obj, objtype)
+        if value is None:
+            value = self.factory()
+            self.slot.__set__(obj, value)
+        return value
+
+    def __set__(self, obj, value):
+        self.slot.__set__(obj, value)
+
+
+def record(*interned: str):
+    """
+    @dataclass(slots=True) with lazy containers, enum coercion and interning.
+
+    Args:
+        interned: str fields to sys.intern (repeated values only, not free text)
+    """
+    def wrap(cls):
+        enums = {
+            name: hint for name, hint in cls.__annotations__.items()
+            if isinstance(hint, type) and issubclass(hint, Enum)
+        }
+
+        def __post_init__(self):
+            for name, enum_type in enums.items():
+                value = getattr(self, name)
+                if value is not None and not isinstance(value, enum_type):
+                    setattr(self, name, enum_type(value))
+            for name in interned:
+                value = getattr(self, name)
+                if type(value) is str:
+                    setattr(self, name, sys.intern(value))
+
+        cls.__post_init__ = __post_init__
+        cls = dataclass(slots=True)(cls)
+        for f in fields(cls):
+            if "lazy" in f.metadata:
+                setattr(cls, f.name, _LazySlot(cls.__dict__[f.name], f.metadata["lazy"]))
+        return cls
+
+    return wrap
+
+
 # ============ Core Schemas ============
 
-@dataclass
+@record()
 class UserProfile:
     """User account information."""
     user_id: str
@@ -64,11 +141,11 @@ class UserProfile:
     name: Optional[str] = None
     created_at: datetime = field(default_factory=datetime.utcnow)
     updated_at: datetime = field(default_factory=datetime.utcnow)
-    preferences: dict = field(default_factory=dict)
+    preferences: dict = _lazy(dict)
     # Future: roles, permissions, subscription tier
 
 
-@dataclass
+@record("state", "preferred_tax_regime")
 class TaxProfile:
     """Tax-specific profile for an entity."""
     pan: Optional[str] = None
@@ -77,11 +154,11 @@ class TaxProfile:
     gstin: Optional[str] = None
     tan: Optional[str] = None  # For TDS deductors
     state: Optional[str] = None
-    income_sources: list[str] = field(default_factory=list)
+    income_sources: list[str] = _lazy(list)
     preferred_tax_regime: Optional[str] = None  # "old" or "new"
 
 
-@dataclass
+@record("user_id")
 class Entity:
     """
     Business or individual entity.
@@ -91,13 +168,13 @@ class Entity:
     user_id: str
     name: str
     entity_type: EntityType
-    tax_profile: TaxProfile = field(default_factory=TaxProfile)
+    tax_profile: TaxProfile = _lazy(TaxProfile)
     is_primary: bool = False
     created_at: datetime = field(default_factory=datetime.utcnow)
-    metadata: dict = field(default_factory=dict)
+    metadata: dict = _lazy(dict)
 
 
-@dataclass
+@record("fy", "entity_id")
 class FinancialYear:
     """Represents a financial year's data for an entity."""
     fy: str  # Format: "2024-25"
@@ -109,10 +186,10 @@ class FinancialYear:
     gst_collected: float = 0.0
     gst_paid: float = 0.0
     estimated_tax_liability: float = 0.0
-    filings: dict = field(default_factory=dict)  # Filing status per return type
+    filings: dict = _lazy(dict)  # Filing status per return type
 
 
-@dataclass
+@record("entity_id", "financial_year", "processing_status", "source")
 class Document:
     """
     Document with lineage tracking.
@@ -124,14 +201,14 @@ class Document:
     filename: str
     upload_timestamp: datetime = field(default_factory=datetime.utcnow)
     financial_year: Optional[str] = None
-    extracted_data: dict = field(default_factory=dict)
-    processing_status: str = "pending"  # pending, processed, failed
+    extracted_data: dict = _lazy(dict)
+    processing_status: str = ProcessingStatus.PENDING.value  # See ProcessingStatus
     source: str = "upload"  # upload, email, api
-    lineage: dict = field(default_factory=dict)  # Parent docs, derived docs
-    metadata: dict = field(default_factory=dict)
+    lineage: dict = _lazy(dict)  # Parent docs, derived docs
+    metadata: dict = _lazy(dict)
 
 
-@dataclass
+@record("entity_id", "category", "financial_year")
 class ComplianceRisk:
     """Individual compliance risk item."""
     risk_id: str
@@ -147,7 +224,7 @@ class ComplianceRisk:
     financial_year: Optional[str] = None
 
 
-@dataclass
+@record("entity_id")
 class ComplianceSnapshot:
     """
     Point-in-time compliance status.
@@ -160,24 +237,24 @@ class ComplianceSnapshot:
     gst_status: ComplianceStatus = ComplianceStatus.UNKNOWN
     income_tax_status: ComplianceStatus = ComplianceStatus.UNKNOWN
     tds_status: ComplianceStatus = ComplianceStatus.UNKNOWN
-    active_risks: list[str] = field(default_factory=list)  # risk_ids
+    active_risks: list[str] = _lazy(list)  # risk_ids
     score: int = 0  # 0-100 compliance score
-    metadata: dict = field(default_factory=dict)
+    metadata: dict = _lazy(dict)
 
 
-@dataclass
+@record("session_id", "entity_context")
 class ConversationEntry:
     """Single conversation turn."""
     turn_id: str
     session_id: str
     user_message: str
     assistant_message: str
-    tool_calls: list[dict] = field(default_factory=list)
+    tool_calls: list[dict] = _lazy(list)
     timestamp: datetime = field(default_factory=datetime.utcnow)
     entity_context: Optional[str] = None  # Which entity was being discussed
 
 
-@dataclass
+@record("user_id", "active_entity_id")
 class Session:
     """User session with conversation history."""
     session_id: str
@@ -185,11 +262,11 @@ class Session:
     started_at: datetime = field(default_factory=datetime.utcnow)
     last_activity: datetime = field(default_factory=datetime.utcnow)
     active_entity_id: Optional[str] = None
-    conversation: list[ConversationEntry] = field(default_factory=list)
+    conversation: list[ConversationEntry] = _lazy(list)
     context_summary: Optional[str] = None  # LLM-generated summary for long convos
 
 
-@dataclass
+@record("entity_id", "deadline_type", "financial_year", "status")
 class Deadline:
     """Compliance deadline tracking."""
     deadline_id: str
@@ -202,6 +279,9 @@ class Deadline:
     reminder_sent: bool = False
 
 
+HISTORY_TURNS = 5  # Conversation turns included in get_user_state()
+
+
 # ============ State Store Interface ============
 
 class StateStore(ABC):
@@ -308,6 +388,11 @@ class InMemoryStateStore(StateStore):
     """
     In-memory state store for MVP.
     Replace with persistent store in production.
+
+    Per-user and per-entity lookups go through secondary indexes kept up
+    to date by every mutation, so they cost O(records returned) rather than
+    O(records stored). Records must be written through the store methods
+    (not by assigning into the dicts) to be indexed.
     """
 
     def __init__(self):
@@ -320,6 +405,16 @@ class InMemoryStateStore(StateStore):
         self.sessions: dict[str, Session] = {}
         self.deadlines: dict[str, Deadline] = {}
 
+        # Secondary indexes (inner dicts keep insertion order)
+        self._entities_by_user: dict[str, dict[str, Entity]] = {}
+        self._documents_by_entity: dict[str, dict[str, Document]] = {}
+        self._documents_by_type: dict[tuple[str, DocumentType], dict[str, Document]] = {}
+        self._active_risks: dict[str, dict[str, ComplianceRisk]] = {}
+        self._snapshots_by_entity: dict[str, list[tuple[datetime, str]]] = {}
+        self._sessions_by_user: dict[str, dict[str, Session]] = {}
+        # entity_id -> [(due_date, deadline_id)] of pending deadlines, sorted
+        self._pending_deadlines: dict[str, list[tuple[datetime, str]]] = {}
+
     def get_user(self, user_id: str) -> Optional[UserProfile]:
         return self.users.get(user_id)
 
@@ -336,21 +431,32 @@ class InMemoryStateStore(StateStore):
             user.updated_at = datetime.utcnow()
 
     def get_entities(self, user_id: str) -> list[Entity]:
-        return [e for e in self.entities.values() if e.user_id == user_id]
+        return list(self._entities_by_user.get(user_id, {}).values())
 
     def get_entity(self, entity_id: str) -> Optional[Entity]:
         return self.entities.get(entity_id)
 
     def create_entity(self, entity: Entity) -> str:
+        self._unindex_entity(entity.entity_id)
         self.entities[entity.entity_id] = entity
+        self._entities_by_user.setdefault(entity.user_id, {})[entity.entity_id] = entity
         return entity.entity_id
 
     def update_entity(self, entity_id: str, updates: dict) -> None:
+        if "entity_id" in updates:
+            raise ValueError("entity_id cannot be updated")
         if entity_id in self.entities:
             entity = self.entities[entity_id]
+            self._unindex_entity(entity_id)
             for key, value in updates.items():
                 if hasattr(entity, key):
                     setattr(entity, key, value)
+            self._entities_by_user.setdefault(entity.user_id, {})[entity_id] = entity
+
+    def _unindex_entity(self, entity_id: str) -> None:
+        old = self.entities.get(entity_id)
+        if old is not None:
+            _discard(self._entities_by_user, old.user_id, entity_id)
 
     def get_financial_year(self, entity_id: str, fy: str) -> Optional[FinancialYear]:
         key = f"{entity_id}:{fy}"
@@ -365,43 +471,63 @@ class InMemoryStateStore(StateStore):
                 setattr(self.financial_years[key], k, v)
 
     def store_document(self, doc: Document) -> str:
+        old = self.documents.get(doc.document_id)
+        if old is not None:
+            _discard(self._documents_by_entity, old.entity_id, old.document_id)
+            _discard(self._documents_by_type, (old.entity_id, old.document_type), old.document_id)
         self.documents[doc.document_id] = doc
+        self._documents_by_entity.setdefault(doc.entity_id, {})[doc.document_id] = doc
+        self._documents_by_type.setdefault((doc.entity_id, doc.document_type), {})[doc.document_id] = doc
         return doc.document_id
 
     def get_documents(self, entity_id: str, doc_type: Optional[DocumentType] = None) -> list[Document]:
-        docs = [d for d in self.documents.values() if d.entity_id == entity_id]
         if doc_type:
-            docs = [d for d in docs if d.document_type == doc_type]
-        return docs
+            return list(self._documents_by_type.get((entity_id, doc_type), {}).values())
+        return list(self._documents_by_entity.get(entity_id, {}).values())
 
     def add_risk(self, risk: ComplianceRisk) -> str:
+        old = self.risks.get(risk.risk_id)
+        if old is not None:
+            _discard(self._active_risks, old.entity_id, old.risk_id)
         self.risks[risk.risk_id] = risk
+        if risk.resolved_at is None:
+            self._active_risks.setdefault(risk.entity_id, {})[risk.risk_id] = risk
         return risk.risk_id
 
     def get_active_risks(self, entity_id: str) -> list[ComplianceRisk]:
-        return [
-            r for r in self.risks.values()
-            if r.entity_id == entity_id and r.resolved_at is None
-        ]
+        return list(self._active_risks.get(entity_id, {}).values())
 
     def resolve_risk(self, risk_id: str, notes: str) -> None:
         if risk_id in self.risks:
-            self.risks[risk_id].resolved_at = datetime.utcnow()
-            self.risks[risk_id].resolution_notes = notes
+            risk = self.risks[risk_id]
+            risk.resolved_at = datetime.utcnow()
+            risk.resolution_notes = notes
+            _discard(self._active_risks, risk.entity_id, risk_id)
 
     def save_compliance_snapshot(self, snapshot: ComplianceSnapshot) -> str:
+        old = self.snapshots.get(snapshot.snapshot_id)
+        if old is not None:
+            self._snapshots_by_entity[old.entity_id].remove((old.timestamp, old.snapshot_id))
         self.snapshots[snapshot.snapshot_id] = snapshot
+        insort(
+            self._snapshots_by_entity.setdefault(snapshot.entity_id, []),
+            (snapshot.timestamp, snapshot.snapshot_id)
+        )
         return snapshot.snapshot_id
 
     def get_compliance_history(self, entity_id: str, limit: int = 10) -> list[ComplianceSnapshot]:
-        snapshots = [s for s in self.snapshots.values() if s.entity_id == entity_id]
-        return sorted(snapshots, key=lambda x: x.timestamp, reverse=True)[:limit]
+        history = self._snapshots_by_entity.get(entity_id, [])
+        return [self.snapshots[snapshot_id] for _, snapshot_id in reversed(history[max(len(history) - limit, 0):])]
 
     def get_session(self, session_id: str) -> Optional[Session]:
         return self.sessions.get(session_id)
 
     def create_session(self, session: Session) -> str:
+        old = self.sessions.get(session.session_id)
+        if old is not None:
+            _discard(self._sessions_by_user, old.user_id, old.session_id)
         self.sessions[session.session_id] = session
+        self._sessions_by_user.setdefault(session.user_id, {})[session.session_id] = session
         return session.session_id
 
     def add_conversation_turn(self, session_id: str, entry: ConversationEntry) -> None:
@@ -409,21 +535,83 @@ class InMemoryStateStore(StateStore):
             self.sessions[session_id].conversation.append(entry)
             self.sessions[session_id].last_activity = datetime.utcnow()
 
+    def record_turn(
+        self,
+        user_id: str,
+        session_id: str,
+        user_message: str,
+        assistant_message: str,
+        tool_calls: Optional[list[dict]] = None,
+        entity_id: Optional[str] = None
+    ) -> None:
+        """Store one agent exchange, starting the session if it is new."""
+        if session_id not in self.sessions:
+            self.create_session(Session(session_id=session_id, user_id=user_id))
+        self.add_conversation_turn(session_id, ConversationEntry(
+            turn_id=str(uuid.uuid4()),
+            session_id=session_id,
+            user_message=user_message,
+            assistant_message=assistant_message,
+            tool_calls=tool_calls or [],
+            entity_context=entity_id
+        ))
+
+    def add_deadline(self, deadline: Deadline) -> str:
+        old = self.deadlines.get(deadline.deadline_id)
+        if old is not None:
+            self._unindex_deadline(old)
+        self.deadlines[deadline.deadline_id] = deadline
+        if deadline.status == "pending":
+            insort(
+                self._pending_deadlines.setdefault(deadline.entity_id, []),
+                (deadline.due_date, deadline.deadline_id)
+            )
+        return deadline.deadline_id
+
     def get_upcoming_deadlines(self, entity_id: str, days: int = 30) -> list[Deadline]:
-        from datetime import timedelta
+        """Pending deadlines due within `days`, earliest first."""
+        pending = self._pending_deadlines.get(entity_id, [])
         cutoff = datetime.utcnow() + timedelta(days=days)
-        return [
-            d for d in self.deadlines.values()
-            if d.entity_id == entity_id
-            and d.status == "pending"
-            and d.due_date <= cutoff
-        ]
+        end = bisect_right(pending, (cutoff, _MAX_ID))
+        return [self.deadlines[deadline_id] for _, deadline_id in pending[:end]]
 
     def update_deadline_status(self, deadline_id: str, status: str) -> None:
         if deadline_id in self.deadlines:
-            self.deadlines[deadline_id].status = status
+            deadline = self.deadlines[deadline_id]
+            self._unindex_deadline(deadline)
+            deadline.status = status
             if status == "completed":
-                self.deadlines[deadline_id].completed_at = datetime.utcnow()
+                deadline.completed_at = datetime.utcnow()
+            if status == "pending":
+                insort(
+                    self._pending_deadlines.setdefault(deadline.entity_id, []),
+                    (deadline.due_date, deadline_id)
+                )
+
+    def _unindex_deadline(self, deadline: Deadline) -> None:
+        pending = self._pending_deadlines.get(deadline.entity_id)
+        item = (deadline.due_date, deadline.deadline_id)
+        if pending:
+            index = bisect_left(pending, item)
+            if index < len(pending) and pending[index] == item:
+                del pending[index]
+                if not pending:
+                    del self._pending_deadlines[deadline.entity_id]
+
+    def record_owners(self, kind: str, record_ids) -> dict[str, str]:
+        """Owning user of each entity, risk, deadline or session id (see SQLiteStore)."""
+        records = {
+            "entity": self.entities, "risk": self.risks,
+            "deadline": self.deadlines, "session": self.sessions,
+        }[kind]
+        owners = {}
+        for record_id in record_ids:
+            record = records.get(record_id)
+            if kind in ("risk", "deadline") and record is not None:
+                record = self.entities.get(record.entity_id)
+            if record is not None:
+                owners[record_id] = record.user_id
+        return owners
 
     # Convenience method for agent
     def get_user_state(self, user_id: str) -> dict:
@@ -470,9 +658,69 @@ class InMemoryStateStore(StateStore):
                 for d in self.get_upcoming_deadlines(entity.entity_id)
             ])
 
+        # Latest exchanges across the user's sessions
+        turns = sorted(
+            (entry for session in self._sessions_by_user.get(user_id, {}).values()
+             for entry in session.conversation[-HISTORY_TURNS:]),
+            key=lambda entry: entry.timestamp
+        )
+        state["conversation_history"] = [
+            {"user": entry.user_message, "assistant": entry.assistant_message}
+            for entry in turns[-HISTORY_TURNS:]
+        ]
+
         return state
 
     def update_user_state(self, user_id: str, updates: dict) -> None:
         """Update user state from agent."""
         if "profile" in updates:
             self.update_user(user_id, updates["profile"])
+
+
+_MAX_ID = "\U0010ffff"  # Sorts after every id, for bisecting (due_date, id) pairs
+
+
+def _discard(index: dict, key: Any, record_id: str) -> None:
+    """Remove a record from a secondary index, dropping emptied buckets."""
+    bucket = index.get(key)
+    if bucket is not None:
+        bucket.pop(record_id, None)
+        if not bucket:
+            del index[key]
+
+
+# Test
+if __name__ == "__main__":
+    import time
+
+    print("Testing In-Memory State Store indexes...")
+    store = InMemoryStateStore()
+    now = datetime.utcnow()
+    for u in range(100_000):
+        user_id = f"user-{u}"
+        store.create_user(UserProfile(user_id=user_id, name=f"User {u}"))
+        for e in range(2):
+            entity_id = f"{user_id}-entity-{e}"
+            store.create_entity(Entity(entity_id, user_id, f"Business {e}", EntityType.PROPRIETORSHIP))
+            store.store_document(Document(f"{entity_id}-doc", entity_id, DocumentType.INVOICE, "inv.pdf"))
+            store.add_risk(ComplianceRisk(f"{entity_id}-risk", entity_id, "gst", RiskSeverity.HIGH,
+                                          "GSTR-3B pending", "Not filed"))
+            for days in (3, 20, 90):
+                store.add_deadline(Deadline(f"{entity_id}-d{days}", entity_id, f"due+{days}",
+                                            now + timedelta(days=days), "2024-25"))
+    print(f"  Loaded {len(store.users):,} users, {len(store.entities):,} entities, "
+          f"{len(store.deadlines):,} deadlines")
+
+    store.resolve_risk("user-7-entity-0-risk", "Filed")
+    store.update_deadline_status("user-7-entity-0-d3", "completed")
+    store.update_entity("user-7-entity-1", {"user_id": "user-8"})
+    print(f"  user-7 entities: {[e.entity_id for e in store.get_entities('user-7')]}")
+    print(f"  user-7-entity-0 risks: {store.get_active_risks('user-7-entity-0')}, "
+          f"deadlines: {[d.deadline_type for d in store.get_upcoming_deadlines('user-7-entity-0')]}")
+
+    start = time.perf_counter()
+    for u in range(10_000):
+        store.get_user_state(f"user-{u}")
+    print(f"  get_user_state: {(time.perf_counter() - start) / 10_000 * 1e6:.1f}µs per user")
+
+    print("\n✅ In-memory state store working!")
@@ -0,0 +1,596 @@
+"""
+SQLite State Store for TaxAlly
+
+The StateStore interface (state.schema) on top of the SQLiteStore database:
+- Reads and writes the schema dataclasses (UserProfile, Entity, ...), so
+  the agent runs on persistent state instead of InMemoryStateStore
+- Sessions and conversation turns are stored too; get_user_state()
+  includes the user's latest turns for _build_conversation
+- Every process opening the same file shares the state (WAL, per-thread
+  connections, busy timeout from state.connection), so several API
+  workers can serve the same users
+"""
+
+import json
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from .schema import (
+    StateStore, UserProfile, Entity, EntityType, TaxProfile, FinancialYear,
+    Document, DocumentType, ComplianceRisk, RiskSeverity, ComplianceSnapshot,
+    ComplianceStatus, ConversationEntry, Session, Deadline, HISTORY_TURNS
+)
+from .sqlite_store import SQLiteStore
+
+
+# Entity/TaxProfile attribute -> entities column
+TAX_PROFILE_COLUMNS = (
+    "pan", "gstin", "gst_registered", "tan", "state", "income_sources", "preferred_tax_regime"
+)
+FINANCIAL_YEAR_COLUMNS = (
+    "turnover", "gross_income", "tax_paid", "tds_collected", "gst_collected",
+    "gst_paid", "estimated_tax_liability", "filings"
+)
+
+
+def _to_db_time(value: Optional[datetime]) -> Optional[str]:
+    # Same layout as CURRENT_TIMESTAMP, so stored times sort together
+    return value.isoformat(sep=" ") if value else None
+
+
+def _from_db_time(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _enum(enum_type, value, default):
+    try:
+        return enum_type(value)
+    except ValueError:
+        return default
+
+
+class SQLiteStateStore(StateStore):
+    """
+    Persistent StateStore.
+
+    Usage:
+        state_store = SQLiteStateStore("taxally.db")
+        agent = TaxAllyAgent(llm, tools, state_store)
+    """
+
+    def __init__(self, db_path: str = "taxally.db", store: Optional[SQLiteStore] = None):
+        """
+        Args:
+            db_path: SQLite database file
+            store: Existing SQLiteStore to share (db_path is then ignored)
+        """
+        self.store = store or SQLiteStore(db_path)
+        self.db = self.store.db
+
+    def close(self) -> None:
+        self.store.close()
+
+    # ============ User Operations ============
+
+    def get_user(self, user_id: str) -> Optional[UserProfile]:
+        row = self.store.get_user(user_id)
+        if row is None:
+            return None
+        return UserProfile(
+            user_id=row['user_id'],
+            email=row['email'],
+            phone=row['phone'],
+            name=row['name'],
+            created_at=_from_db_time(row['created_at']),
+            updated_at=_from_db_time(row['updated_at']),
+            preferences=json.loads(row['preferences'] or '{}')
+        )
+
+    def create_user(self, user: UserProfile) -> str:
+        with self.db.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO users (user_id, email, phone, name, preferences, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (
+                user.user_id, user.email, user.phone, user.name, json.dumps(user.preferences),
+                _to_db_time(user.created_at), _to_db_time(user.updated_at)
+            ))
+        return user.user_id
+
+    def update_user(self, user_id: str, updates: dict) -> None:
+        values = {k: v for k, v in updates.items() if k in ("email", "phone", "name", "preferences")}
+        if "preferences" in values:
+            values["preferences"] = json.dumps(values["preferences"])
+        values["updated_at"] = _to_db_time(datetime.utcnow())
+        self._update("users", "user_id", user_id, values)
+
+    # ============ Entity Operations ============
+
+    def get_entities(self, user_id: str) -> list[Entity]:
+        return [self._entity(row) for row in self.store.get_user_entities(user_id)]
+
+    def get_entity(self, entity_id: str) -> Optional[Entity]:
+        row = self.store.get_entity(entity_id)
+        return self._entity(row) if row else None
+
+    def create_entity(self, entity: Entity) -> str:
+        columns = self._entity_columns(entity)
+        with self.db.transaction() as cursor:
+            cursor.execute(f"""
+                INSERT INTO entities ({', '.join(columns)})
+                VALUES ({', '.join('?' * len(columns))})
+            """, list(columns.values()))
+        return entity.entity_id
+
+    def update_entity(self, entity_id: str, updates: dict) -> None:
+        # Same semantics as InMemoryStateStore: any Entity field but the id
+        # (user_id moves the entity to another user); other keys are ignored
+        if "entity_id" in updates:
+            raise ValueError("entity_id cannot be updated")
+        values = {}
+        for key, value in updates.items():
+            if key == "tax_profile":
+                values.update(self._tax_profile_columns(value))
+            elif key == "entity_type":
+                values["entity_type"] = value.value
+            elif key in ("user_id", "name", "is_primary"):
+                values[key] = value
+            elif key == "created_at":
+                values["created_at"] = _to_db_time(value)
+            elif key == "metadata":
+                values["metadata"] = json.dumps(value)
+        values["updated_at"] = _to_db_time(datetime.utcnow())
+        self._update("entities", "entity_id", entity_id, values)
+
+    def _entity(self, row: dict) -> Entity:
+        entity_type = _enum(EntityType, row['entity_type'], EntityType.INDIVIDUAL)
+        return Entity(
+            entity_id=row['entity_id'],
+            user_id=row['user_id'],
+            name=row['name'],
+            entity_type=entity_type,
+            tax_profile=TaxProfile(
+                pan=row['pan'],
+                entity_type=entity_type,
+                gst_registered=bool(row['gst_registered']),
+                gstin=row['gstin'],
+                tan=row['tan'],
+                state=row['state'],
+                income_sources=row['income_sources'],
+                preferred_tax_regime=row['preferred_tax_regime']
+            ),
+            is_primary=bool(row['is_primary']),
+            created_at=_from_db_time(row['created_at']),
+            metadata=row['metadata']
+        )
+
+    def _entity_columns(self, entity: Entity) -> dict:
+        return {
+            "entity_id": entity.entity_id,
+            "user_id": entity.user_id,
+            "name": entity.name,
+            "entity_type": entity.entity_type.value,
+            **self._tax_profile_columns(entity.tax_profile),
+            "is_primary": entity.is_primary,
+            "metadata": json.dumps(entity.metadata),
+            "created_at": _to_db_time(entity.created_at),
+        }
+
+    @staticmethod
+    def _tax_profile_columns(profile: TaxProfile) -> dict:
+        columns = {name: getattr(profile, name) for name in TAX_PROFILE_COLUMNS}
+        columns["income_sources"] = json.dumps(columns["income_sources"])
+        return columns
+
+    # ============ Financial Year Operations ============
+
+    def get_financial_year(self, entity_id: str, fy: str) -> Optional[FinancialYear]:
+        row = self.store.get_financial_year(entity_id, fy)
+        if row is None:
+            return None
+        return FinancialYear(fy=fy, entity_id=entity_id, **{
+            name: row[name] for name in FINANCIAL_YEAR_COLUMNS
+        })
+
+    def update_financial_year(self, entity_id: str, fy: str, updates: dict) -> None:
+        values = {k: v for k, v in updates.items() if k in FINANCIAL_YEAR_COLUMNS}
+        if "filings" in values:
+            values["filings"] = json.dumps(values["filings"])
+        columns = ["entity_id", "fy", *values]
+        assignments = ", ".join(f"{name} = excluded.{name}" for name in values)
+        with self.db.transaction() as cursor:
+            cursor.execute(f"""
+                INSERT INTO financial_years ({', '.join(columns)})
+                VALUES ({', '.join('?' * len(columns))})
+                ON CONFLICT(entity_id, fy) DO {'UPDATE SET ' + assignments if values else 'NOTHING'}
+            """, [entity_id, fy, *values.values()])
+
+    # ============ Document Operations ============
+
+    def store_document(self, doc: Document) -> str:
+        with self.db.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO documents (
+                    document_id, entity_id, document_type, filename, financial_year,
+                    extracted_data, processing_status, source, lineage, metadata, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                doc.document_id, doc.entity_id, doc.document_type.value, doc.filename,
+                doc.financial_year, json.dumps(doc.extracted_data), doc.processing_status,
+                doc.source, json.dumps(doc.lineage), json.dumps(doc.metadata),
+                _to_db_time(doc.upload_timestamp)
+            ))
+        return doc.document_id
+
+    def get_documents(self, entity_id: str, doc_type: Optional[DocumentType] = None) -> list[Document]:
+        rows = self.store.get_documents(entity_id, doc_type.value if doc_type else None)
+        return [
+            Document(
+                document_id=row['document_id'],
+                entity_id=row['entity_id'],
+                document_type=_enum(DocumentType, row['document_type'], DocumentType.OTHER),
+                filename=row['filename'],
+                upload_timestamp=_from_db_time(row['created_at']),
+                financial_year=row['financial_year'],
+                extracted_data=row['extracted_data'],
+                processing_status=row['processing_status'],
+                source=row['source'],
+                lineage=row['lineage'] or {},
+                metadata=row['metadata'] or {}
+            )
+            for row in rows
+        ]
+
+    # ============ Compliance Operations ============
+
+    def add_risk(self, risk: ComplianceRisk) -> str:
+        with self.db.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO compliance_risks (
+                    risk_id, entity_id, category, severity, title, description,
+                    financial_year, deadline, detected_at, resolved_at, resolution_notes
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                risk.risk_id, risk.entity_id, risk.category, risk.severity.value, risk.title,
+                risk.description, risk.financial_year, _to_db_time(risk.deadline),
+                _to_db_time(risk.detected_at), _to_db_time(risk.resolved_at),
+                risk.resolution_notes
+            ))
+        return risk.risk_id
+
+    def get_active_risks(self, entity_id: str) -> list[ComplianceRisk]:
+        return [
+            ComplianceRisk(
+                risk_id=row['risk_id'],
+                entity_id=row['entity_id'],
+                category=row['category'],
+                severity=_enum(RiskSeverity, row['severity'], RiskSeverity.MEDIUM),
+                title=row['title'],
+                description=row['description'],
+                detected_at=_from_db_time(row['detected_at']),
+                resolved_at=_from_db_time(row['resolved_at']),
+                resolution_notes=row['resolution_notes'],
+                deadline=_from_db_time(row['deadline']),
+                financial_year=row['financial_year']
+            )
+            for row in self.store.get_active_risks(entity_id)
+        ]
+
+    def resolve_risk(self, risk_id: str, notes: str) -> None:
+        self._update("compliance_risks", "risk_id", risk_id, {
+            "resolved_at": _to_db_time(datetime.utcnow()),
+            "resolution_notes": notes,
+        })
+
+    def save_compliance_snapshot(self, snapshot: ComplianceSnapshot) -> str:
+        with self.db.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO compliance_snapshots (
+                    snapshot_id, entity_id, overall_status, gst_status, income_tax_status,
+                    tds_status, score, active_risks, metadata, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                snapshot.snapshot_id, snapshot.entity_id, snapshot.overall_status.value,
+                snapshot.gst_status.value, snapshot.income_tax_status.value,
+                snapshot.tds_status.value, snapshot.score, json.dumps(snapshot.active_risks),
+                json.dumps(snapshot.metadata), _to_db_time(snapshot.timestamp)
+            ))
+        return snapshot.snapshot_id
+
+    def get_compliance_history(self, entity_id: str, limit: int = 10) -> list[ComplianceSnapshot]:
+        with self.db.cursor() as cursor:
+            cursor.execute("""
+                SELECT * FROM compliance_snapshots
+                WHERE entity_id = ?
+                ORDER BY created_at DESC
+                LIMIT ?
+            """, (entity_id, limit))
+            rows = cursor.fetchall()
+
+        def status(value):
+            return _enum(ComplianceStatus, value, ComplianceStatus.UNKNOWN)
+
+        return [
+            ComplianceSnapshot(
+                snapshot_id=row['snapshot_id'],
+                entity_id=row['entity_id'],
+                timestamp=_from_db_time(row['created_at']),
+                overall_status=status(row['overall_status']),
+                gst_status=status(row['gst_status']),
+                income_tax_status=status(row['income_tax_status']),
+                tds_status=status(row['tds_status']),
+                active_risks=json.loads(row['active_risks']),
+                score=row['score'],
+                metadata=json.loads(row['metadata'])
+            )
+            for row in rows
+        ]
+
+    # ============ Session Operations ============
+
+    def get_session(self, session_id: str) -> Optional[Session]:
+        with self.db.cursor() as cursor:
+            cursor.execute("SELECT * FROM sessions WHERE session_id = ?", (session_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            cursor.execute("""
+                SELECT * FROM conversations
+                WHERE session_id = ?
+                ORDER BY created_at, id
+            """, (session_id,))
+            turns = cursor.fetchall()
+
+        return Session(
+            session_id=row['session_id'],
+            user_id=row['user_id'],
+            started_at=_from_db_time(row['started_at']),
+            last_activity=_from_db_time(row['last_activity']),
+            active_entity_id=row['active_entity_id'],
+            conversation=[self._conversation_entry(turn) for turn in turns],
+            context_summary=row['context_summary']
+        )
+
+    def create_session(self, session: Session) -> str:
+        with self.db.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO sessions (
+                    session_id, user_id, started_at, last_activity, active_entity_id, context_summary
+                ) VALUES (?, ?, ?, ?, ?, ?)
+            """, (
+                session.session_id, session.user_id, _to_db_time(session.started_at),
+                _to_db_time(session.last_activity), session.active_entity_id,
+                session.context_summary
+            ))
+            for entry in session.conversation:
+                self._insert_turn(cursor, session.user_id, entry)
+        return session.session_id
+
+    def add_conversation_turn(self, session_id: str, entry: ConversationEntry) -> None:
+        with self.db.transaction() as cursor:
+            cursor.execute("SELECT user_id FROM sessions WHERE session_id = ?", (session_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return  # Unknown session, as in InMemoryStateStore
+            entry.session_id = session_id
+            self._insert_turn(cursor, row['user_id'], entry)
+            cursor.execute(
+                "UPDATE sessions SET last_activity = ? WHERE session_id = ?",
+                (_to_db_time(datetime.utcnow()), session_id)
+            )
+
+    def record_turn(
+        self,
+        user_id: str,
+        session_id: str,
+        user_message: str,
+        assistant_message: str,
+        tool_calls: Optional[list[dict]] = None,
+        entity_id: Optional[str] = None
+    ) -> None:
+        """Store one agent exchange, starting the session if it is new."""
+        now = _to_db_time(datetime.utcnow())
+        with self.db.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO sessions (session_id, user_id, started_at, last_activity)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(session_id) DO UPDATE SET last_activity = excluded.last_activity
+            """, (session_id, user_id, now, now))
+            cursor.execute("""
+                INSERT INTO conversations (
+                    session_id, user_id, entity_id, user_message, assistant_message,
+                    tool_calls, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (
+                session_id, user_id, entity_id, user_message, assistant_message,
+                json.dumps(tool_calls or []), now
+            ))
+
+    def _insert_turn(self, cursor, user_id: str, entry: ConversationEntry) -> None:
+        cursor.execute("""
+            INSERT INTO conversations (
+                session_id, user_id, entity_id, user_message, assistant_message,
+                tool_calls, created_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (
+            entry.session_id, user_id, entry.entity_context, entry.user_message,
+            entry.assistant_message, json.dumps(entry.tool_calls), _to_db_time(entry.timestamp)
+        ))
+        entry.turn_id = str(cursor.lastrowid)
+
+    @staticmethod
+    def _conversation_entry(row) -> ConversationEntry:
+        return ConversationEntry(
+            turn_id=str(row['id']),
+            session_id=row['session_id'],
+            user_message=row['user_message'],
+            assistant_message=row['assistant_message'],
+            tool_calls=json.loads(row['tool_calls']),
+            timestamp=_from_db_time(row['created_at']),
+            entity_context=row['entity_id']
+        )
+
+    # ============ Deadline Operations ============
+
+    def add_deadline(self, deadline: Deadline) -> str:
+        with self.db.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO deadlines (
+                    deadline_id, entity_id, deadline_type, due_date, financial_year,
+                    status, completed_at, reminder_sent
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                deadline.deadline_id, deadline.entity_id, deadline.deadline_type,
+                _to_db_time(deadline.due_date), deadline.financial_year, deadline.status,
+                _to_db_time(deadline.completed_at), int(deadline.reminder_sent)
+            ))
+        return deadline.deadline_id
+
+    def get_upcoming_deadlines(self, entity_id: str, days: int = 30) -> list[Deadline]:
+        with self.db.cursor() as cursor:
+            cursor.execute("""
+                SELECT * FROM deadlines
+                WHERE entity_id = ? AND status = 'pending' AND due_date <= ?
+                ORDER BY due_date
+            """, (entity_id, _to_db_time(datetime.utcnow() + timedelta(days=days))))
+            rows = cursor.fetchall()
+
+        return [
+            Deadline(
+                deadline_id=row['deadline_id'],
+                entity_id=row['entity_id'],
+                deadline_type=row['deadline_type'],
+                due_date=_from_db_time(row['due_date']),
+                financial_year=row['financial_year'],
+                status=row['status'],
+                completed_at=_from_db_time(row['completed_at']),
+                reminder_sent=bool(row['reminder_sent'])
+            )
+            for row in rows
+        ]
+
+    def update_deadline_status(self, deadline_id: str, status: str) -> None:
+        values: dict[str, Any] = {"status": status}
+        if status == "completed":
+            values["completed_at"] = _to_db_time(datetime.utcnow())
+        self._update("deadlines", "deadline_id", deadline_id, values)
+
+    # ============ Agent State ============
+
+    def get_user_state(self, user_id: str) -> dict:
+        """Aggregated user state for agent context (InMemoryStateStore's layout)."""
+        state = self.store.get_user_state(user_id, fields={
+            "profile": ["name", "email"],
+            "entities": ["entity_id", "name", "entity_type", "is_primary",
+                         "pan", "gst_registered", "gstin"],
+            "active_risks": ["title", "severity"],
+            "upcoming_deadlines": ["deadline_type", "due_date"],
+        })
+
+        with self.db.cursor() as cursor:
+            cursor.execute("""
+                SELECT user_message, assistant_message FROM conversations
+                WHERE user_id = ?
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+            """, (user_id, HISTORY_TURNS))
+            turns = cursor.fetchall()
+
+        return {
+            "profile": state["profile"],
+            "entities": [
+                {
+                    "entity_id": e["entity_id"],
+                    "name": e["name"],
+                    "type": e["entity_type"],
+                    "is_primary": bool(e["is_primary"]),
+                    "tax_profile": {
+                        "pan": e["pan"],
+                        "gst_registered": bool(e["gst_registered"]),
+                        "gstin": e["gstin"]
+                    }
+                }
+                for e in state["entities"]
+            ],
+            "active_risks": state["active_risks"],
+            "upcoming_deadlines": [
+                {"entity": d["entity"], "type": d["deadline_type"],
+                 "due": _from_db_time(d["due_date"]).isoformat()}
+                for d in state["upcoming_deadlines"]
+            ],
+            "conversation_history": [
+                {"user": t["user_message"], "assistant": t["assistant_message"]}
+                for t in reversed(turns)
+            ]
+        }
+
+    def record_owners(self, kind: str, record_ids) -> dict[str, str]:
+        """Owning user of each entity, risk, deadline or session id (see SQLiteStore)."""
+        return self.store.record_owners(kind, record_ids)
+
+    def update_user_state(self, user_id: str, updates: dict) -> None:
+        """Update user state from agent."""
+        if "profile" in updates:
+            self.update_user(user_id, updates["profile"])
+
+    def _update(self, table: str, key: str, key_value: str, values: dict) -> None:
+        if not values:
+            return
+        set_clause = ", ".join(f"{name} = ?" for name in values)
+        with self.db.transaction() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET {set_clause} WHERE {key} = ?",
+                [*values.values(), key_value]
+            )
+
+
+# Test
+if __name__ == "__main__":
+    import os
+    import tempfile
+    from multiprocessing import Process
+    from .schema import InMemoryStateStore
+
+    print("Testing SQLite State Store...")
+    path = os.path.join(tempfile.mkdtemp(), "state_store_test.db")
+
+    def populate(store) -> None:
+        store.create_user(UserProfile(user_id="u1", name="Asha", email="asha@example.com"))
+        store.create_entity(Entity(
+            entity_id="e1", user_id="u1", name="Asha Designs",
+            entity_type=EntityType.PROPRIETORSHIP, is_primary=True,
+            tax_profile=TaxProfile(pan="ABCDE1234F", gst_registered=True, gstin="29ABCDE1234F1Z5")
+        ))
+        store.add_risk(ComplianceRisk(
+            risk_id="r1", entity_id="e1", category="gst", severity=RiskSeverity.HIGH,
+            title="GSTR-3B overdue", description="March return not filed"
+        ))
+        store.update_financial_year("e1", "2024-25", {"turnover": 1800000.0})
+        store.update_financial_year("e1", "2024-25", {"gst_paid": 54000.0})
+
+    memory, sqlite = InMemoryStateStore(), SQLiteStateStore(path)
+    populate(memory)
+    populate(sqlite)
+    deadline = Deadline("d1", "e1", "gstr1", datetime.utcnow() + timedelta(days=5), "2024-25")
+    memory.add_deadline(deadline)
+    sqlite.add_deadline(deadline)
+
+    print(f"  Same state as InMemoryStateStore: {memory.get_user_state('u1') == sqlite.get_user_state('u1')}")
+    print(f"  Entity: {sqlite.get_entity('e1').tax_profile.gstin}, "
+          f"FY: {sqlite.get_financial_year('e1', '2024-25')}")
+
+    def worker(n: int) -> None:
+        # A separate process, as a second API worker would be
+        SQLiteStateStore(path).record_turn("u1", f"s{n}", f"Question {n}", f"Answer {n}")
+
+    processes = [Process(target=worker, args=(n,)) for n in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    history = sqlite.get_user_state("u1")["conversation_history"]
+    print(f"  Turns written by 3 processes: {sorted(t['user'] for t in history)}")
+    print(f"  Session s1: {len(sqlite.get_session('s1').conversation)} turn(s)")
+
+    sqlite.close()
+    print("\n✅ SQLite state store working!")
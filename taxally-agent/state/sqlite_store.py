@@ -11,195 +11,324 @@ Persistent storage for:
 
 import sqlite3
 import json
+import threading
 from datetime import datetime
-from typing import Optional, Any
+from itertools import islice
+from typing import Optional, Any, Iterable, Iterator
 from pathlib import Path
 import uuid
 
+from .connection import ConnectionManager
+from .migrations import migrate
 
-class SQLiteStore:
-    """SQLite-based persistent storage for TaxAlly."""
 
-    def __init__(self, db_path: str = "taxally.db"):
-        self.db_path = db_path
-        self._init_db()
+BULK_CHUNK_SIZE = 5000  # Rows per executemany() in the bulk write methods
 
-    def _get_conn(self) -> sqlite3.Connection:
-        """Get database connection."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
 
-    def _init_db(self):
-        """Initialize database schema."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    """Consecutive lists of up to `size` items, without materializing `items`."""
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
 
-        # Users table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                user_id TEXT PRIMARY KEY,
-                email TEXT,
-                phone TEXT,
-                name TEXT,
-                preferences TEXT DEFAULT '{}',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
 
-        # Entities table (businesses/individuals)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS entities (
-                entity_id TEXT PRIMARY KEY,
-                user_id TEXT NOT NULL,
-                name TEXT NOT NULL,
-                entity_type TEXT DEFAULT 'individual',
-                pan TEXT,
-                gstin TEXT,
-                gst_registered INTEGER DEFAULT 0,
-                tan TEXT,
-                state TEXT,
-                income_sources TEXT DEFAULT '[]',
-                preferred_tax_regime TEXT,
-                is_primary INTEGER DEFAULT 0,
-                metadata TEXT DEFAULT '{}',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            )
-        """)
+class LazyJSONRow(dict):
+    """
+    Row dict whose JSON text columns are decoded on first access.
 
-        # Financial years table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS financial_years (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                entity_id TEXT NOT NULL,
-                fy TEXT NOT NULL,
-                turnover REAL DEFAULT 0,
-                gross_income REAL DEFAULT 0,
-                tax_paid REAL DEFAULT 0,
-                tds_collected REAL DEFAULT 0,
-                gst_collected REAL DEFAULT 0,
-                gst_paid REAL DEFAULT 0,
-                filings TEXT DEFAULT '{}',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(entity_id, fy),
-                FOREIGN KEY (entity_id) REFERENCES entities(entity_id)
-            )
-        """)
+    Callers that only read scalar columns never pay for json.loads. Whole-row
+    operations (iteration, items(), dict(row), ==, json.dumps) decode
+    everything first, so the row behaves like a fully decoded dict.
+    """
 
-        # Documents table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS documents (
-                document_id TEXT PRIMARY KEY,
-                entity_id TEXT NOT NULL,
-                document_type TEXT NOT NULL,
-                filename TEXT,
-                financial_year TEXT,
-                extracted_data TEXT DEFAULT '{}',
-                processing_status TEXT DEFAULT 'pending',
-                source TEXT DEFAULT 'upload',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (entity_id) REFERENCES entities(entity_id)
-            )
-        """)
+    __slots__ = ("_encoded",)
 
-        # Compliance risks table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS compliance_risks (
-                risk_id TEXT PRIMARY KEY,
-                entity_id TEXT NOT NULL,
-                category TEXT NOT NULL,
-                severity TEXT NOT NULL,
-                title TEXT NOT NULL,
-                description TEXT,
-                financial_year TEXT,
-                deadline TIMESTAMP,
-                detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                resolved_at TIMESTAMP,
-                resolution_notes TEXT,
-                FOREIGN KEY (entity_id) REFERENCES entities(entity_id)
-            )
-        """)
+    def __init__(self, row: sqlite3.Row, json_columns: tuple[str, ...]):
+        super().__init__(zip(row.keys(), row))
+        # Columns projected away are simply absent
+        self._encoded = {key for key in json_columns if key in self}
 
-        # Compliance snapshots table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS compliance_snapshots (
-                snapshot_id TEXT PRIMARY KEY,
-                entity_id TEXT NOT NULL,
-                overall_status TEXT,
-                gst_status TEXT,
-                income_tax_status TEXT,
-                tds_status TEXT,
-                score INTEGER DEFAULT 0,
-                active_risks TEXT DEFAULT '[]',
-                metadata TEXT DEFAULT '{}',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (entity_id) REFERENCES entities(entity_id)
-            )
-        """)
+    # Rows may be shared between threads (CachedStateStore hands the same
+    # cached rows to every caller): a column leaves _encoded only after its
+    # decoded value is stored, so no reader can see the raw text
+    _decode_lock = threading.Lock()
 
-        # Conversations table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS conversations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id TEXT NOT NULL,
-                user_id TEXT NOT NULL,
-                entity_id TEXT,
-                user_message TEXT NOT NULL,
-                assistant_message TEXT NOT NULL,
-                tool_calls TEXT DEFAULT '[]',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            )
-        """)
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if key not in self._encoded:
+            return value
+        decoded = json.loads(value) if isinstance(value, str) else value
+        with self._decode_lock:
+            if key in self._encoded:
+                dict.__setitem__(self, key, decoded)
+                self._encoded.discard(key)
+            return dict.__getitem__(self, key)
 
-        # Deadlines table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS deadlines (
-                deadline_id TEXT PRIMARY KEY,
-                entity_id TEXT NOT NULL,
-                deadline_type TEXT NOT NULL,
-                due_date TIMESTAMP NOT NULL,
-                financial_year TEXT,
-                status TEXT DEFAULT 'pending',
-                completed_at TIMESTAMP,
-                reminder_sent INTEGER DEFAULT 0,
-                calendar_event_id TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (entity_id) REFERENCES entities(entity_id)
-            )
-        """)
+    def get(self, key, default=None):
+        return self[key] if key in self else default
 
-        conn.commit()
-        conn.close()
+    def __setitem__(self, key, value):
+        with self._decode_lock:
+            dict.__setitem__(self, key, value)
+            self._encoded.discard(key)
+
+    def __delitem__(self, key):
+        with self._decode_lock:
+            dict.__delitem__(self, key)
+            self._encoded.discard(key)
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            dict.__delitem__(self, key)
+            return value
+        return dict.pop(self, key, *default)
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        dict.__setitem__(self, key, default)
+        return default
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def decode(self) -> "LazyJSONRow":
+        """Decode every remaining JSON column now."""
+        for key in list(self._encoded):
+            self[key]
+        return self
+
+    # Defining __iter__ also keeps dict(row) / {**row} off the C fast path
+    # that copies raw values, so they go through __getitem__
+    def __iter__(self):
+        return dict.__iter__(self.decode())
+
+    def items(self):
+        return dict.items(self.decode())
+
+    def values(self):
+        return dict.values(self.decode())
+
+    def copy(self) -> dict:
+        return dict(self)
+
+    def __eq__(self, other):
+        return dict.__eq__(self.decode(), other)
+
+    def __ne__(self, other):
+        return dict.__ne__(self.decode(), other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return dict.__repr__(self.decode())
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+class SQLiteStore:
+    """SQLite-based persistent storage for TaxAlly."""
+
+    # TEXT columns holding JSON, decoded lazily by LazyJSONRow
+    JSON_COLUMNS = {
+        "entities": ("income_sources", "metadata"),
+        "financial_years": ("filings",),
+        "documents": ("extracted_data", "lineage", "metadata"),
+        "conversations": ("tool_calls",),
+    }
+
+    def __init__(self, db_path: str = "taxally.db", pragmas: Optional[dict] = None):
+        """
+        Args:
+            db_path: SQLite file, or ":memory:"
+            pragmas: Overrides for connection.DEFAULT_PRAGMAS
+        """
+        self.db_path = db_path
+        self.db = ConnectionManager(db_path, pragmas)
+        self._columns: dict[str, set[str]] = {}  # Table -> column names, for projections
+        self._init_db()
+
+    def transaction(self, immediate: bool = False):
+        """
+        Group several store calls into one commit.
+
+        Usage:
+            with store.transaction():
+                store.add_risk(...)
+                store.add_deadline(...)
+        """
+        return self.db.transaction(immediate)
+
+    def close(self):
+        """Close this store's connections (at shutdown)."""
+        self.db.close()
+
+    def _init_db(self):
+        """Initialize database schema, then apply pending migrations."""
+        # IMMEDIATE: concurrent openers wait instead of migrating twice
+        with self.db.transaction(immediate=True) as cursor:
+            # Users table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    user_id TEXT PRIMARY KEY,
+                    email TEXT,
+                    phone TEXT,
+                    name TEXT,
+                    preferences TEXT DEFAULT '{}',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            # Entities table (businesses/individuals)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS entities (
+                    entity_id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    entity_type TEXT DEFAULT 'individual',
+                    pan TEXT,
+                    gstin TEXT,
+                    gst_registered INTEGER DEFAULT 0,
+                    tan TEXT,
+                    state TEXT,
+                    income_sources TEXT DEFAULT '[]',
+                    preferred_tax_regime TEXT,
+                    is_primary INTEGER DEFAULT 0,
+                    metadata TEXT DEFAULT '{}',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES users(user_id)
+                )
+            """)
+
+            # Financial years table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS financial_years (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    entity_id TEXT NOT NULL,
+                    fy TEXT NOT NULL,
+                    turnover REAL DEFAULT 0,
+                    gross_income REAL DEFAULT 0,
+                    tax_paid REAL DEFAULT 0,
+                    tds_collected REAL DEFAULT 0,
+                    gst_collected REAL DEFAULT 0,
+                    gst_paid REAL DEFAULT 0,
+                    filings TEXT DEFAULT '{}',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(entity_id, fy),
+                    FOREIGN KEY (entity_id) REFERENCES entities(entity_id)
+                )
+            """)
+
+            # Documents table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    document_id TEXT PRIMARY KEY,
+                    entity_id TEXT NOT NULL,
+                    document_type TEXT NOT NULL,
+                    filename TEXT,
+                    financial_year TEXT,
+                    extracted_data TEXT DEFAULT '{}',
+                    processing_status TEXT DEFAULT 'pending',
+                    source TEXT DEFAULT 'upload',
+                    content_hash TEXT,
+                    duplicate_of TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (entity_id) REFERENCES entities(entity_id)
+                )
+            """)
+
+            # Compliance risks table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS compliance_risks (
+                    risk_id TEXT PRIMARY KEY,
+                    entity_id TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    severity TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    description TEXT,
+                    financial_year TEXT,
+                    deadline TIMESTAMP,
+                    detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    resolved_at TIMESTAMP,
+                    resolution_notes TEXT,
+                    FOREIGN KEY (entity_id) REFERENCES entities(entity_id)
+                )
+            """)
+
+            # Compliance snapshots table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS compliance_snapshots (
+                    snapshot_id TEXT PRIMARY KEY,
+                    entity_id TEXT NOT NULL,
+                    overall_status TEXT,
+                    gst_status TEXT,
+                    income_tax_status TEXT,
+                    tds_status TEXT,
+                    score INTEGER DEFAULT 0,
+                    active_risks TEXT DEFAULT '[]',
+                    metadata TEXT DEFAULT '{}',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (entity_id) REFERENCES entities(entity_id)
+                )
+            """)
+
+            # Conversations table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS conversations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    entity_id TEXT,
+                    user_message TEXT NOT NULL,
+                    assistant_message TEXT NOT NULL,
+                    tool_calls TEXT DEFAULT '[]',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES users(user_id)
+                )
+            """)
+
+            # Deadlines table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS deadlines (
+                    deadline_id TEXT PRIMARY KEY,
+                    entity_id TEXT NOT NULL,
+                    deadline_type TEXT NOT NULL,
+                    due_date TIMESTAMP NOT NULL,
+                    financial_year TEXT,
+                    status TEXT DEFAULT 'pending',
+                    completed_at TIMESTAMP,
+                    reminder_sent INTEGER DEFAULT 0,
+                    calendar_event_id TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (entity_id) REFERENCES entities(entity_id)
+                )
+            """)
+
+            # Indexes and later columns
+            migrate(cursor)
 
     # ============ User Operations ============
 
     def create_user(self, email: str = None, phone: str = None, name: str = None) -> str:
         """Create a new user."""
         user_id = str(uuid.uuid4())
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT INTO users (user_id, email, phone, name)
-            VALUES (?, ?, ?, ?)
-        """, (user_id, email, phone, name))
-
-        conn.commit()
-        conn.close()
+        with self.db.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO users (user_id, email, phone, name)
+                VALUES (?, ?, ?, ?)
+            """, (user_id, email, phone, name))
         return user_id
 
     def get_user(self, user_id: str) -> Optional[dict]:
         """Get user by ID."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
-        row = cursor.fetchone()
-        conn.close()
+        with self.db.cursor() as cursor:
+            cursor.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
+            row = cursor.fetchone()
 
         if row:
             return dict(row)
@@ -207,17 +336,14 @@ class SQLiteStore:
 
     def update_user(self, user_id: str, **updates) -> bool:
         """Update user fields."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
+        with self.db.transaction() as cursor:
+            updates['updated_at'] = datetime.now().isoformat()
+            set_clause = ", ".join(f"{k} = ?" for k in updates.keys())
+            values = list(updates.values()) + [user_id]
 
-        updates['updated_at'] = datetime.now().isoformat()
-        set_clause = ", ".join(f"{k} = ?" for k in updates.keys())
-        values = list(updates.values()) + [user_id]
-
-        cursor.execute(f"UPDATE users SET {set_clause} WHERE user_id = ?", values)
-        conn.commit()
-        conn.close()
-        return cursor.rowcount > 0
+            cursor.execute(f"UPDATE users SET {set_clause} WHERE user_id = ?", values)
+            updated = cursor.rowcount > 0
+        return updated
 
     # ============ Entity Operations ============
 
@@ -230,137 +356,119 @@ class SQLiteStore:
     ) -> str:
         """Create a new entity for a user."""
         entity_id = str(uuid.uuid4())
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT INTO entities (
-                entity_id, user_id, name, entity_type, pan, gstin,
-                gst_registered, state, income_sources, is_primary
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            entity_id, user_id, name, entity_type,
-            kwargs.get('pan'), kwargs.get('gstin'),
-            kwargs.get('gst_registered', False),
-            kwargs.get('state'),
-            json.dumps(kwargs.get('income_sources', [])),
-            kwargs.get('is_primary', False)
-        ))
-
-        conn.commit()
-        conn.close()
+        with self.db.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO entities (
+                    entity_id, user_id, name, entity_type, pan, gstin,
+                    gst_registered, state, income_sources, is_primary
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                entity_id, user_id, name, entity_type,
+                kwargs.get('pan'), kwargs.get('gstin'),
+                kwargs.get('gst_registered', False),
+                kwargs.get('state'),
+                json.dumps(kwargs.get('income_sources', [])),
+                kwargs.get('is_primary', False)
+            ))
         return entity_id
 
-    def get_entity(self, entity_id: str) -> Optional[dict]:
-        """Get entity by ID."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT * FROM entities WHERE entity_id = ?", (entity_id,))
-        row = cursor.fetchone()
-        conn.close()
+    def get_entity(self, entity_id: str, fields: Optional[list[str]] = None) -> Optional[dict]:
+        """Get entity by ID (only `fields` columns, if given)."""
+        with self.db.cursor() as cursor:
+            cursor.execute(
+                f"SELECT {self._select('entities', fields)} FROM entities WHERE entity_id = ?",
+                (entity_id,)
+            )
+            row = cursor.fetchone()
 
         if row:
-            entity = dict(row)
-            entity['income_sources'] = json.loads(entity['income_sources'])
-            entity['metadata'] = json.loads(entity['metadata'])
-            return entity
+            return self._decode_entity(row)
         return None
 
-    def get_user_entities(self, user_id: str) -> list[dict]:
-        """Get all entities for a user."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT * FROM entities WHERE user_id = ?", (user_id,))
-        rows = cursor.fetchall()
-        conn.close()
+    def get_user_entities(self, user_id: str, fields: Optional[list[str]] = None) -> list[dict]:
+        """Get all entities for a user (only `fields` columns, if given)."""
+        with self.db.cursor() as cursor:
+            cursor.execute(
+                f"SELECT {self._select('entities', fields)} FROM entities WHERE user_id = ?",
+                (user_id,)
+            )
+            rows = cursor.fetchall()
 
-        entities = []
-        for row in rows:
-            entity = dict(row)
-            entity['income_sources'] = json.loads(entity['income_sources'])
-            entity['metadata'] = json.loads(entity['metadata'])
-            entities.append(entity)
+        return [self._decode_entity(row) for row in rows]
 
-        return entities
+    @classmethod
+    def _decode_entity(cls, row: sqlite3.Row) -> dict:
+        return LazyJSONRow(row, cls.JSON_COLUMNS["entities"])
 
     def update_entity(self, entity_id: str, **updates) -> bool:
         """Update entity fields."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        # Handle JSON fields
-        if 'income_sources' in updates:
-            updates['income_sources'] = json.dumps(updates['income_sources'])
-        if 'metadata' in updates:
-            updates['metadata'] = json.dumps(updates['metadata'])
+        with self.db.transaction() as cursor:
+            # Handle JSON fields
+            if 'income_sources' in updates:
+                updates['income_sources'] = json.dumps(updates['income_sources'])
+            if 'metadata' in updates:
+                updates['metadata'] = json.dumps(updates['metadata'])
 
-        updates['updated_at'] = datetime.now().isoformat()
-        set_clause = ", ".join(f"{k} = ?" for k in updates.keys())
-        values = list(updates.values()) + [entity_id]
+            updates['updated_at'] = datetime.now().isoformat()
+            set_clause = ", ".join(f"{k} = ?" for k in updates.keys())
+            values = list(updates.values()) + [entity_id]
 
-        cursor.execute(f"UPDATE entities SET {set_clause} WHERE entity_id = ?", values)
-        conn.commit()
-        conn.close()
-        return cursor.rowcount > 0
+            cursor.execute(f"UPDATE entities SET {set_clause} WHERE entity_id = ?", values)
+            updated = cursor.rowcount > 0
+        return updated
 
     # ============ Financial Year Operations ============
 
     def update_financial_year(self, entity_id: str, fy: str, **data) -> bool:
         """Update or insert financial year data."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        # Check if exists
-        cursor.execute(
-            "SELECT id FROM financial_years WHERE entity_id = ? AND fy = ?",
-            (entity_id, fy)
-        )
-
-        if cursor.fetchone():
-            # Update
-            if 'filings' in data:
-                data['filings'] = json.dumps(data['filings'])
-            set_clause = ", ".join(f"{k} = ?" for k in data.keys())
-            values = list(data.values()) + [entity_id, fy]
+        with self.db.transaction() as cursor:
+            # Check if exists
             cursor.execute(
-                f"UPDATE financial_years SET {set_clause} WHERE entity_id = ? AND fy = ?",
-                values
+                "SELECT id FROM financial_years WHERE entity_id = ? AND fy = ?",
+                (entity_id, fy)
             )
-        else:
-            # Insert
-            filings = json.dumps(data.pop('filings', {}))
-            cursor.execute("""
-                INSERT INTO financial_years (entity_id, fy, turnover, gross_income, filings)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                entity_id, fy,
-                data.get('turnover', 0),
-                data.get('gross_income', 0),
-                filings
-            ))
 
-        conn.commit()
-        conn.close()
+            if cursor.fetchone():
+                # Update
+                if 'filings' in data:
+                    data['filings'] = json.dumps(data['filings'])
+                set_clause = ", ".join(f"{k} = ?" for k in data.keys())
+                values = list(data.values()) + [entity_id, fy]
+                cursor.execute(
+                    f"UPDATE financial_years SET {set_clause} WHERE entity_id = ? AND fy = ?",
+                    values
+                )
+            else:
+                # Insert
+                filings = json.dumps(data.pop('filings', {}))
+                cursor.execute("""
+                    INSERT INTO financial_years (entity_id, fy, turnover, gross_income, filings)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (
+                    entity_id, fy,
+                    data.get('turnover', 0),
+                    data.get('gross_income', 0),
+                    filings
+                ))
         return True
 
-    def get_financial_year(self, entity_id: str, fy: str) -> Optional[dict]:
-        """Get financial year data."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        cursor.execute(
-            "SELECT * FROM financial_years WHERE entity_id = ? AND fy = ?",
-            (entity_id, fy)
-        )
-        row = cursor.fetchone()
-        conn.close()
+    def get_financial_year(
+        self,
+        entity_id: str,
+        fy: str,
+        fields: Optional[list[str]] = None
+    ) -> Optional[dict]:
+        """Get financial year data (only `fields` columns, if given)."""
+        with self.db.cursor() as cursor:
+            cursor.execute(
+                f"SELECT {self._select('financial_years', fields)} FROM financial_years "
+                "WHERE entity_id = ? AND fy = ?",
+                (entity_id, fy)
+            )
+            row = cursor.fetchone()
 
         if row:
-            data = dict(row)
-            data['filings'] = json.loads(data['filings'])
-            return data
+            return LazyJSONRow(row, self.JSON_COLUMNS["financial_years"])
         return None
 
     # ============ Document Operations ============
@@ -371,54 +479,189 @@ class SQLiteStore:
         document_type: str,
         filename: str,
         financial_year: str = None,
-        extracted_data: dict = None
+        extracted_data: dict = None,
+        content_hash: str = None
     ) -> str:
-        """Store a document record."""
+        """
+        Store a document record.
+
+        With a `content_hash`, a re-upload of a file already stored for the
+        entity records the first upload's id in `duplicate_of`.
+        """
         document_id = str(uuid.uuid4())
-        conn = self._get_conn()
-        cursor = conn.cursor()
+        with self.db.transaction() as cursor:
+            duplicate_of = None
+            if content_hash:
+                duplicate_of = self._find_original(cursor, entity_id, content_hash)
 
-        cursor.execute("""
-            INSERT INTO documents (
+            cursor.execute("""
+                INSERT INTO documents (
+                    document_id, entity_id, document_type, filename,
+                    financial_year, extracted_data, content_hash, duplicate_of
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
                 document_id, entity_id, document_type, filename,
-                financial_year, extracted_data
-            ) VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            document_id, entity_id, document_type, filename,
-            financial_year, json.dumps(extracted_data or {})
-        ))
-
-        conn.commit()
-        conn.close()
+                financial_year, json.dumps(extracted_data or {}),
+                content_hash, duplicate_of
+            ))
         return document_id
 
-    def get_documents(
+    def store_documents(
         self,
+        documents: Iterable[dict],
+        chunk_size: int = BULK_CHUNK_SIZE
+    ) -> list[str]:
+        """
+        Store many document records in one transaction.
+
+        Each dict takes the store_document arguments plus optional
+        `processing_status` and `source`. Returns the new document ids
+        in input order.
+        """
+        document_ids = []
+        originals = {}  # (entity_id, content_hash) -> first upload's id
+
+        with self.db.transaction() as cursor:
+            for chunk in _chunks(documents, chunk_size):
+                # Stored originals for hashes not seen yet; rows come newest
+                # first so the earliest upload is the one left in the dict
+                hashes = list({
+                    d['content_hash'] for d in chunk
+                    if d.get('content_hash') and (d['entity_id'], d['content_hash']) not in originals
+                })
+                for i in range(0, len(hashes), 500):
+                    part = hashes[i:i + 500]
+                    cursor.execute(f"""
+                        SELECT entity_id, content_hash, document_id FROM documents
+                        WHERE content_hash IN ({','.join('?' * len(part))})
+                        AND duplicate_of IS NULL
+                        ORDER BY created_at DESC, rowid DESC
+                    """, part)
+                    for row in cursor.fetchall():
+                        originals[(row['entity_id'], row['content_hash'])] = row['document_id']
+
+                rows = []
+                for doc in chunk:
+                    document_id = str(uuid.uuid4())
+                    document_ids.append(document_id)
+                    key = (doc['entity_id'], doc.get('content_hash'))
+                    duplicate_of = originals.get(key) if key[1] else None
+                    if key[1] and duplicate_of is None:
+                        originals[key] = document_id
+                    rows.append((
+                        document_id, doc['entity_id'], doc['document_type'], doc.get('filename'),
+                        doc.get('financial_year'), json.dumps(doc.get('extracted_data') or {}),
+                        doc.get('processing_status', 'pending'), doc.get('source', 'upload'),
+                        doc.get('content_hash'), duplicate_of
+                    ))
+
+                cursor.executemany("""
+                    INSERT INTO documents (
+                        document_id, entity_id, document_type, filename,
+                        financial_year, extracted_data, processing_status, source,
+                        content_hash, duplicate_of
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+        return document_ids
+
+    def stored_hashes(self, entity_id: str, content_hashes: list[str]) -> set[str]:
+        """Which of the given content hashes already have a document for the entity."""
+        with self.db.cursor() as cursor:
+            found = set()
+            for i in range(0, len(content_hashes), 500):
+                chunk = content_hashes[i:i + 500]
+                cursor.execute(f"""
+                    SELECT DISTINCT content_hash FROM documents
+                    WHERE entity_id = ? AND content_hash IN ({','.join('?' * len(chunk))})
+                """, [entity_id, *chunk])
+                found.update(row['content_hash'] for row in cursor.fetchall())
+        return found
+
+    def _find_original(
+        self,
+        cursor: sqlite3.Cursor,
         entity_id: str,
-        document_type: str = None
-    ) -> list[dict]:
-        """Get documents for an entity."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
+        content_hash: str
+    ) -> Optional[str]:
+        """First stored document of an entity with the same content hash."""
+        cursor.execute("""
+            SELECT document_id FROM documents
+            WHERE content_hash = ? AND entity_id = ? AND duplicate_of IS NULL
+            ORDER BY created_at, rowid LIMIT 1
+        """, (content_hash, entity_id))
+        row = cursor.fetchone()
+        return row['document_id'] if row else None
 
-        if document_type:
-            cursor.execute(
-                "SELECT * FROM documents WHERE entity_id = ? AND document_type = ?",
-                (entity_id, document_type)
-            )
-        else:
-            cursor.execute(
-                "SELECT * FROM documents WHERE entity_id = ?",
-                (entity_id,)
-            )
+    def find_document_by_hash(
+        self,
+        entity_id: str,
+        content_hash: str
+    ) -> Optional[dict]:
+        """Original document row for a file's content hash, if already stored."""
+        with self.db.cursor() as cursor:
+            document_id = self._find_original(cursor, entity_id, content_hash)
+            row = None
+            if document_id:
+                cursor.execute("SELECT * FROM documents WHERE document_id = ?", (document_id,))
+                row = cursor.fetchone()
+
+        if row:
+            return LazyJSONRow(row, self.JSON_COLUMNS["documents"])
+        return None
+
+    def get_document(self, document_id: str) -> Optional[dict]:
+        """Get a document by id."""
+        with self.db.cursor() as cursor:
+            cursor.execute("SELECT * FROM documents WHERE document_id = ?", (document_id,))
+            row = cursor.fetchone()
+
+        if row:
+            return LazyJSONRow(row, self.JSON_COLUMNS["documents"])
+        return None
+
+    def update_document(self, document_id: str, **updates) -> bool:
+        """Update document fields (e.g. after background parsing)."""
+        with self.db.transaction() as cursor:
+            # Handle JSON fields
+            if 'extracted_data' in updates:
+                updates['extracted_data'] = json.dumps(updates['extracted_data'])
+
+            set_clause = ", ".join(f"{k} = ?" for k in updates.keys())
+            values = list(updates.values()) + [document_id]
 
-        rows = cursor.fetchall()
-        conn.close()
+            cursor.execute(f"UPDATE documents SET {set_clause} WHERE document_id = ?", values)
+            updated = cursor.rowcount > 0
+        return updated
 
-        return [
-            {**dict(row), 'extracted_data': json.loads(row['extracted_data'])}
-            for row in rows
-        ]
+    def get_documents(
+        self,
+        entity_id: str,
+        document_type: str = None,
+        fields: Optional[list[str]] = None
+    ) -> list[dict]:
+        """
+        Get documents for an entity.
+
+        Pass `fields` (e.g. without "extracted_data") to leave large columns
+        out of the query entirely.
+        """
+        select = self._select('documents', fields)
+        with self.db.cursor() as cursor:
+            if document_type:
+                cursor.execute(
+                    f"SELECT {select} FROM documents WHERE entity_id = ? AND document_type = ?",
+                    (entity_id, document_type)
+                )
+            else:
+                cursor.execute(
+                    f"SELECT {select} FROM documents WHERE entity_id = ?",
+                    (entity_id,)
+                )
+
+            rows = cursor.fetchall()
+
+        json_columns = self.JSON_COLUMNS["documents"]
+        return [LazyJSONRow(row, json_columns) for row in rows]
 
     # ============ Compliance Risk Operations ============
 
@@ -433,47 +676,62 @@ class SQLiteStore:
     ) -> str:
         """Add a compliance risk."""
         risk_id = str(uuid.uuid4())
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT INTO compliance_risks (
-                risk_id, entity_id, category, severity, title, description, deadline
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (risk_id, entity_id, category, severity, title, description, deadline))
-
-        conn.commit()
-        conn.close()
+        with self.db.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO compliance_risks (
+                    risk_id, entity_id, category, severity, title, description, deadline
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (risk_id, entity_id, category, severity, title, description, deadline))
         return risk_id
 
+    def add_risks(self, risks: Iterable[dict], chunk_size: int = BULK_CHUNK_SIZE) -> list[str]:
+        """
+        Add many compliance risks in one transaction.
+
+        Each dict takes the add_risk arguments plus optional
+        `financial_year`. Returns the new risk ids in input order.
+        """
+        risk_ids = []
+        with self.db.transaction() as cursor:
+            for chunk in _chunks(risks, chunk_size):
+                rows = []
+                for risk in chunk:
+                    risk_id = str(uuid.uuid4())
+                    risk_ids.append(risk_id)
+                    rows.append((
+                        risk_id, risk['entity_id'], risk['category'], risk['severity'],
+                        risk['title'], risk.get('description'), risk.get('financial_year'),
+                        risk.get('deadline')
+                    ))
+                cursor.executemany("""
+                    INSERT INTO compliance_risks (
+                        risk_id, entity_id, category, severity, title, description,
+                        financial_year, deadline
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+        return risk_ids
+
     def get_active_risks(self, entity_id: str) -> list[dict]:
         """Get unresolved risks for an entity."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        cursor.execute(
-            "SELECT * FROM compliance_risks WHERE entity_id = ? AND resolved_at IS NULL",
-            (entity_id,)
-        )
-        rows = cursor.fetchall()
-        conn.close()
+        with self.db.cursor() as cursor:
+            cursor.execute(
+                "SELECT * FROM compliance_risks WHERE entity_id = ? AND resolved_at IS NULL",
+                (entity_id,)
+            )
+            rows = cursor.fetchall()
 
         return [dict(row) for row in rows]
 
     def resolve_risk(self, risk_id: str, notes: str = None) -> bool:
         """Mark a risk as resolved."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            UPDATE compliance_risks
-            SET resolved_at = ?, resolution_notes = ?
-            WHERE risk_id = ?
-        """, (datetime.now().isoformat(), notes, risk_id))
-
-        conn.commit()
-        conn.close()
-        return cursor.rowcount > 0
+        with self.db.transaction() as cursor:
+            cursor.execute("""
+                UPDATE compliance_risks
+                SET resolved_at = ?, resolution_notes = ?
+                WHERE risk_id = ?
+            """, (datetime.now().isoformat(), notes, risk_id))
+            updated = cursor.rowcount > 0
+        return updated
 
     # ============ Conversation Operations ============
 
@@ -487,47 +745,72 @@ class SQLiteStore:
         tool_calls: list = None
     ) -> int:
         """Save a conversation turn."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
+        with self.db.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO conversations (
+                    session_id, user_id, entity_id, user_message, assistant_message, tool_calls
+                ) VALUES (?, ?, ?, ?, ?, ?)
+            """, (
+                session_id, user_id, entity_id,
+                user_message, assistant_message,
+                json.dumps(tool_calls or [])
+            ))
 
-        cursor.execute("""
-            INSERT INTO conversations (
-                session_id, user_id, entity_id, user_message, assistant_message, tool_calls
-            ) VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            session_id, user_id, entity_id,
-            user_message, assistant_message,
-            json.dumps(tool_calls or [])
-        ))
-
-        conn.commit()
-        last_id = cursor.lastrowid
-        conn.close()
+            last_id = cursor.lastrowid
         return last_id
 
+    def save_conversations(
+        self,
+        turns: Iterable[dict],
+        chunk_size: int = BULK_CHUNK_SIZE
+    ) -> list[int]:
+        """
+        Save many conversation turns in one transaction (e.g. an import).
+
+        Each dict takes the save_conversation arguments plus an optional
+        `created_at` for historical turns. Returns the new row ids in
+        input order.
+        """
+        ids = []
+        # IMMEDIATE: no other writer can take ids between our inserts, so
+        # each chunk's ids are consecutive and end at last_insert_rowid()
+        with self.db.transaction(immediate=True) as cursor:
+            for chunk in _chunks(turns, chunk_size):
+                cursor.executemany("""
+                    INSERT INTO conversations (
+                        session_id, user_id, entity_id, user_message, assistant_message,
+                        tool_calls, created_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+                """, [(
+                    turn['session_id'], turn['user_id'], turn.get('entity_id'),
+                    turn['user_message'], turn['assistant_message'],
+                    json.dumps(turn['tool_calls']) if turn.get('tool_calls') else '[]',
+                    turn.get('created_at')
+                ) for turn in chunk])
+                cursor.execute("SELECT last_insert_rowid()")
+                last_id = cursor.fetchone()[0]
+                ids.extend(range(last_id - len(chunk) + 1, last_id + 1))
+        return ids
+
     def get_conversation_history(
         self,
         session_id: str,
-        limit: int = 10
+        limit: int = 10,
+        fields: Optional[list[str]] = None
     ) -> list[dict]:
-        """Get recent conversation history."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT * FROM conversations
-            WHERE session_id = ?
-            ORDER BY created_at DESC
-            LIMIT ?
-        """, (session_id, limit))
+        """Get recent conversation history (only `fields` columns, if given)."""
+        with self.db.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT {self._select('conversations', fields)} FROM conversations
+                WHERE session_id = ?
+                ORDER BY created_at DESC
+                LIMIT ?
+            """, (session_id, limit))
 
-        rows = cursor.fetchall()
-        conn.close()
+            rows = cursor.fetchall()
 
-        return [
-            {**dict(row), 'tool_calls': json.loads(row['tool_calls'])}
-            for row in reversed(rows)
-        ]
+        json_columns = self.JSON_COLUMNS["conversations"]
+        return [LazyJSONRow(row, json_columns) for row in reversed(rows)]
 
     # ============ Deadline Operations ============
 
@@ -540,80 +823,269 @@ class SQLiteStore:
     ) -> str:
         """Add a deadline."""
         deadline_id = str(uuid.uuid4())
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT INTO deadlines (
-                deadline_id, entity_id, deadline_type, due_date, financial_year
-            ) VALUES (?, ?, ?, ?, ?)
-        """, (deadline_id, entity_id, deadline_type, due_date, financial_year))
-
-        conn.commit()
-        conn.close()
+        with self.db.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO deadlines (
+                    deadline_id, entity_id, deadline_type, due_date, financial_year
+                ) VALUES (?, ?, ?, ?, ?)
+            """, (deadline_id, entity_id, deadline_type, due_date, financial_year))
         return deadline_id
 
+    def add_deadlines(
+        self,
+        deadlines: Iterable[dict],
+        chunk_size: int = BULK_CHUNK_SIZE
+    ) -> list[str]:
+        """
+        Add many deadlines in one transaction.
+
+        Each dict takes the add_deadline arguments. Returns the new
+        deadline ids in input order.
+        """
+        deadline_ids = []
+        with self.db.transaction() as cursor:
+            for chunk in _chunks(deadlines, chunk_size):
+                rows = []
+                for deadline in chunk:
+                    deadline_id = str(uuid.uuid4())
+                    deadline_ids.append(deadline_id)
+                    rows.append((
+                        deadline_id, deadline['entity_id'], deadline['deadline_type'],
+                        deadline['due_date'], deadline.get('financial_year')
+                    ))
+                cursor.executemany("""
+                    INSERT INTO deadlines (
+                        deadline_id, entity_id, deadline_type, due_date, financial_year
+                    ) VALUES (?, ?, ?, ?, ?)
+                """, rows)
+        return deadline_ids
+
     def get_upcoming_deadlines(self, entity_id: str, days: int = 30) -> list[dict]:
         """Get upcoming deadlines."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT * FROM deadlines
-            WHERE entity_id = ?
-            AND status = 'pending'
-            AND due_date <= datetime('now', '+' || ? || ' days')
-            ORDER BY due_date
-        """, (entity_id, days))
+        with self.db.cursor() as cursor:
+            cursor.execute("""
+                SELECT * FROM deadlines
+                WHERE entity_id = ?
+                AND status = 'pending'
+                AND due_date <= datetime('now', '+' || ? || ' days')
+                ORDER BY due_date
+            """, (entity_id, days))
 
-        rows = cursor.fetchall()
-        conn.close()
+            rows = cursor.fetchall()
 
         return [dict(row) for row in rows]
 
     def complete_deadline(self, deadline_id: str) -> bool:
         """Mark deadline as completed."""
-        conn = self._get_conn()
-        cursor = conn.cursor()
+        with self.db.transaction() as cursor:
+            cursor.execute("""
+                UPDATE deadlines
+                SET status = 'completed', completed_at = ?
+                WHERE deadline_id = ?
+            """, (datetime.now().isoformat(), deadline_id))
+            updated = cursor.rowcount > 0
+        return updated
+
+    def get_pending_deadlines(
+        self,
+        after_rowid: int = 0,
+        max_reminders: int = 1,
+        limit: int = 10000
+    ) -> list[dict]:
+        """
+        Get pending deadlines that still have reminders to send.
+
+        Rows are returned in rowid order so callers can page through
+        the table (or pick up new rows) by passing the last rowid seen.
+        `reminder_sent` holds the number of reminders already sent.
+        """
+        with self.db.cursor() as cursor:
+            cursor.execute("""
+                SELECT rowid, deadline_id, entity_id, deadline_type, due_date,
+                       financial_year, reminder_sent
+                FROM deadlines
+                WHERE rowid > ?
+                AND status = 'pending'
+                AND reminder_sent < ?
+                ORDER BY rowid
+                LIMIT ?
+            """, (after_rowid, max_reminders, limit))
+
+            rows = cursor.fetchall()
 
-        cursor.execute("""
-            UPDATE deadlines
-            SET status = 'completed', completed_at = ?
-            WHERE deadline_id = ?
-        """, (datetime.now().isoformat(), deadline_id))
+        return [dict(row) for row in rows]
 
-        conn.commit()
-        conn.close()
-        return cursor.rowcount > 0
+    def filter_pending_deadlines(self, deadline_ids: list[str]) -> set[str]:
+        """Return the subset of deadline ids that are still pending."""
+        if not deadline_ids:
+            return set()
+
+        with self.db.cursor() as cursor:
+            pending = set()
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(deadline_ids), 500):
+                chunk = deadline_ids[i:i + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                cursor.execute(
+                    f"SELECT deadline_id FROM deadlines "
+                    f"WHERE deadline_id IN ({placeholders}) AND status = 'pending'",
+                    chunk
+                )
+                pending.update(row['deadline_id'] for row in cursor.fetchall())
+        return pending
+
+    def mark_reminders_sent(self, updates: list[tuple[str, int]]) -> int:
+        """
+        Record sent reminders in bulk.
+
+        Args:
+            updates: (deadline_id, reminder_count) pairs
+
+        Returns:
+            Number of rows updated
+        """
+        if not updates:
+            return 0
+
+        with self.db.transaction() as cursor:
+            # Never move the counter backwards if two schedulers overlap
+            cursor.executemany("""
+                UPDATE deadlines
+                SET reminder_sent = ?
+                WHERE deadline_id = ? AND reminder_sent < ?
+            """, [(count, deadline_id, count) for deadline_id, count in updates])
+
+            updated = cursor.rowcount
+        return updated
 
     # ============ Aggregate State ============
 
-    def get_user_state(self, user_id: str) -> dict:
-        """Get aggregated state for agent context."""
-        user = self.get_user(user_id)
-        entities = self.get_user_entities(user_id)
+    # Table behind each get_user_state() section
+    USER_STATE_TABLES = {
+        "profile": "users",
+        "entities": "entities",
+        "active_risks": "compliance_risks",
+        "upcoming_deadlines": "deadlines",
+    }
 
-        state = {
-            "profile": user,
-            "entities": entities,
-            "active_risks": [],
-            "upcoming_deadlines": []
+    def get_user_state(
+        self,
+        user_id: str,
+        fields: Optional[dict[str, list[str]]] = None,
+        deadline_days: int = 30
+    ) -> dict:
+        """
+        Get aggregated state for agent context.
+
+        Four set-based queries on one snapshot: the profile, the user's
+        entities, and risks and deadlines joined to those entities, so the
+        cost does not grow with the number of entities.
+
+        Args:
+            user_id: User to load
+            fields: Columns to return per section, e.g.
+                {"entities": ["entity_id", "name"], "active_risks": ["title"]};
+                sections not listed return every column
+            deadline_days: Horizon for upcoming deadlines
+        """
+        fields = fields or {}
+
+        def columns(section: str, alias: str) -> str:
+            return self._projection(section, fields.get(section), alias)
+
+        with self.db.transaction() as cursor:
+            cursor.execute(
+                f"SELECT {columns('profile', 'u')} FROM users u WHERE u.user_id = ?",
+                (user_id,)
+            )
+            user = cursor.fetchone()
+
+            cursor.execute(f"""
+                SELECT {columns('entities', 'e')} FROM entities e
+                WHERE e.user_id = ?
+                ORDER BY e.rowid
+            """, (user_id,))
+            entities = cursor.fetchall()
+
+            cursor.execute(f"""
+                SELECT e.name AS entity, {columns('active_risks', 'r')}
+                FROM entities e
+                JOIN compliance_risks r ON r.entity_id = e.entity_id
+                WHERE e.user_id = ? AND r.resolved_at IS NULL
+                ORDER BY e.rowid, r.rowid
+            """, (user_id,))
+            risks = cursor.fetchall()
+
+            cursor.execute(f"""
+                SELECT e.name AS entity, {columns('upcoming_deadlines', 'd')}
+                FROM entities e
+                JOIN deadlines d ON d.entity_id = e.entity_id
+                WHERE e.user_id = ?
+                AND d.status = 'pending'
+                AND d.due_date <= datetime('now', '+' || ? || ' days')
+                ORDER BY e.rowid, d.due_date
+            """, (user_id, deadline_days))
+            deadlines = cursor.fetchall()
+
+        return {
+            "profile": dict(user) if user else None,
+            "entities": [self._decode_entity(row) for row in entities],
+            "active_risks": [dict(row) for row in risks],
+            "upcoming_deadlines": [dict(row) for row in deadlines]
         }
 
-        for entity in entities:
-            risks = self.get_active_risks(entity['entity_id'])
-            deadlines = self.get_upcoming_deadlines(entity['entity_id'])
-
-            state["active_risks"].extend([
-                {"entity": entity['name'], **risk}
-                for risk in risks
-            ])
-            state["upcoming_deadlines"].extend([
-                {"entity": entity['name'], **dl}
-                for dl in deadlines
-            ])
-
-        return state
+    # Record kind -> query mapping record ids to their owning user
+    OWNER_QUERIES = {
+        "entity": "SELECT entity_id, user_id FROM entities WHERE entity_id IN ({})",
+        "risk": """
+            SELECT r.risk_id, e.user_id FROM compliance_risks r
+            JOIN entities e ON e.entity_id = r.entity_id WHERE r.risk_id IN ({})
+        """,
+        "deadline": """
+            SELECT d.deadline_id, e.user_id FROM deadlines d
+            JOIN entities e ON e.entity_id = d.entity_id WHERE d.deadline_id IN ({})
+        """,
+        "session": "SELECT session_id, user_id FROM sessions WHERE session_id IN ({})",
+    }
+
+    def record_owners(self, kind: str, record_ids: Iterable[str]) -> dict[str, str]:
+        """
+        Owning user of each entity, risk, deadline or session id.
+
+        Ids that do not exist are left out. Used by CachedStateStore to
+        invalidate only the users a write touched.
+        """
+        query = self.OWNER_QUERIES[kind]
+        owners = {}
+        with self.db.cursor() as cursor:
+            for chunk in _chunks(dict.fromkeys(record_ids), 900):
+                cursor.execute(query.format(", ".join("?" * len(chunk))), chunk)
+                owners.update((row[0], row[1]) for row in cursor.fetchall())
+        return owners
+
+    def _projection(self, section: str, requested: Optional[list[str]], alias: str) -> str:
+        """SELECT list for a section; column names are checked against the table."""
+        if requested is None:
+            return f"{alias}.*"
+        self._check_columns(self.USER_STATE_TABLES[section], requested, section)
+        return ", ".join(f"{alias}.{name}" for name in requested)
+
+    def _select(self, table: str, requested: Optional[list[str]]) -> str:
+        """SELECT list for a single-table read."""
+        if requested is None:
+            return "*"
+        self._check_columns(table, requested, table)
+        return ", ".join(requested)
+
+    def _check_columns(self, table: str, requested: list[str], label: str) -> None:
+        if table not in self._columns:
+            with self.db.cursor() as cursor:
+                cursor.execute(f"PRAGMA table_info({table})")
+                self._columns[table] = {row['name'] for row in cursor.fetchall()}
+
+        unknown = [name for name in requested if name not in self._columns[table]]
+        if unknown or not requested:
+            raise ValueError(f"Unknown {label} fields: {unknown}")
 
 
 # Test
@@ -624,6 +1096,8 @@ if __name__ == "__main__":
     # Create user
     user_id = store.create_user(email="test@example.com", name="Test User")
     print(f"Created user: {user_id}")
+    assert store.update_user(user_id, name="Test User")  # True once committed
+    assert not store.update_user("no-such-user", name="Nobody")
 
     # Create entity
     entity_id = store.create_entity(
@@ -649,4 +1123,41 @@ if __name__ == "__main__":
     state = store.get_user_state(user_id)
     print(f"User state: {json.dumps(state, indent=2, default=str)}")
 
+    # Only the columns the prompt needs
+    state = store.get_user_state(user_id, fields={
+        "entities": ["entity_id", "name"],
+        "active_risks": ["severity", "title"],
+    })
+    print(f"Projected: {state['entities']} {state['active_risks']}")
+
+    # Bulk import: one transaction, executemany per chunk
+    turn_ids = store.save_conversations(
+        {"session_id": f"import-{i % 10}", "user_id": user_id,
+         "user_message": "What is due this month?", "assistant_message": "GSTR-3B on the 20th."}
+        for i in range(10000)
+    )
+    risk_ids = store.add_risks(
+        [{"entity_id": entity_id, "category": "tds", "severity": "low", "title": f"TDS mismatch {q}"}
+         for q in ("Q1", "Q2")]
+    )
+    print(f"Imported {len(turn_ids)} turns (ids {turn_ids[0]}-{turn_ids[-1]}) and {len(risk_ids)} risks")
+
+    # JSON columns are decoded on first access; list views can skip them
+    import time
+    store.store_documents(
+        {"entity_id": entity_id, "document_type": "invoice", "filename": f"inv_{i}.pdf",
+         "extracted_data": {"line_items": [{"hsn": "9983", "amount": 1000.0}] * 50}}
+        for i in range(5000)
+    )
+    start = time.perf_counter()
+    documents = store.get_documents(entity_id, "invoice")
+    fetched = time.perf_counter() - start
+    decoded = sum(len(doc["extracted_data"]["line_items"]) for doc in documents)
+    print(f"5000 documents: {fetched * 1000:.0f}ms fetched, "
+          f"{(time.perf_counter() - start) * 1000:.0f}ms with every extracted_data decoded")
+    listing = store.get_documents(entity_id, "invoice", fields=["document_id", "filename"])
+    print(f"Projected listing: {listing[0]}")
+    entity = store.get_entity(entity_id)
+    print(f"Lazy entity: {entity['name']}, income sources {entity['income_sources']}")
+
     print("\n✅ SQLite store working!")
@@ -0,0 +1,223 @@
+"""
+Write-Behind Conversation Buffer for TaxAlly
+
+Takes conversation writes off the chat request path:
+- save_conversation() appends the turn to an in-memory queue and returns
+- A background thread writes queued turns with SQLiteStore.save_conversations,
+  one transaction per batch (group commit), once `max_batch` turns are
+  queued or `flush_interval` seconds have passed
+- get_conversation_history() merges turns not yet written, so a session
+  always reads its own writes
+- flush() / close() write everything synchronously; close() also runs at
+  interpreter exit. Turns still queued when the process is killed are lost
+"""
+
+import atexit
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+
+DEFAULT_MAX_BATCH = 256
+DEFAULT_FLUSH_INTERVAL = 0.05   # Seconds a turn may wait for its group commit
+DEFAULT_MAX_PENDING = 10000     # Writers block once this many turns are queued
+
+
+class ConversationWriteBuffer:
+    """
+    Group-committing buffer in front of SQLiteStore conversation writes.
+
+    Usage:
+        conversations = ConversationWriteBuffer(store)
+        conversations.save_conversation(session_id, user_id, question, answer)
+        history = conversations.get_conversation_history(session_id)
+        conversations.close()   # at shutdown
+    """
+
+    def __init__(
+        self,
+        store,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        max_pending: int = DEFAULT_MAX_PENDING
+    ):
+        """
+        Args:
+            store: SQLiteStore to write to
+            max_batch: Queued turns that trigger an immediate flush
+            flush_interval: Longest a queued turn waits before a flush
+            max_pending: Queue limit; save_conversation() waits above it
+        """
+        self.store = store
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._cond = threading.Condition()
+        self._pending: list[dict] = []
+        self._write_lock = threading.Lock()  # Held while a batch commits
+        self._closed = False
+        self.flushes = 0
+        self.turns_written = 0
+        self.last_error: Optional[Exception] = None
+
+        self._thread = threading.Thread(
+            target=self._run, name="conversation-write-behind", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ============ Writes ============
+
+    def save_conversation(
+        self,
+        session_id: str,
+        user_id: str,
+        user_message: str,
+        assistant_message: str,
+        entity_id: str = None,
+        tool_calls: list = None
+    ) -> None:
+        """Queue a conversation turn; it is committed within `flush_interval`."""
+        turn = {
+            "session_id": session_id,
+            "user_id": user_id,
+            "entity_id": entity_id,
+            "user_message": user_message,
+            "assistant_message": assistant_message,
+            "tool_calls": tool_calls or [],
+            # Same format as CURRENT_TIMESTAMP, with microseconds so turns
+            # in one batch keep their order
+            "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f"),
+        }
+        with self._cond:
+            while not self._closed and len(self._pending) >= self.max_pending:
+                self._cond.notify_all()
+                self._cond.wait()
+            # Checked after waiting too: a turn queued after close()'s final
+            # flush would never be written
+            if self._closed:
+                raise RuntimeError("ConversationWriteBuffer is closed")
+            self._pending.append(turn)
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+
+    def flush(self) -> int:
+        """Write every queued turn now; returns the number written."""
+        return self._write_pending()
+
+    def close(self) -> None:
+        """
+        Stop the background thread and write what is left.
+
+        Raises:
+            RuntimeError: If the final write failed; the unwritten turns
+                stay in the queue and the cause is chained
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.flush()
+        atexit.unregister(self.close)
+        unwritten = self.pending()
+        if unwritten:
+            raise RuntimeError(
+                f"{unwritten} conversation turn(s) could not be written"
+            ) from self.last_error
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while not self._closed and len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._closed:
+                    return
+            self._write_pending()
+
+    def _write_pending(self) -> int:
+        # Taking the batch under the write lock means a turn is always either
+        # queued or committed when get_conversation_history() looks
+        with self._write_lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+                self._cond.notify_all()  # Wake writers waiting on max_pending
+            if not batch:
+                return 0
+            try:
+                self.store.save_conversations(batch)
+            except Exception as e:
+                # Requeue ahead of newer turns; retried on the next flush
+                self.last_error = e
+                with self._cond:
+                    self._pending[:0] = batch
+                return 0
+            self.flushes += 1
+            self.turns_written += len(batch)
+            return len(batch)
+
+    # ============ Reads ============
+
+    def get_conversation_history(self, session_id: str, limit: int = 10) -> list[dict]:
+        """Recent turns for a session, including turns not yet written."""
+        # Holding the write lock keeps a batch from committing between
+        # the database read and the queue snapshot (no gaps, no repeats)
+        with self._write_lock:
+            history = self.store.get_conversation_history(session_id, limit)
+            with self._cond:
+                queued = [t for t in self._pending if t["session_id"] == session_id]
+
+        # A queued turn can be older than committed ones (its writer thread
+        # was preempted before queueing), so merge by timestamp
+        merged = history + [{"id": None, **turn} for turn in queued]
+        merged.sort(key=lambda turn: turn["created_at"])
+        return merged[-limit:]
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+
+# Test
+if __name__ == "__main__":
+    import os
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+    from .sqlite_store import SQLiteStore
+
+    print("Testing Write-Behind Conversation Buffer...")
+    path = os.path.join(tempfile.mkdtemp(), "write_behind_test.db")
+    store = SQLiteStore(path)
+    user_id = store.create_user(name="Test User")
+
+    def turn(i: int, target) -> float:
+        start = time.perf_counter()
+        target.save_conversation(f"session-{i % 20}", user_id, f"Question {i}", f"Answer {i}")
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        direct = list(pool.map(lambda i: turn(i, store), range(2000)))
+
+    buffer = ConversationWriteBuffer(store)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        buffered = list(pool.map(lambda i: turn(i, buffer), range(2000)))
+
+    history = buffer.get_conversation_history("session-3", limit=3)
+    print(f"  Read-your-writes: {[t['user_message'] for t in history]} ({buffer.pending()} queued)")
+    print(f"  Per-turn latency: {sum(direct) / len(direct) * 1e6:.0f}µs direct, "
+          f"{sum(buffered) / len(buffered) * 1e6:.0f}µs buffered")
+
+    buffer.close()
+    with store.db.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM conversations")
+        print(f"  Rows after close: {cursor.fetchone()[0]} "
+              f"({buffer.turns_written} buffered turns in {buffer.flushes} commits)")
+    store.close()
+    print("\n✅ Write-behind buffer working!")
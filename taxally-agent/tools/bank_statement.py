@@ -0,0 +1,439 @@
+"""
+Bank Statement Table Extraction for TaxAlly
+
+Extracts every transaction row from a bank statement PDF:
+- Reads each page as a table: positioned text runs from pdfium (fast,
+  ships with pdfplumber), falling back to pdfplumber's `extract_tables`
+- Infers date / narration / debit / credit / balance columns from the
+  header row; headerless continuation pages reuse the last header
+- Joins wrapped narration lines onto their transaction
+- Streams transactions page by page (e.g. into the categorizer)
+- Validates the running balance row by row
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional
+
+from .page_text import PageTextBuffer
+from .pdf_source import open_source, pdfium_input
+
+try:
+    import pdfplumber
+    PDF_AVAILABLE = True
+except ImportError:
+    PDF_AVAILABLE = False
+
+try:
+    import pypdfium2
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
+
+# Header aliases per column role, checked in this order. A header cell
+# takes the first role it matches that is still free, so "Value Date"
+# is ignored once "Txn Date" holds the date column.
+COLUMN_ALIASES = (
+    ("balance", ("balance",)),
+    ("date", ("txn date", "transaction date", "tran date", "trans date",
+              "posting date", "date", "value date")),
+    ("narration", ("narration", "description", "particulars", "details", "remarks")),
+    ("reference", ("chq", "cheque", "ref")),
+    ("debit", ("withdrawal", "debit", "dr")),
+    ("credit", ("deposit", "credit", "cr")),
+    ("amount", ("amount",)),
+)
+
+_ALIAS_RES = tuple(
+    (role, re.compile(r'\b(?:' + '|'.join(re.escape(a) for a in aliases) + r')\b'))
+    for role, aliases in COLUMN_ALIASES
+)
+
+DATE_RE = re.compile(r'\d{1,2}[-/ ](?:\d{1,2}|[A-Za-z]{3})[-/ ]\d{2,4}')
+_AMOUNT_RE = re.compile(r'\(?-?\s*(?:₹|Rs\.?|INR)?\s*([\d,]+(?:\.\d+)?)\s*\)?\s*(Dr|Cr)?', re.IGNORECASE)
+_SUMMARY_RE = re.compile(r'^\s*(?:opening|closing)\s+balance|^\s*(?:grand\s+)?total\b', re.IGNORECASE)
+
+# Vertical distance (pt) within which text runs belong to one row
+ROW_TOLERANCE = 2.0
+
+BALANCE_TOLERANCE = 0.01
+
+
+def parse_amount(text: Optional[str]) -> Optional[float]:
+    """
+    Parse an Indian-format amount cell.
+
+    Handles grouping commas, currency prefixes, a leading minus or
+    parentheses, and a trailing Dr (negative) / Cr marker.
+    """
+    if not text or not text.strip():
+        return None
+    m = _AMOUNT_RE.search(text)
+    if not m or not any(c.isdigit() for c in m.group(1)):
+        return None
+    value = float(m.group(1).replace(",", ""))
+    raw = text.strip()
+    if raw.startswith(("-", "(")) or (m.group(2) or "").lower() == "dr":
+        value = -value
+    return value
+
+
+def infer_columns(cells: list[str]) -> Optional[dict[str, int]]:
+    """
+    Map column roles to indices from a header row.
+
+    Returns None unless the row has a date column and at least one of
+    debit/credit/amount.
+    """
+    columns: dict[str, int] = {}
+    for index, cell in enumerate(cells):
+        text = (cell or "").lower().replace("\n", " ")
+        for role, pattern in _ALIAS_RES:
+            if role not in columns and pattern.search(text):
+                columns[role] = index
+                break
+
+    if "date" in columns and ({"debit", "credit", "amount"} & columns.keys()):
+        return columns
+    return None
+
+
+@dataclass
+class BalanceCheck:
+    """Running-balance validation over a statement."""
+    opening_balance: Optional[float] = None
+    closing_balance: Optional[float] = None
+    checked: int = 0
+    mismatches: list[dict] = field(default_factory=list)
+    _running: Optional[float] = field(default=None, repr=False)
+
+    def feed(self, txn: dict) -> None:
+        signed = txn['amount'] if txn['type'] == 'credit' else -txn['amount']
+        balance = txn.get('balance')
+
+        if self._running is None:
+            if balance is None:
+                return
+            if self.opening_balance is None:
+                self.opening_balance = round(balance - signed, 2)
+            self._running = self.opening_balance
+
+        expected = round(self._running + signed, 2)
+        if balance is None:
+            self._running = expected
+            return
+
+        self.checked += 1
+        if abs(expected - balance) > BALANCE_TOLERANCE:
+            self.mismatches.append({
+                'row': txn.get('row'),
+                'date': txn['date'],
+                'expected': expected,
+                'balance': balance
+            })
+        # Resync so one bad row is reported once, not for every later row
+        self._running = balance
+        self.closing_balance = balance
+
+    def to_dict(self) -> dict:
+        return {
+            'opening_balance': self.opening_balance,
+            'closing_balance': self.closing_balance,
+            'rows_checked': self.checked,
+            'mismatch_count': len(self.mismatches),
+            'mismatches': self.mismatches[:20],
+            'valid': not self.mismatches
+        }
+
+
+class StatementTableParser:
+    """
+    Turns table rows (lists of cell strings) into transactions.
+
+    Keeps the inferred columns and the last open transaction across
+    pages, so tables continued over several pages parse as one.
+    """
+
+    def __init__(self, opening_balance: Optional[float] = None):
+        self.columns: Optional[dict[str, int]] = None
+        self.balance_check = BalanceCheck(opening_balance=opening_balance)
+        self.rows = 0
+        self._pending: Optional[dict] = None
+        self._previous_balance = opening_balance
+
+    def feed(self, cells: list[str], page: int) -> Optional[dict]:
+        """
+        Consume one table row.
+
+        Returns the previous transaction once it is known to be complete
+        (i.e. the next one has started); call `finish()` at the end.
+        """
+        header = infer_columns(cells)
+        if header is not None:
+            self.columns = header
+            return None
+        if self.columns is None:
+            return None
+
+        cell = lambda role: (
+            (cells[self.columns[role]] or "").strip()
+            if role in self.columns and self.columns[role] < len(cells) else ""
+        )
+
+        date = cell("date")
+        narration = " ".join(cell("narration").split())
+        if not DATE_RE.match(date):
+            # Wrapped narration line of the open transaction
+            if self._pending is not None and narration and not _SUMMARY_RE.match(narration):
+                self._pending['description'] = f"{self._pending['description']} {narration}".strip()
+            return None
+
+        txn = self._make_transaction(date, narration, cell, page)
+        if txn is None:
+            return None
+
+        done, self._pending = self._pending, txn
+        if done is not None:
+            self.balance_check.feed(done)
+        return done
+
+    def _make_transaction(self, date: str, narration: str, cell, page: int) -> Optional[dict]:
+        debit = parse_amount(cell("debit"))
+        credit = parse_amount(cell("credit"))
+        balance = parse_amount(cell("balance"))
+
+        if debit is None and credit is None:
+            amount = parse_amount(cell("amount"))
+            if amount is None:
+                return None
+            if amount < 0 or cell("amount").lower().endswith("dr"):
+                debit = abs(amount)
+            elif cell("amount").lower().endswith("cr"):
+                credit = amount
+            elif balance is not None and self._previous_balance is not None:
+                # No marker: direction from the balance movement
+                if balance < self._previous_balance:
+                    debit = amount
+                else:
+                    credit = amount
+            else:
+                debit = amount
+
+        if balance is not None:
+            self._previous_balance = balance
+
+        self.rows += 1
+        txn = {
+            'date': date,
+            'description': narration,
+            'amount': abs(credit) if credit else abs(debit or 0.0),
+            'type': 'credit' if credit else 'debit',
+            'balance': balance,
+            'page': page,
+            'row': self.rows
+        }
+        reference = cell("reference")
+        if reference:
+            txn['reference'] = reference
+        return txn
+
+    def finish(self) -> Optional[dict]:
+        """Return the last open transaction, if any."""
+        done, self._pending = self._pending, None
+        if done is not None:
+            self.balance_check.feed(done)
+        return done
+
+
+# ============ Page Readers ============
+
+def _group_runs(runs: list[tuple[float, float, float, str]]) -> list[list[tuple[float, float, str]]]:
+    """Group (top, x0, x1, text) runs into rows ordered top-down, left-right."""
+    rows: list[list[tuple[float, float, str]]] = []
+    current_top = None
+    for top, x0, x1, text in sorted(runs, key=lambda r: (-r[0], r[1])):
+        if current_top is None or abs(top - current_top) > ROW_TOLERANCE:
+            rows.append([])
+            current_top = top
+        rows[-1].append((x0, x1, text))
+    return [sorted(row) for row in rows]
+
+
+def _header_bands(row: list[tuple[float, float, str]]) -> list[float]:
+    """Column boundaries halfway between neighbouring header cells."""
+    return [(row[i][1] + row[i + 1][0]) / 2 for i in range(len(row) - 1)]
+
+
+def _cells_from_runs(row: list[tuple[float, float, str]], bands: list[float]) -> list[str]:
+    cells = [""] * (len(bands) + 1)
+    for x0, x1, text in row:
+        center = (x0 + x1) / 2
+        index = sum(1 for boundary in bands if center > boundary)
+        cells[index] = f"{cells[index]} {text}".strip() if cells[index] else text.strip()
+    return cells
+
+
+class _PdfiumReader:
+    """Positioned text runs per page via pdfium."""
+
+    def __init__(self, source):
+        self.pdf = pypdfium2.PdfDocument(pdfium_input(source))
+        self.bands: Optional[list[float]] = None
+
+    def __len__(self) -> int:
+        return len(self.pdf)
+
+    def page(self, index: int) -> tuple[str, list[list[str]]]:
+        """Page text and table rows."""
+        page = self.pdf[index]
+        textpage = page.get_textpage()
+        text = textpage.get_text_range().replace("\r\n", "\n")
+
+        runs = []
+        for i in range(textpage.count_rects()):
+            left, bottom, right, top = textpage.get_rect(i)
+            run = textpage.get_text_bounded(left, bottom, right, top).strip()
+            if run:
+                runs.append((top, left, right, run))
+        textpage.close()
+        page.close()
+
+        rows = []
+        for row in _group_runs(runs):
+            if infer_columns([text for _, _, text in row]) is not None:
+                self.bands = _header_bands(row)
+            if self.bands is not None:
+                rows.append(_cells_from_runs(row, self.bands))
+        return text, rows
+
+    def close(self):
+        self.pdf.close()
+
+
+class _PdfplumberReader:
+    """Table rows per page via pdfplumber's table finder."""
+
+    def __init__(self, source):
+        self.pdf = pdfplumber.open(open_source(source))
+
+    def __len__(self) -> int:
+        return len(self.pdf.pages)
+
+    def page(self, index: int) -> tuple[str, list[list[str]]]:
+        page = self.pdf.pages[index]
+        text = page.extract_text() or ""
+        rows = [row for table in page.extract_tables() for row in table]
+        page.close()
+        return text, rows
+
+    def close(self):
+        self.pdf.close()
+
+
+def _open_reader(source, prefer_pdfium: bool = True):
+    if prefer_pdfium and PDFIUM_AVAILABLE:
+        return _PdfiumReader(source)
+    if PDF_AVAILABLE:
+        return _PdfplumberReader(source)
+    raise ImportError("pdfplumber not installed. Run: pip install pdfplumber")
+
+
+# ============ Statement Extraction ============
+
+def iter_statement_pages(
+    source,
+    opening_balance: Optional[float] = None,
+    start_page: int = 0,
+    parser: Optional[StatementTableParser] = None,
+    prefer_pdfium: bool = True
+) -> Iterator[tuple[int, str, list[dict]]]:
+    """
+    Stream a statement page by page.
+
+    Args:
+        source: PDF path, memoryview (see pdf_source) or binary file object
+        opening_balance: Seeds running-balance validation if known
+        start_page: First page to read
+        parser: Carries columns/open rows over from earlier pages
+        prefer_pdfium: Use pdfium runs; otherwise pdfplumber tables
+
+    Yields:
+        (page index, page text, transactions completed on that page).
+        The statement's last transaction is yielded with the last page.
+    """
+    parser = parser or StatementTableParser(opening_balance)
+    reader = _open_reader(source, prefer_pdfium)
+    try:
+        total = len(reader)
+        for index in range(start_page, total):
+            text, rows = reader.page(index)
+            completed = [txn for txn in (parser.feed(cells, index + 1) for cells in rows) if txn]
+            if index == total - 1:
+                last = parser.finish()
+                if last:
+                    completed.append(last)
+            yield index, text, completed
+    finally:
+        reader.close()
+
+
+def extract_statement(
+    source,
+    opening_balance: Optional[float] = None,
+    categorize: Optional[Callable[[list[dict]], list[dict]]] = None
+) -> dict:
+    """
+    Extract all transactions from a statement.
+
+    Falls back to pdfplumber tables if pdfium finds no statement header.
+
+    Returns:
+        {"transactions", "balance_check", "page_texts", "columns"};
+        page_texts is a PageTextBuffer
+    """
+    for prefer_pdfium in ((True, False) if PDFIUM_AVAILABLE else (False,)):
+        parser = StatementTableParser(opening_balance)
+        transactions, page_texts = [], PageTextBuffer()
+        for _, text, page_txns in iter_statement_pages(
+            source, opening_balance, parser=parser, prefer_pdfium=prefer_pdfium
+        ):
+            page_texts.append(text)
+            transactions.extend(categorize(page_txns) if categorize and page_txns else page_txns)
+        if parser.columns is not None or not prefer_pdfium:
+            break  # Found, or nothing left to fall back to
+        page_texts.close()  # Discarded attempt; may have spilled to disk
+        if hasattr(source, "seek"):
+            source.seek(0)
+
+    return {
+        "transactions": transactions,
+        "balance_check": parser.balance_check,
+        "page_texts": page_texts,
+        "columns": parser.columns
+    }
+
+
+# Test
+if __name__ == "__main__":
+    print("Testing Bank Statement Parsing...")
+    for raw in ["1,23,456.78", "₹ 500.00", "(1,000.00)", "2,500.00 Dr", "-385,046.35", "", "abc"]:
+        print(f"  {raw!r} -> {parse_amount(raw)}")
+
+    header = ["Txn Date", "Value Date", "Narration", "Chq/Ref No", "Withdrawal (Dr)", "Deposit (Cr)", "Balance"]
+    print(f"  Columns: {infer_columns(header)}")
+
+    parser = StatementTableParser(opening_balance=10000.0)
+    rows = [
+        header,
+        ["01/04/2024", "01/04/2024", "NEFT SALARY CREDIT", "N123", "", "50,000.00", "60,000.00"],
+        ["02/04/2024", "02/04/2024", "UPI/PAYMENT/Swiggy", "U456", "450.50", "", "59,549.50"],
+        ["", "", "food order", "", "", "", ""],
+        ["03/04/2024", "03/04/2024", "ATM WITHDRAWAL", "", "5,000.00", "", "54,549.50"],
+    ]
+    for cells in rows:
+        txn = parser.feed(cells, page=1)
+        if txn:
+            print(f"  {txn}")
+    print(f"  {parser.finish()}")
+    print(f"  Balance check: {parser.balance_check.to_dict()}")
@@ -0,0 +1,270 @@
+"""
+Background Document Processing for TaxAlly
+
+Moves parsing out of the request path:
+- submit_document() stores a `pending` document row and queues a parse
+  job in one transaction, so an upload returns as soon as the file is
+  saved and no document is left without a job
+- DocumentWorkerPool runs worker processes that claim jobs, parse the
+  file, store the extracted data and move the document through
+  pending -> processing -> processed / review_needed / failed
+- Retries, backoff and lease expiry come from state.job_queue; a worker
+  renews its lease while parsing, so slow parses are not picked up twice
+
+Usage:
+    python -m tools.document_worker --db taxally.db --workers 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from state.schema import ProcessingStatus
+
+from .parse_cache import hash_file
+from .pdf_parser import TaxDocumentParser
+
+
+PARSE_JOB = "parse_document"
+POLL_INTERVAL = 0.5  # Seconds an idle worker waits before polling again
+LEASE_RENEWALS = 3   # Lease extensions per visibility_timeout while a job runs
+
+
+def submit_document(
+    store,
+    queue,
+    entity_id: str,
+    path: str,
+    filename: Optional[str] = None,
+    streaming: bool = False
+) -> tuple[str, str]:
+    """
+    Record an uploaded file and queue it for parsing.
+
+    Args:
+        store: SQLiteStore holding the documents table
+        queue: JobQueue on the same database
+        entity_id: Entity the document belongs to
+        path: Saved upload; must stay readable until the job finishes
+        filename: Display name (default: basename of path)
+        streaming: Parse in streaming mode
+
+    Returns:
+        (document_id, job_id)
+    """
+    content_hash = hash_file(path)
+    with store.db.transaction() as cursor:
+        document_id = store.store_document(  # Joins this transaction
+            entity_id=entity_id,
+            document_type="other",  # Set once parsed
+            filename=filename or os.path.basename(path),
+            content_hash=content_hash
+        )
+        job_id = queue.enqueue(PARSE_JOB, {
+            "document_id": document_id,
+            "path": path,
+            "streaming": streaming,
+        }, cursor=cursor)
+    return document_id, job_id
+
+
+@contextmanager
+def renewing_lease(queue, job) -> Iterator[None]:
+    """
+    Keep extending a job's lease while the block runs.
+
+    A parse slower than the visibility timeout would otherwise be
+    claimed, and parsed again, by a second worker. Renewals run on the
+    worker's own queue connection, which sits idle while the block runs,
+    so no connection is opened per job.
+    """
+    done = threading.Event()
+    interval = queue.visibility_timeout / LEASE_RENEWALS
+    connection = queue.db.connection()
+
+    def renew():
+        while not done.wait(interval):
+            if not queue.extend(job, connection=connection):
+                return  # Lost (e.g. the job was reclaimed); complete() will say so
+
+    thread = threading.Thread(target=renew, name=f"lease-{job.job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def process_job(job, store, parser: TaxDocumentParser) -> None:
+    """Parse a job's file and store the result on its document."""
+    payload = job.payload
+    store.update_document(
+        payload["document_id"], processing_status=ProcessingStatus.PROCESSING.value
+    )
+    with parser.parse_pdf(payload["path"], payload.get("streaming", False)) as document:
+        fields = document.extracted_fields
+    store.update_document(
+        payload["document_id"],
+        document_type=document.document_type,
+        financial_year=fields.get("assessment_year"),
+        extracted_data=fields,
+        processing_status=(
+            ProcessingStatus.PROCESSED if document.confidence > 0.5
+            else ProcessingStatus.REVIEW_NEEDED
+        ).value
+    )
+
+
+def run_worker(
+    db_path: str,
+    worker_id: str,
+    stop_event=None,
+    poll_interval: float = POLL_INTERVAL,
+    visibility_timeout: Optional[float] = None,
+    exit_when_idle: bool = False
+) -> int:
+    """
+    Claim and process parse jobs until stopped.
+
+    Args:
+        db_path: Database holding the documents and jobs tables
+        worker_id: Lease owner name
+        stop_event: multiprocessing.Event; the loop exits once set
+        poll_interval: Idle wait between claims
+        visibility_timeout: Lease length (default: JobQueue's)
+        exit_when_idle: Return once no job is due (for draining)
+
+    Returns:
+        Number of jobs completed
+    """
+    from state.job_queue import JobQueue
+    from state.sqlite_store import SQLiteStore
+
+    store = SQLiteStore(db_path)
+    queue = JobQueue(db_path, **({"visibility_timeout": visibility_timeout} if visibility_timeout else {}))
+    # Each worker is one process already; no nested page pools
+    parser = TaxDocumentParser(max_workers=1)
+    completed = 0
+
+    try:
+        while stop_event is None or not stop_event.is_set():
+            job = queue.claim(worker_id, kinds=[PARSE_JOB])
+            if job is None:
+                if exit_when_idle:
+                    break
+                if stop_event is not None:
+                    stop_event.wait(poll_interval)
+                else:
+                    time.sleep(poll_interval)
+                continue
+
+            try:
+                with renewing_lease(queue, job):
+                    process_job(job, store, parser)
+            except Exception as e:
+                outcome = queue.fail(job, f"{type(e).__name__}: {e}")
+                if outcome != "lost":
+                    store.update_document(
+                        job.payload["document_id"],
+                        processing_status=(
+                            ProcessingStatus.FAILED if outcome == "failed"
+                            else ProcessingStatus.PENDING
+                        ).value
+                    )
+            else:
+                if queue.complete(job):
+                    completed += 1
+    finally:
+        queue.close()
+        store.close()
+
+    return completed
+
+
+class DocumentWorkerPool:
+    """
+    Worker processes parsing queued documents.
+
+    Usage:
+        with DocumentWorkerPool("taxally.db", workers=4):
+            ...  # Uploads call submit_document(); workers pick them up
+    """
+
+    def __init__(
+        self,
+        db_path: str = "taxally.db",
+        workers: Optional[int] = None,
+        poll_interval: float = POLL_INTERVAL,
+        visibility_timeout: Optional[float] = None
+    ):
+        """
+        Args:
+            db_path: Database holding the documents and jobs tables
+            workers: Worker processes (default: CPU count)
+            poll_interval: Idle wait between claims
+            visibility_timeout: Lease length; renewed while a parse runs
+        """
+        self.db_path = db_path
+        self.workers = workers or os.cpu_count() or 1
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self._stop = multiprocessing.Event()
+        self._processes: list[multiprocessing.Process] = []
+
+    def start(self) -> None:
+        self._stop.clear()
+        for i in range(self.workers):
+            process = multiprocessing.Process(
+                target=run_worker,
+                args=(self.db_path, f"{os.getpid()}-worker-{i}", self._stop,
+                      self.poll_interval, self.visibility_timeout),
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Ask workers to exit after their current job, and wait for them."""
+        self._stop.set()
+        for process in self._processes:
+            process.join(timeout)
+        self._processes.clear()
+
+    def __enter__(self) -> "DocumentWorkerPool":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background document parsing workers")
+    parser.add_argument("--db", default="taxally.db")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--drain", action="store_true",
+                        help="Process due jobs in this process and exit")
+    args = parser.parse_args()
+
+    if args.drain:
+        done = run_worker(args.db, f"{os.getpid()}-drain", exit_when_idle=True)
+        print(f"Processed {done} documents")
+        return
+
+    pool = DocumentWorkerPool(args.db, workers=args.workers)
+    pool.start()
+    print(f"{pool.workers} workers running on {args.db}; Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pool.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Single-Pass Field Extraction for TaxAlly
+
+Compiles per-document-type field specs once and collects every labeled
+field in a single pass over the text, instead of running one
+`re.search` per pattern.
+
+Two kinds of fields:
+- Labeled fields ("Gross Salary ... 12,34,567"): one or more patterns in
+  priority order, each starting with a literal label. The first pattern
+  in priority order that matches anywhere wins, at its leftmost match
+  (same result as trying `re.search` for each pattern in turn).
+- Token fields (PAN, GSTIN, dates, ...): unlabeled patterns whose every
+  non-overlapping match is collected (same result as `re.findall`).
+
+All labels of a spec are combined into one scanner regex. Each label
+alternative starts with a case-sensitive literal so the regex engine can
+skip ahead on a first-character set; the rest of the label is matched
+case-insensitively. At each hit, the candidate field patterns are
+matched in place with `Pattern.match`. Once a field is found at its top
+priority its labels drop out of the scanner, and the scan stops as soon
+as every labeled field is resolved.
+
+Token fields keep one precompiled `findall` each: an unanchored token
+such as `[A-Z]{5}...` defeats the first-character skip, and folding it
+into the label scanner measured slower than scanning it on its own.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, Optional, Union
+
+
+@dataclass
+class FieldSpec:
+    """
+    Extraction rule for one field.
+
+    patterns: [(label or tuple of labels, regex), ...] in priority order.
+              Each regex must start with (one of) its label(s).
+    token:    Unlabeled regex; all matches are collected.
+    """
+    name: str
+    patterns: list[tuple[Union[str, tuple], str]] = field(default_factory=list)
+    token: Optional[str] = None
+    flags: int = re.IGNORECASE
+
+    def __post_init__(self):
+        if bool(self.patterns) == bool(self.token):
+            raise ValueError(f"Field {self.name}: give either patterns or token")
+
+
+class Extraction:
+    """Fields collected from one or more scans."""
+
+    def __init__(self):
+        # Labeled fields: name -> (priority, match)
+        self._best: dict[str, tuple[int, re.Match]] = {}
+        # Token fields: name -> findall-style values
+        self._values: dict[str, list] = {}
+
+    def match(self, name: str) -> Optional[re.Match]:
+        """Winning match for a labeled field."""
+        best = self._best.get(name)
+        return best[1] if best else None
+
+    def group(self, name: str, index: int = 1) -> Optional[str]:
+        """Captured group of the winning match for a labeled field."""
+        m = self.match(name)
+        return m.group(index) if m else None
+
+    def all(self, name: str) -> list:
+        """All values collected for a token field."""
+        return self._values.get(name, [])
+
+    def has(self, name: str) -> bool:
+        return name in self._best or bool(self._values.get(name))
+
+    def resolved(self, name: str, count: int = 1) -> bool:
+        """
+        Whether more text can no longer change a field's first value(s).
+
+        Labeled fields are resolved once found by their top-priority
+        pattern; token fields once `count` values have been collected.
+        """
+        best = self._best.get(name)
+        if best is not None:
+            return best[0] == 0
+        return len(self._values.get(name, ())) >= count
+
+
+class ExtractionEngine:
+    """
+    Compiled scanner over a set of FieldSpecs.
+
+    Usage:
+        engine = ExtractionEngine([FieldSpec(...), ...])
+        found = engine.extract(text)
+        found.group("gross_salary")
+    """
+
+    def __init__(self, specs: list[FieldSpec]):
+        self.specs = specs
+
+        # lower-cased first char -> [(label, spec name, priority, compiled regex)]
+        self._labels: dict[str, list[tuple[str, str, int, re.Pattern]]] = {}
+        # [(spec name, compiled regex)]
+        self._tokens: list[tuple[str, re.Pattern]] = []
+        # Scanner per set of still-useful labels
+        self._scanners: dict[frozenset, Optional[re.Pattern]] = {}
+
+        for spec in specs:
+            if spec.token:
+                self._tokens.append((spec.name, re.compile(spec.token, spec.flags)))
+                continue
+
+            for priority, (labels, regex) in enumerate(spec.patterns):
+                compiled = re.compile(regex, spec.flags)
+                if isinstance(labels, str):
+                    labels = (labels,)
+                for label in labels:
+                    lowered = label.lower()
+                    self._labels.setdefault(lowered[0], []).append(
+                        (lowered, spec.name, priority, compiled)
+                    )
+
+        self._max_label = max(
+            (len(entry[0]) for entries in self._labels.values() for entry in entries),
+            default=0
+        )
+
+    def _live_labels(self, best: dict) -> frozenset:
+        """Labels that could still improve some field's result."""
+        live = set()
+        for entries in self._labels.values():
+            for label, name, priority, _ in entries:
+                current = best.get(name)
+                if current is None or current[0] > priority:
+                    live.add(label)
+        return frozenset(live)
+
+    def _scanner_for(self, live: frozenset) -> Optional[re.Pattern]:
+        scanner = self._scanners.get(live, False)
+        if scanner is False:
+            alternatives = []
+            for label in sorted(live, key=len, reverse=True):
+                first, rest = label[0], re.escape(label[1:])
+                tail = f"(?i:{rest})" if rest else ""
+                for char in {first, first.upper()}:
+                    alternatives.append(re.escape(char) + tail)
+            scanner = re.compile("|".join(alternatives)) if alternatives else None
+            self._scanners[live] = scanner
+        return scanner
+
+    def extract(
+        self,
+        text: str,
+        result: Optional[Extraction] = None
+    ) -> Extraction:
+        """
+        Collect every field from `text`.
+
+        Pass an existing `result` to continue accumulating (e.g. page by
+        page); earlier text then takes precedence for labeled fields.
+        """
+        result = result or Extraction()
+        self._scan_labels(text, result)
+
+        for name, compiled in self._tokens:
+            found = compiled.findall(text)
+            if found:
+                result._values.setdefault(name, []).extend(found)
+
+        return result
+
+    def extract_pages(self, pages: Iterable[str]) -> Extraction:
+        """
+        Collect every field page by page, one page in memory at a time.
+
+        Matches are the same as extract() over the joined text, except
+        for a label and value split across a page break.
+        """
+        result = Extraction()
+        for text in pages:
+            self.extract(text, result)
+        return result
+
+    def _scan_labels(self, text: str, result: Extraction) -> None:
+        """Single pass over `text` for all labeled fields."""
+        best = result._best
+        labels = self._labels
+        max_label = self._max_label
+        live = self._live_labels(best)
+        scanner = self._scanner_for(live)
+
+        pos = 0
+        while scanner is not None:
+            hit = scanner.search(text, pos)
+            if hit is None:
+                break
+            start = hit.start()
+            head = text[start:start + max_label].lower()
+
+            improved = False
+            for label, name, priority, compiled in labels[head[0]]:
+                if label not in live or not head.startswith(label):
+                    continue
+                current = best.get(name)
+                if current is not None and current[0] <= priority:
+                    continue
+                m = compiled.match(text, start)
+                if m:
+                    best[name] = (priority, m)
+                    improved = True
+
+            if improved:
+                live = self._live_labels(best)
+                scanner = self._scanner_for(live)
+            pos = start + 1
+
+    def extract_multipass(self, text: str) -> Extraction:
+        """
+        Reference implementation: one `re.search`/`re.findall` per pattern.
+
+        Mirrors how the parsers scanned text before the single-pass
+        engine; used for benchmarking and equivalence checks.
+        """
+        result = Extraction()
+        for spec in self.specs:
+            if spec.token:
+                found = re.findall(spec.token, text, spec.flags)
+                if found:
+                    result._values[spec.name] = found
+                continue
+            for priority, (_, regex) in enumerate(spec.patterns):
+                m = re.search(regex, text, spec.flags)
+                if m:
+                    result._best[spec.name] = (priority, m)
+                    break
+        return result
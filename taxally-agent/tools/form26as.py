@@ -0,0 +1,268 @@
+"""
+Form 26AS Section Parser for TaxAlly
+
+Parses the TRACES Form 26AS text layout in one pass over its lines:
+- Part A  / A1 / A2: TDS (incl. 15G/15H, property / rent)
+- Part B: TCS
+- Part C: Tax paid other than TDS/TCS (advance / self-assessment tax)
+- Part D: Refunds paid
+
+Every deductor transaction row is kept with its TAN, deductor name,
+section, transaction date and amounts, and rows are aggregated per TAN
+for reconciliation.
+"""
+
+import re
+from dataclasses import dataclass, field, asdict
+from typing import Iterable, Optional, Union
+
+
+_AMOUNT = r'-?[\d,]+\.\d{2}'
+_DATE = r'\d{1,2}-[A-Za-z]{3}-\d{4}'
+
+_PART_RE = re.compile(r'^\s*PART\s*[-–]?\s*(A1|A2|A|B|C|D|E|F|G|H)\b', re.IGNORECASE)
+
+# "1  ACME PRIVATE LIMITED  MUMA12345B  12,00,000.00  1,20,000.00  1,20,000.00"
+_DEDUCTOR_RE = re.compile(
+    rf'^\s*\d+\s+(?P<name>.+?)\s+(?P<tan>[A-Z]{{4}}[0-9]{{5}}[A-Z])\s+'
+    rf'(?P<paid>{_AMOUNT})\s+(?P<deducted>{_AMOUNT})\s+(?P<deposited>{_AMOUNT})\s*$'
+)
+
+# "1  192  31-Mar-2024  F  15-May-2024  -  1,00,000.00  10,000.00  10,000.00"
+_TRANSACTION_RE = re.compile(
+    rf'^\s*\d+\s+(?P<section>\d{{3}}[A-Z0-9()]*)\s+(?P<date>{_DATE})\s+'
+    rf'(?P<status>[A-Z])\s+(?P<booking_date>{_DATE}|-)\s+(?:(?P<remarks>\S.*?)\s+)?'
+    rf'(?P<paid>{_AMOUNT})\s+(?P<deducted>{_AMOUNT})\s+(?P<deposited>{_AMOUNT})\s*$'
+)
+
+# "1  0021  100  25,000.00  0.00  0.00  0.00  25,000.00  0510308  15-Jun-2023  12345  -"
+_CHALLAN_RE = re.compile(
+    rf'^\s*\d+\s+(?P<major_head>\d{{4}})\s+(?P<minor_head>\d{{3}})\s+(?P<tax>{_AMOUNT})\s+'
+    rf'(?P<surcharge>{_AMOUNT})\s+(?P<cess>{_AMOUNT})\s+(?P<others>{_AMOUNT})\s+'
+    rf'(?P<total>{_AMOUNT})\s+(?P<bsr_code>\d{{7}})\s+(?P<date>{_DATE})\s+(?P<challan>\d+)'
+)
+
+# "1  2023-24  ECS  123456789  5,000.00  150.00  12-Dec-2023  -"
+_REFUND_RE = re.compile(
+    rf'^\s*\d+\s+(?P<assessment_year>20\d{{2}}-\d{{2}})\s+(?P<mode>\S+)\s+(?:(?P<reference>\S+)\s+)?'
+    rf'(?P<amount>{_AMOUNT})\s+(?P<interest>{_AMOUNT})\s+(?P<date>{_DATE})'
+)
+
+# Parts whose deductor/collector rows are TDS vs TCS
+TDS_PARTS = ("A", "A1", "A2")
+TCS_PARTS = ("B",)
+
+# Minor heads of Part C challans
+MINOR_HEADS = {
+    "100": "advance_tax",
+    "300": "self_assessment_tax",
+    "400": "regular_assessment_tax",
+}
+
+
+def _amount(value: str) -> float:
+    return float(value.replace(",", ""))
+
+
+def _deductor_key(part: str, tan: str) -> str:
+    # TDS parts aggregate per TAN; TCS collectors are kept apart
+    return tan if part in TDS_PARTS else f"{part}:{tan}"
+
+
+@dataclass
+class DeductorTotal:
+    """Per-TAN aggregate across transaction rows."""
+    tan: str
+    name: str
+    part: str
+    rows: int = 0
+    sections: list[str] = field(default_factory=list)
+    amount_paid: float = 0.0
+    tax_deducted: float = 0.0
+    tax_deposited: float = 0.0
+
+
+@dataclass
+class Form26ASData:
+    """Everything parsed from one Form 26AS."""
+    entries: list[dict] = field(default_factory=list)      # Part A/A1/A2/B rows
+    deductors: dict[str, DeductorTotal] = field(default_factory=dict)
+    challans: list[dict] = field(default_factory=list)     # Part C
+    refunds: list[dict] = field(default_factory=list)      # Part D
+    parts_found: list[str] = field(default_factory=list)
+
+    def totals(self) -> dict:
+        """TDS/TCS and tax paid totals."""
+        tds = [d for d in self.deductors.values() if d.part in TDS_PARTS]
+        tcs = [d for d in self.deductors.values() if d.part in TCS_PARTS]
+        paid = {kind: 0.0 for kind in MINOR_HEADS.values()}
+        for challan in self.challans:
+            kind = MINOR_HEADS.get(challan['minor_head'])
+            if kind:
+                paid[kind] += challan['total']
+        return {
+            'total_tds': round(sum(d.tax_deposited for d in tds), 2),
+            'total_tds_deducted': round(sum(d.tax_deducted for d in tds), 2),
+            'total_amount_paid': round(sum(d.amount_paid for d in tds), 2),
+            'total_tcs': round(sum(d.tax_deposited for d in tcs), 2),
+            **{kind: round(value, 2) for kind, value in paid.items()},
+            'total_refund': round(sum(r['amount'] for r in self.refunds), 2),
+        }
+
+    def deductor_list(self) -> list[dict]:
+        return [asdict(d) for d in self.deductors.values()]
+
+
+def parse_form26as(text: Union[str, Iterable[str]]) -> Form26ASData:
+    """
+    Parse Form 26AS text in a single pass over its lines.
+
+    `text` is the whole text or an iterable of page texts.
+
+    Transaction rows attach to the most recent deductor summary row in
+    the same part. Deductors listed without transaction rows keep their
+    summary amounts.
+    """
+    data = Form26ASData()
+    part: Optional[str] = None
+    deductor: Optional[DeductorTotal] = None
+    # TANs whose totals come from the summary row until transactions show up
+    summary_only: set[str] = set()
+
+    pages = [text] if isinstance(text, str) else text
+    for line in (line for page in pages for line in page.splitlines()):
+        heading = _PART_RE.match(line)
+        if heading:
+            part = heading.group(1).upper()
+            deductor = None
+            if part not in data.parts_found:
+                data.parts_found.append(part)
+            continue
+
+        if part in TDS_PARTS or part in TCS_PARTS:
+            m = _TRANSACTION_RE.match(line)
+            if m and deductor is not None:
+                _add_transaction(data, deductor, m, summary_only)
+                continue
+
+            m = _DEDUCTOR_RE.match(line)
+            if m:
+                deductor = _add_deductor(data, part, m, summary_only)
+
+        elif part == "C":
+            m = _CHALLAN_RE.match(line)
+            if m:
+                challan = m.groupdict()
+                for key in ('tax', 'surcharge', 'cess', 'others', 'total'):
+                    challan[key] = _amount(challan[key])
+                data.challans.append(challan)
+
+        elif part == "D":
+            m = _REFUND_RE.match(line)
+            if m:
+                refund = m.groupdict()
+                refund['amount'] = _amount(refund['amount'])
+                refund['interest'] = _amount(refund['interest'])
+                data.refunds.append(refund)
+
+    return data
+
+
+def _add_deductor(
+    data: Form26ASData,
+    part: str,
+    m: re.Match,
+    summary_only: set
+) -> DeductorTotal:
+    tan = m.group('tan')
+    key = _deductor_key(part, tan)
+    deductor = data.deductors.get(key)
+    if deductor is None:
+        deductor = DeductorTotal(tan=tan, name=m.group('name').strip(), part=part)
+        data.deductors[key] = deductor
+        # Summary amounts stand in until transaction rows are seen
+        deductor.amount_paid = _amount(m.group('paid'))
+        deductor.tax_deducted = _amount(m.group('deducted'))
+        deductor.tax_deposited = _amount(m.group('deposited'))
+        summary_only.add(key)
+    return deductor
+
+
+def _add_transaction(
+    data: Form26ASData,
+    deductor: DeductorTotal,
+    m: re.Match,
+    summary_only: set
+) -> None:
+    key = _deductor_key(deductor.part, deductor.tan)
+    if key in summary_only:
+        summary_only.discard(key)
+        deductor.amount_paid = deductor.tax_deducted = deductor.tax_deposited = 0.0
+
+    paid = _amount(m.group('paid'))
+    deducted = _amount(m.group('deducted'))
+    deposited = _amount(m.group('deposited'))
+    section = m.group('section')
+
+    deductor.rows += 1
+    deductor.amount_paid = round(deductor.amount_paid + paid, 2)
+    deductor.tax_deducted = round(deductor.tax_deducted + deducted, 2)
+    deductor.tax_deposited = round(deductor.tax_deposited + deposited, 2)
+    if section not in deductor.sections:
+        deductor.sections.append(section)
+
+    data.entries.append({
+        'part': deductor.part,
+        'tan': deductor.tan,
+        'deductor_name': deductor.name,
+        'section': section,
+        'transaction_date': m.group('date'),
+        'booking_status': m.group('status'),
+        'booking_date': None if m.group('booking_date') == '-' else m.group('booking_date'),
+        'amount_paid': paid,
+        'tax_deducted': deducted,
+        'tds_deposited': deposited,
+    })
+
+
+# Test
+if __name__ == "__main__":
+    sample = """
+Annual Tax Statement under Section 203AA
+PAN ABCPE1234F Assessment Year 2024-25
+PART A - Details of Tax Deducted at Source
+Sr. No. Name of Deductor TAN of Deductor Total Amount Paid / Credited Total Tax Deducted Total TDS Deposited
+1 ACME PRIVATE LIMITED MUMA12345B 2,00,000.00 20,000.00 20,000.00
+Sr. No. Section Transaction Date Status of Booking Date of Booking Remarks Amount Paid / Credited Tax Deducted TDS Deposited
+1 192 31-Jan-2024 F 15-Mar-2024 - 1,00,000.00 10,000.00 10,000.00
+2 192 29-Feb-2024 F 15-Mar-2024 - 1,00,000.00 10,000.00 10,000.00
+2 HDFC BANK LIMITED MUMH03189E 12,000.00 1,200.00 1,200.00
+Sr. No. Section Transaction Date Status of Booking Date of Booking Remarks Amount Paid / Credited Tax Deducted TDS Deposited
+1 194A 31-Mar-2024 F 30-Apr-2024 - 12,000.00 1,200.00 1,200.00
+PART B - Details of Tax Collected at Source
+1 MARUTI SUZUKI INDIA LTD DELM12345A 8,00,000.00 8,000.00 8,000.00
+PART C - Details of Tax Paid (other than TDS or TCS)
+1 0021 100 25,000.00 0.00 0.00 0.00 25,000.00 0510308 15-Jun-2023 12345 -
+1 0021 300 5,000.00 0.00 0.00 0.00 5,000.00 0510308 20-Jul-2024 23456 -
+PART D - Details of Paid Refund
+1 2023-24 ECS 5,000.00 150.00 12-Dec-2023 -
+"""
+    data = parse_form26as(sample)
+    print("Parts:", data.parts_found)
+    for entry in data.entries:
+        print(" ", entry)
+    for deductor in data.deductor_list():
+        print(" ", deductor)
+    print("Totals:", data.totals())
+
+    import time
+    rows = [sample.split("PART B")[0]]
+    for i in range(5000):
+        rows.append(f"{i + 3} DEDUCTOR {i} LTD MUMA{i % 100000:05d}B 20,000.00 2,000.00 2,000.00")
+        rows.append("1 194J 31-Mar-2024 F 30-Apr-2024 - 10,000.00 1,000.00 1,000.00")
+        rows.append("2 194J 30-Apr-2024 F 31-May-2024 - 10,000.00 1,000.00 1,000.00")
+    big = "\n".join(rows)
+    start = time.perf_counter()
+    data = parse_form26as(big)
+    print(f"\n{len(data.entries):,} rows / {len(data.deductors):,} TANs "
+          f"in {(time.perf_counter() - start) * 1000:.0f}ms")
@@ -0,0 +1,263 @@
+"""
+HSN/SAC Rate Index for TaxAlly
+
+Indexed lookup over the HSN (goods) / SAC (services) rate table in
+`tools/data/hsn_sac_rates.json`:
+- Code lookup via a digit trie (longest matching prefix wins, so an
+  8-digit invoice code resolves to its 4/6-digit heading)
+- Keyword search via an inverted index over descriptions and keywords
+- Batch lookup for invoice line arrays
+
+Lookups are memoized, so repeated descriptions in a purchase register
+are resolved once.
+"""
+
+import json
+import math
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional
+
+
+DEFAULT_DATA_PATH = Path(__file__).parent / "data" / "hsn_sac_rates.json"
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+_NON_DIGIT_RE = re.compile(r'\D')
+
+# Words that carry no signal for rate assignment
+_STOPWORDS = frozenset({
+    "and", "or", "of", "the", "for", "to", "in", "on", "by", "with",
+    "other", "others", "services", "service", "charges", "paid",
+    "not", "elsewhere", "specified",
+})
+
+
+@dataclass
+class HSNEntry:
+    """One row of the rate table."""
+    code: str
+    description: str
+    rate: float
+    supply: str  # goods or service
+    treatment: str = "taxable"  # taxable, exempt, non_gst
+    keywords: list[str] = field(default_factory=list)
+    note: Optional[str] = None
+
+    def to_suggestion(self, confidence: float) -> dict:
+        """Shape used by TransactionInterpreter GST suggestions."""
+        kind = self.treatment if self.treatment != "taxable" else self.supply
+        return {
+            "gst_rate": self.rate,
+            "type": kind,
+            "hsn_sac": self.code,
+            "hsn_description": self.description,
+            "note": self.note or f"{'SAC' if self.supply == 'service' else 'HSN'} {self.code}",
+            "confidence": round(confidence, 2)
+        }
+
+
+class _TrieNode:
+    __slots__ = ("children", "entry")
+
+    def __init__(self):
+        self.children: dict[str, "_TrieNode"] = {}
+        self.entry: Optional[HSNEntry] = None
+
+
+def _tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class HSNIndex:
+    """
+    In-memory HSN/SAC index.
+
+    Usage:
+        index = HSNIndex.load()
+        index.lookup_code("84713010")           # -> Computers and peripherals
+        index.search("AWS cloud hosting")       # -> [(entry, score), ...]
+        index.lookup_lines(invoice["lines"])    # -> one suggestion per line
+    """
+
+    def __init__(self, entries: Iterable[HSNEntry], cache_size: int = 65536):
+        self.entries: list[HSNEntry] = list(entries)
+        self._root = _TrieNode()
+        # token -> indices of entries mentioning it
+        self._postings: dict[str, list[int]] = {}
+        # Normalized keyword phrases per entry, for phrase bonuses
+        self._phrases: list[list[str]] = []
+
+        for i, entry in enumerate(self.entries):
+            self._insert_code(entry)
+
+            phrases = [" ".join(_tokenize(k)) for k in entry.keywords]
+            self._phrases.append([p for p in phrases if p])
+
+            tokens = set(_tokenize(entry.description))
+            for keyword in entry.keywords:
+                tokens.update(_tokenize(keyword))
+            for token in tokens:
+                self._postings.setdefault(token, []).append(i)
+
+        total = max(len(self.entries), 1)
+        self._idf = {
+            token: math.log(1 + total / len(ids))
+            for token, ids in self._postings.items()
+        }
+
+        self._cached_search = lru_cache(maxsize=cache_size)(self._search)
+        self._cached_code = lru_cache(maxsize=cache_size)(self._lookup_code)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "HSNIndex":
+        """Load the index from a JSON rate table."""
+        with open(path or DEFAULT_DATA_PATH, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(HSNEntry(**row) for row in data["entries"])
+
+    # ============ Code Lookup ============
+
+    def _insert_code(self, entry: HSNEntry) -> None:
+        node = self._root
+        for digit in entry.code:
+            node = node.children.setdefault(digit, _TrieNode())
+        node.entry = entry
+
+    def _lookup_code(self, code: str) -> Optional[HSNEntry]:
+        node = self._root
+        best = None
+        for digit in code:
+            node = node.children.get(digit)
+            if node is None:
+                break
+            if node.entry is not None:
+                best = node.entry
+        return best
+
+    def lookup_code(self, code: str) -> Optional[HSNEntry]:
+        """Most specific entry whose code is a prefix of `code`."""
+        digits = _NON_DIGIT_RE.sub("", code or "")
+        return self._cached_code(digits) if digits else None
+
+    def codes_with_prefix(self, prefix: str) -> list[HSNEntry]:
+        """All entries at or below a code prefix (e.g. "9983")."""
+        node = self._root
+        for digit in _NON_DIGIT_RE.sub("", prefix or ""):
+            node = node.children.get(digit)
+            if node is None:
+                return []
+
+        found = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current.entry is not None:
+                found.append(current.entry)
+            stack.extend(current.children.values())
+        return sorted(found, key=lambda e: e.code)
+
+    # ============ Keyword Search ============
+
+    def _search(self, normalized: str, limit: int) -> tuple[tuple[int, float], ...]:
+        tokens = normalized.split()
+        scores: dict[int, float] = {}
+        for token in set(tokens):
+            weight = self._idf.get(token)
+            if weight is None:
+                continue
+            for i in self._postings[token]:
+                scores[i] = scores.get(i, 0.0) + weight
+
+        padded = f" {normalized} "
+        for i in scores:
+            # Whole keyword phrases ("office rent") beat loose token hits
+            for phrase in self._phrases[i]:
+                if f" {phrase} " in padded:
+                    scores[i] += 2.0 * len(phrase.split())
+
+        ranked = sorted(
+            scores.items(),
+            key=lambda item: (-item[1], -len(self.entries[item[0]].code))
+        )
+        return tuple(ranked[:limit])
+
+    def search(self, text: str, limit: int = 5) -> list[tuple[HSNEntry, float]]:
+        """Rank entries for a free-text description."""
+        normalized = " ".join(_tokenize(text or ""))
+        if not normalized:
+            return []
+        return [(self.entries[i], score) for i, score in self._cached_search(normalized, limit)]
+
+    # ============ Suggestions ============
+
+    def suggest(self, description: str = "", code: Optional[str] = None) -> Optional[dict]:
+        """
+        Best rate suggestion for one line.
+
+        An explicit HSN/SAC code takes precedence over the description.
+        """
+        if code:
+            entry = self.lookup_code(code)
+            if entry is not None:
+                return entry.to_suggestion(0.95)
+
+        ranked = self.search(description, limit=2)
+        if not ranked:
+            return None
+
+        entry, score = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        # Clear winners get more confidence than near-ties
+        confidence = 0.5 + 0.4 * (1 - runner_up / score) if score else 0.5
+        return entry.to_suggestion(confidence)
+
+    def lookup_lines(self, lines: Iterable[dict]) -> list[Optional[dict]]:
+        """
+        Suggestions for a batch of invoice lines.
+
+        Each line may carry `hsn_code`, `hsn`, `sac` or `code`, and/or
+        `description`. Returns one suggestion (or None) per line.
+        """
+        results = []
+        for line in lines:
+            code = (line.get("hsn_code") or line.get("hsn")
+                    or line.get("sac") or line.get("code"))
+            results.append(self.suggest(line.get("description", ""), code and str(code)))
+        return results
+
+    def cache_info(self) -> dict:
+        """Memoization statistics."""
+        return {
+            "search": self._cached_search.cache_info()._asdict(),
+            "code": self._cached_code.cache_info()._asdict()
+        }
+
+
+@lru_cache(maxsize=1)
+def get_default_index() -> HSNIndex:
+    """Shared index over the bundled rate table, loaded on first use."""
+    return HSNIndex.load()
+
+
+# Test
+if __name__ == "__main__":
+    print("Testing HSN/SAC Index...")
+    index = get_default_index()
+    print(f"Loaded {len(index.entries)} entries")
+
+    for query in ["AWS cloud hosting", "Office rent for March", "Swiggy food order",
+                  "Dell laptop", "Diesel for generator", "CA fees for audit"]:
+        print(f"  {query!r}: {index.suggest(query)}")
+
+    print(f"  84713010: {index.lookup_code('84713010').description}")
+    print(f"  Prefix 9983: {[e.code for e in index.codes_with_prefix('9983')]}")
+
+    import time
+    lines = [{"description": q} for q in ["laptop", "office rent", "courier", "printer paper"]] * 50000
+    start = time.perf_counter()
+    index.lookup_lines(lines)
+    elapsed = time.perf_counter() - start
+    print(f"\n{len(lines):,} lines in {elapsed:.2f}s")
+    print(index.cache_info())
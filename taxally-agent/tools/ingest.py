@@ -0,0 +1,363 @@
+"""
+Bulk Document Ingestion for TaxAlly
+
+Ingests a directory or zip archive of PDFs for one entity:
+- Walks the tree (zip archives inside it are expanded too)
+- Hashes every file and skips duplicates, both within the run and
+  against documents already stored for the entity
+- Parses on a process pool with a bounded number of files in flight
+- Writes `documents` rows through SQLiteStore in batched transactions
+- Checks stored invoices against an InvoiceIndex for re-uploads with
+  different bytes (scan vs export of the same invoice)
+
+Because stored files are recognised by content hash, re-running an
+interrupted ingestion resumes where it stopped.
+
+Usage:
+    python -m tools.ingest ./uploads --entity-id ENTITY_ID [--db taxally.db]
+"""
+
+import argparse
+import hashlib
+import os
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import BinaryIO, Callable, Iterator, Optional
+
+from state.schema import ProcessingStatus
+
+from .parse_cache import HASH_CHUNK_SIZE
+from .pdf_parser import TaxDocumentParser
+
+
+DOCUMENT_EXTENSIONS = (".pdf",)
+
+
+@dataclass
+class DocumentSource:
+    """A file to ingest: a path on disk, or a member of a zip archive."""
+    name: str
+    path: str
+    member: Optional[str] = None
+
+    @contextmanager
+    def open(self) -> Iterator[BinaryIO]:
+        if self.member is None:
+            with open(self.path, "rb") as f:
+                yield f
+        else:
+            with zipfile.ZipFile(self.path) as archive, archive.open(self.member) as f:
+                yield f
+
+    def content_hash(self) -> str:
+        """SHA-256 of the file bytes, streamed."""
+        digest = hashlib.sha256()
+        with self.open() as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+
+@dataclass
+class IngestStats:
+    """Running totals for one ingestion."""
+    discovered: int = 0
+    parsed: int = 0
+    stored: int = 0
+    duplicates: int = 0      # Same bytes seen earlier in this run
+    already_stored: int = 0  # Stored by a previous run
+    near_duplicates: int = 0  # Invoices matching an indexed invoice
+    failed: int = 0
+    pages: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    failures: list[tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def docs_per_sec(self) -> float:
+        return self.parsed / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.discovered} files: {self.stored} stored, "
+            f"{self.duplicates} duplicates, {self.already_stored} already stored, "
+            f"{self.near_duplicates} duplicate invoices, "
+            f"{self.failed} failed | {self.pages} pages in {self.elapsed:.1f}s "
+            f"({self.docs_per_sec:.1f} docs/s)"
+        )
+
+
+def iter_sources(root: str) -> Iterator[DocumentSource]:
+    """Documents under a directory or inside a zip archive, in sorted order."""
+    if zipfile.is_zipfile(root):
+        yield from _iter_archive(root, os.path.basename(root))
+        return
+
+    if os.path.isfile(root):
+        yield DocumentSource(name=os.path.basename(root), path=root)
+        return
+
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            name = os.path.relpath(path, root)
+            lowered = filename.lower()
+            if lowered.endswith(".zip"):
+                yield from _iter_archive(path, name)
+            elif lowered.endswith(DOCUMENT_EXTENSIONS):
+                yield DocumentSource(name=name, path=path)
+
+
+def _iter_archive(path: str, name: str) -> Iterator[DocumentSource]:
+    with zipfile.ZipFile(path) as archive:
+        members = sorted(
+            info.filename for info in archive.infolist()
+            if not info.is_dir() and info.filename.lower().endswith(DOCUMENT_EXTENSIONS)
+        )
+    for member in members:
+        yield DocumentSource(name=f"{name}/{member}", path=path, member=member)
+
+
+# ============ Worker ============
+
+_worker_parser: Optional[TaxDocumentParser] = None
+
+
+def _init_worker():
+    global _worker_parser
+    # Files are already spread across processes; no nested page pools
+    _worker_parser = TaxDocumentParser(max_workers=1)
+
+
+def _parse_source(source: DocumentSource, streaming: bool) -> dict:
+    """Parse one document in a worker; returns fields or an error."""
+    try:
+        if source.member is None:
+            document = _worker_parser.parse_pdf(source.path, streaming)
+        else:
+            # Zip members are decompressed into memory and parsed in place
+            with source.open() as f:
+                document = _worker_parser.parse_bytes(f.read(), streaming)
+        document.close()  # Only fields and raw_text are returned
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+    # raw_text is left behind to keep results small, except for
+    # invoices, which the duplicate index needs it for
+    result = {
+        "document_type": document.document_type,
+        "confidence": document.confidence,
+        "extracted_fields": document.extracted_fields,
+        "pages": document.pages,
+    }
+    if document.document_type == "invoice":
+        result["raw_text"] = document.raw_text
+    return result
+
+
+# ============ Pipeline ============
+
+class DocumentIngestor:
+    """
+    Parse and store a batch of documents for one entity.
+
+    Usage:
+        ingestor = DocumentIngestor(SQLiteStore("taxally.db"), entity_id)
+        stats = ingestor.ingest("./uploads")
+        print(stats.summary())
+    """
+
+    def __init__(
+        self,
+        store,
+        entity_id: str,
+        max_workers: Optional[int] = None,
+        batch_size: int = 100,
+        max_in_flight: Optional[int] = None,
+        streaming: bool = False,
+        progress: Optional[Callable[[IngestStats], None]] = None,
+        invoice_index=None
+    ):
+        """
+        Args:
+            store: SQLiteStore to write documents to
+            entity_id: Entity the documents belong to
+            max_workers: Parser processes (default: CPU count)
+            batch_size: Files hashed, and rows written, per batch
+            max_in_flight: Files submitted but not yet collected
+                (default: 2 per worker); bounds memory
+            streaming: Use the streaming parse mode
+            progress: Called with the running stats after every write
+            invoice_index: InvoiceIndex that stored invoices are checked
+                against and added to
+        """
+        self.store = store
+        self.entity_id = entity_id
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight or self.max_workers * 2
+        self.streaming = streaming
+        self.progress = progress
+        self.invoice_index = invoice_index
+
+    def ingest(self, root: str) -> IngestStats:
+        """Ingest every document under `root` (directory, zip or single file)."""
+        stats = IngestStats()
+        seen: set[str] = set()
+        rows: list[dict] = []
+        in_flight: dict[Future, tuple[DocumentSource, str]] = {}
+
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker) as pool:
+            for batch in self._batches(iter_sources(root)):
+                for source, content_hash in self._new_sources(batch, seen, stats):
+                    while len(in_flight) >= self.max_in_flight:
+                        self._collect(in_flight, rows, stats)
+                    future = pool.submit(_parse_source, source, self.streaming)
+                    in_flight[future] = (source, content_hash)
+
+            while in_flight:
+                self._collect(in_flight, rows, stats)
+
+        self._flush(rows, stats)
+        return stats
+
+    def _batches(self, sources: Iterator[DocumentSource]) -> Iterator[list[DocumentSource]]:
+        batch = []
+        for source in sources:
+            batch.append(source)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _new_sources(
+        self,
+        batch: list[DocumentSource],
+        seen: set[str],
+        stats: IngestStats
+    ) -> list[tuple[DocumentSource, str]]:
+        """Hash a batch and drop files already seen or already stored."""
+        stats.discovered += len(batch)
+        hashed = []
+        for source in batch:
+            try:
+                hashed.append((source, source.content_hash()))
+            except (OSError, zipfile.BadZipFile) as e:
+                stats.failed += 1
+                stats.failures.append((source.name, f"{type(e).__name__}: {e}"))
+
+        stored = self.store.stored_hashes(self.entity_id, [h for _, h in hashed])
+        fresh = []
+        for source, content_hash in hashed:
+            if content_hash in stored:
+                stats.already_stored += 1
+            elif content_hash in seen:
+                stats.duplicates += 1
+            else:
+                seen.add(content_hash)
+                fresh.append((source, content_hash))
+        return fresh
+
+    def _collect(
+        self,
+        in_flight: dict[Future, tuple[DocumentSource, str]],
+        rows: list[dict],
+        stats: IngestStats
+    ) -> None:
+        """Gather finished parses and write a batch once enough are ready."""
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            source, content_hash = in_flight.pop(future)
+            result = future.result()
+
+            if "error" in result:
+                stats.failed += 1
+                stats.failures.append((source.name, result["error"]))
+                continue
+
+            stats.parsed += 1
+            stats.pages += result["pages"]
+            fields = result["extracted_fields"]
+            rows.append({
+                "entity_id": self.entity_id,
+                "document_type": result["document_type"],
+                "filename": source.name,
+                "financial_year": fields.get("assessment_year"),
+                "extracted_data": fields,
+                "processing_status": (
+                    ProcessingStatus.PROCESSED if result["confidence"] > 0.5
+                    else ProcessingStatus.REVIEW_NEEDED
+                ).value,
+                "source": "bulk_ingest",
+                "content_hash": content_hash,
+                "raw_text": result.get("raw_text"),
+            })
+
+        if len(rows) >= self.batch_size:
+            self._flush(rows, stats)
+
+    def _flush(self, rows: list[dict], stats: IngestStats) -> None:
+        if rows:
+            document_ids = self.store.store_documents(rows)
+            stats.stored += len(rows)
+            if self.invoice_index is not None:
+                self._index_invoices(rows, document_ids, stats)
+            rows.clear()
+        if self.progress:
+            self.progress(stats)
+
+    def _index_invoices(self, rows: list[dict], document_ids: list[str], stats: IngestStats) -> None:
+        for row, document_id in zip(rows, document_ids):
+            if row["document_type"] != "invoice":
+                continue
+            matches = self.invoice_index.add(
+                self.entity_id, document_id, row["extracted_data"], row["raw_text"] or ""
+            )
+            if matches:
+                stats.near_duplicates += 1
+
+
+def main():
+    from state.invoice_index import InvoiceIndex
+    from state.sqlite_store import SQLiteStore
+
+    parser = argparse.ArgumentParser(description="Bulk-ingest tax documents")
+    parser.add_argument("path", help="Directory, zip archive or PDF")
+    parser.add_argument("--entity-id", required=True)
+    parser.add_argument("--db", default="taxally.db")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--streaming", action="store_true",
+                        help="Stop reading pages once required fields are found")
+    parser.add_argument("--no-invoice-index", action="store_true",
+                        help="Skip near-duplicate invoice detection")
+    args = parser.parse_args()
+
+    def report(stats: IngestStats) -> None:
+        print(f"\r{stats.summary()}", end="", flush=True)
+
+    ingestor = DocumentIngestor(
+        SQLiteStore(args.db),
+        args.entity_id,
+        max_workers=args.workers,
+        batch_size=args.batch_size,
+        streaming=args.streaming,
+        progress=report,
+        invoice_index=None if args.no_invoice_index else InvoiceIndex(args.db)
+    )
+    stats = ingestor.ingest(args.path)
+    print()
+    for name, error in stats.failures:
+        print(f"  Failed: {name}: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,8 @@ Tools implemented:
 from typing import Any, Optional
 from datetime import datetime, timedelta
 from .base import BaseTool, ToolExecutionError
+from . import validators
+from .hsn_index import get_default_index
 import sys
 sys.path.append('..')
 from agent.core import AgentContext
@@ -81,14 +83,9 @@ class ProfileCollector(BaseTool):
             return {"status": "profile_needed", "missing_fields": ["pan", "entity_type", "income_sources"]}
 
         elif action == "validate":
-            errors = []
-            if "pan" in data:
-                if not self._validate_pan(data["pan"]):
-                    errors.append("Invalid PAN format. Expected: ABCDE1234F")
-            if "gstin" in data:
-                if not self._validate_gstin(data["gstin"]):
-                    errors.append("Invalid GSTIN format")
-            return {"valid": len(errors) == 0, "errors": errors}
+            result = validators.validate_record(data)
+            errors = [validators.ERROR_MESSAGES[code] for code in result.errors]
+            return {"valid": result.valid, "errors": errors, "error_codes": result.errors}
 
         elif action == "update":
             # Would update state store in production
@@ -97,14 +94,12 @@ class ProfileCollector(BaseTool):
         raise ToolExecutionError(f"Unknown action: {action}")
 
     def _validate_pan(self, pan: str) -> bool:
-        """Validate Indian PAN format: ABCDE1234F"""
-        pattern = r'^[A-Z]{5}[0-9]{4}[A-Z]{1}$'
-        return bool(re.match(pattern, pan.upper()))
+        """Validate Indian PAN format and holder type, e.g. ABCPE1234F"""
+        return validators.is_valid_pan(pan)
 
     def _validate_gstin(self, gstin: str) -> bool:
-        """Validate Indian GSTIN format."""
-        pattern = r'^[0-9]{2}[A-Z]{5}[0-9]{4}[A-Z]{1}[1-9A-Z]{1}Z[0-9A-Z]{1}$'
-        return bool(re.match(pattern, gstin.upper()))
+        """Validate Indian GSTIN format, state code and check digit."""
+        return validators.is_valid_gstin(gstin)
 
 
 class TransactionInterpreter(BaseTool):
@@ -135,13 +130,18 @@ class TransactionInterpreter(BaseTool):
                             "date": {"type": "string"},
                             "description": {"type": "string"},
                             "amount": {"type": "number"},
-                            "type": {"type": "string", "enum": ["credit", "debit"]}
+                            "type": {"type": "string", "enum": ["credit", "debit"]},
+                            "hsn_code": {"type": "string"}
                         }
                     }
                 },
                 "description": {
                     "type": "string",
                     "description": "Single transaction description to categorize"
+                },
+                "hsn_code": {
+                    "type": "string",
+                    "description": "HSN/SAC code, if known, for GST rate suggestions"
                 }
             },
             "required": ["action"]
@@ -178,7 +178,11 @@ class TransactionInterpreter(BaseTool):
             return self._analyze_patterns(params.get("transactions", []))
 
         elif action == "suggest_gst":
-            return self._suggest_gst_treatment(params.get("description", ""))
+            if "transactions" in params and "description" not in params:
+                return self._suggest_gst_batch(params["transactions"])
+            return self._suggest_gst_treatment(
+                params.get("description", ""), params.get("hsn_code")
+            )
 
         raise ToolExecutionError(f"Unknown action: {action}")
 
@@ -193,6 +197,10 @@ class TransactionInterpreter(BaseTool):
                 }
         return {"category": "uncategorized", "confidence": 0.0, "tax_relevant": True}
 
+    def categorize(self, transactions: list) -> list:
+        """Categorize a batch of transactions (e.g. one statement page)."""
+        return self._categorize_batch(transactions)
+
     def _categorize_batch(self, transactions: list) -> list:
         return [
             {**txn, **self._categorize_single(txn.get("description", ""))}
@@ -210,18 +218,24 @@ class TransactionInterpreter(BaseTool):
             summary[cat]["total"] += txn.get("amount", 0)
         return {"summary": summary, "total_transactions": len(transactions)}
 
-    def _suggest_gst_treatment(self, description: str) -> dict:
+    def _suggest_gst_treatment(self, description: str, hsn_code: Optional[str] = None) -> dict:
         desc_lower = description.lower()
 
-        # Simplified GST suggestions
         if any(x in desc_lower for x in ["export", "foreign"]):
             return {"gst_rate": 0, "type": "zero_rated", "note": "Exports are zero-rated"}
-        elif any(x in desc_lower for x in ["software", "consulting", "professional"]):
-            return {"gst_rate": 18, "type": "service", "note": "Standard service rate"}
-        elif any(x in desc_lower for x in ["food", "restaurant"]):
-            return {"gst_rate": 5, "type": "service", "note": "Restaurant services"}
-        else:
-            return {"gst_rate": 18, "type": "standard", "note": "Default rate, verify for specific item"}
+
+        # HSN/SAC rate table lookup (code first, then description keywords)
+        suggestion = get_default_index().suggest(description, hsn_code)
+        if suggestion:
+            return suggestion
+
+        return {"gst_rate": 18, "type": "standard", "note": "Default rate, verify for specific item"}
+
+    def _suggest_gst_batch(self, transactions: list) -> list:
+        return [
+            {**txn, **self._suggest_gst_treatment(txn.get("description", ""), txn.get("hsn_code"))}
+            for txn in transactions
+        ]
 
 
 class ComplianceRuleEngine(BaseTool):
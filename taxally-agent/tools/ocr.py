@@ -0,0 +1,258 @@
+"""
+OCR Fallback for Scanned Tax Documents
+
+Pages without a usable text layer (scanned Form 16s, photographed
+statements) are rasterized and run through Tesseract:
+- Rasterized with pdfium at a configurable DPI (pdfplumber as fallback)
+- OCR'd on a process pool in page shards: each worker receives the PDF
+  once and renders its whole shard from one open document
+- Cached per page: the key is a hash of the rendered pixels plus
+  DPI/language, so the same scan inside a different PDF is a hit
+"""
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+
+from .parse_cache import ParseCache
+from .pdf_source import PdfSource, open_source, pdfium_input
+
+try:
+    from PIL import Image
+    import pytesseract
+    OCR_AVAILABLE = True
+except ImportError:
+    OCR_AVAILABLE = False
+
+try:
+    import pypdfium2
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None
+
+
+DEFAULT_DPI = 300
+DEFAULT_LANG = "eng"
+
+# A page with fewer non-space characters than this is scanned if images
+# cover at least MIN_IMAGE_COVERAGE of it; short text pages without images
+# (signature pages, "Page 3 of 3") are read as they are
+MIN_TEXT_CHARS = 20
+MIN_IMAGE_COVERAGE = 0.25
+
+OCR_CACHE_VERSION = "tesseract-1"
+
+# Shards per worker; a second shard evens out workers that drew slow pages
+OCR_SHARDS_PER_WORKER = 2
+
+
+def needs_ocr(text: Optional[str], image_coverage: Optional[float] = None) -> bool:
+    """
+    Whether a page's text layer is missing or too thin to parse.
+
+    Args:
+        text: The page's text layer
+        image_coverage: Fraction of the page covered by images (see
+            image_coverage()); None judges by the text alone
+    """
+    if text and sum(1 for c in text if not c.isspace()) >= MIN_TEXT_CHARS:
+        return False
+    return image_coverage is None or image_coverage >= MIN_IMAGE_COVERAGE
+
+
+def image_coverage(source: PdfSource, indices: list[int]) -> dict[int, float]:
+    """
+    Fraction of each page's area covered by embedded images.
+
+    Returns:
+        {page index: 0.0-1.0}; empty if pdfplumber is not installed
+    """
+    if pdfplumber is None or not indices:
+        return {}
+    coverage = {}
+    with pdfplumber.open(open_source(source), pages=[i + 1 for i in indices]) as pdf:
+        for index, page in zip(indices, pdf.pages):
+            area = 0.0
+            for image in page.images:
+                width = min(image["x1"], page.width) - max(image["x0"], 0)
+                height = min(image["bottom"], page.height) - max(image["top"], 0)
+                area += max(width, 0) * max(height, 0)
+            coverage[index] = min(area / (page.width * page.height), 1.0)
+            page.close()
+    return coverage
+
+
+def render_pages(
+    source: PdfSource,
+    indices: list[int],
+    dpi: int = DEFAULT_DPI
+) -> Iterator[tuple[int, "Image.Image"]]:
+    """Rasterize pages (ascending indices) to grayscale images, opening the PDF once."""
+    if PDFIUM_AVAILABLE:
+        pdf = pypdfium2.PdfDocument(pdfium_input(source))
+        try:
+            for index in indices:
+                page = pdf[index]
+                image = page.render(scale=dpi / 72, grayscale=True).to_pil()
+                page.close()
+                yield index, image
+        finally:
+            pdf.close()
+        return
+
+    with pdfplumber.open(open_source(source), pages=[i + 1 for i in indices]) as pdf:
+        for index, page in zip(indices, pdf.pages):
+            image = page.to_image(resolution=dpi).original.convert("L")
+            page.close()
+            yield index, image
+
+
+def render_page(source: PdfSource, index: int, dpi: int = DEFAULT_DPI) -> "Image.Image":
+    """Rasterize one page (of a path or in-memory PDF) to a grayscale image."""
+    [(_, image)] = render_pages(source, [index], dpi)
+    return image
+
+
+# Per-process cache handles, so pool workers open each cache once
+_caches: dict[str, ParseCache] = {}
+
+
+def _get_cache(cache_path: str) -> ParseCache:
+    cache = _caches.get(cache_path)
+    if cache is None:
+        cache = ParseCache(cache_path, parser_version=OCR_CACHE_VERSION, table="ocr_cache")
+        _caches[cache_path] = cache
+    return cache
+
+
+def _page_key(image: "Image.Image", dpi: int, lang: str) -> str:
+    digest = hashlib.sha256(image.tobytes())
+    digest.update(f"{image.size}:{dpi}:{lang}".encode())
+    return digest.hexdigest()
+
+
+def ocr_page(
+    source: PdfSource,
+    index: int,
+    dpi: int = DEFAULT_DPI,
+    lang: str = DEFAULT_LANG,
+    cache_path: Optional[str] = None
+) -> tuple[int, str, bool]:
+    """
+    OCR one page.
+
+    Returns:
+        (page index, text, served from cache)
+    """
+    return _ocr_image(render_page(source, index, dpi), index, dpi, lang, cache_path)
+
+
+def _ocr_image(
+    image: "Image.Image",
+    index: int,
+    dpi: int,
+    lang: str,
+    cache_path: Optional[str]
+) -> tuple[int, str, bool]:
+    cache = _get_cache(cache_path) if cache_path else None
+    key = _page_key(image, dpi, lang)
+
+    if cache is not None:
+        cached = cache.get(key, variant="ocr")
+        if cached is not None:
+            return index, cached["text"], True
+
+    text = pytesseract.image_to_string(image, lang=lang)
+    if cache is not None:
+        cache.put(key, {"text": text}, variant="ocr")
+    return index, text, False
+
+
+# The PDF being OCR'd in this worker process, set once by the pool initializer
+_worker_source: Optional[PdfSource] = None
+
+
+def _init_ocr_worker(source: PdfSource) -> None:
+    global _worker_source
+    _worker_source = source
+
+
+def _ocr_shard(
+    indices: list[int],
+    dpi: int,
+    lang: str,
+    cache_path: Optional[str]
+) -> list[tuple[int, str, bool]]:
+    """OCR a shard of pages of the worker's PDF; runs in a pool worker."""
+    return [
+        _ocr_image(image, index, dpi, lang, cache_path)
+        for index, image in render_pages(_worker_source, indices, dpi)
+    ]
+
+
+def ocr_pages(
+    source: PdfSource,
+    indices: list[int],
+    dpi: int = DEFAULT_DPI,
+    lang: str = DEFAULT_LANG,
+    max_workers: Optional[int] = None,
+    cache_path: Optional[str] = None
+) -> dict[int, str]:
+    """
+    OCR several pages of a PDF, in parallel when there is more than one.
+
+    The pages are split into contiguous shards. Each worker receives an
+    in-memory PDF once, through the pool initializer (the memoryview
+    itself cannot be sent to another process), and renders every page
+    of a shard from one open document.
+
+    Returns:
+        {page index: text}
+    """
+    if not OCR_AVAILABLE:
+        raise ImportError("OCR not available. Install: pip install pytesseract pillow")
+    if not indices:
+        return {}
+
+    indices = sorted(indices)
+    workers = min(max_workers or os.cpu_count() or 1, len(indices))
+    if workers < 2:
+        results = [
+            _ocr_image(image, index, dpi, lang, cache_path)
+            for index, image in render_pages(source, indices, dpi)
+        ]
+    else:
+        if isinstance(source, memoryview):
+            source = source.tobytes()
+        size = -(-len(indices) // (workers * OCR_SHARDS_PER_WORKER))
+        shards = [indices[i:i + size] for i in range(0, len(indices), size)]
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_ocr_worker, initargs=(source,)
+        ) as pool:
+            results = [
+                result
+                for shard in pool.map(
+                    _ocr_shard, shards,
+                    [dpi] * len(shards), [lang] * len(shards), [cache_path] * len(shards)
+                )
+                for result in shard
+            ]
+
+    return {index: text for index, text, _ in results}
+
+
+# Test
+if __name__ == "__main__":
+    print("Testing OCR fallback...")
+    print(f"  OCR available: {OCR_AVAILABLE} (pdfium: {PDFIUM_AVAILABLE})")
+    for sample in ["", "   \n ", "Page 1", "FORM NO. 16 Certificate under section 203"]:
+        print(f"  needs_ocr({sample!r}) = {needs_ocr(sample)}")
+    for coverage in (0.0, 0.9):
+        print(f"  needs_ocr('Page 3 of 3', image_coverage={coverage}) = "
+              f"{needs_ocr('Page 3 of 3', coverage)}")
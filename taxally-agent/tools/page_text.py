@@ -0,0 +1,118 @@
+"""
+Page Text Buffer for TaxAlly
+
+Holds the extracted text of one document page by page:
+- UTF-8 bytes in a SpooledTemporaryFile, which moves to disk once it
+  grows past `spool_bytes`
+- Page offsets, so any page can be read back on its own
+- Parsers iterate pages instead of scanning one joined string, and
+  results keep a reference to the buffer instead of a copy of the text
+"""
+
+import tempfile
+from typing import Iterable, Iterator
+
+
+SPOOL_MAX_BYTES = 4 * 1024 * 1024
+
+
+class PageTextBuffer:
+    """
+    Append-only page texts with random access by page index.
+
+    Usage:
+        buffer = PageTextBuffer(page.extract_text() for page in pdf.pages)
+        for text in buffer:          # one page in memory at a time
+            ...
+        preview = buffer.head(5000)
+    """
+
+    def __init__(self, pages: Iterable[str] = (), spool_bytes: int = SPOOL_MAX_BYTES):
+        """
+        Args:
+            pages: Initial page texts
+            spool_bytes: Size kept in memory before spilling to disk
+        """
+        self.spool_bytes = spool_bytes
+        self._file = tempfile.SpooledTemporaryFile(max_size=spool_bytes)
+        self._spans: list[tuple[int, int]] = []  # (offset, length) per page
+        self._end = 0
+        self.extend(pages)
+
+    def append(self, text: str) -> None:
+        self._spans.append(self._write(text))
+
+    def extend(self, pages: Iterable[str]) -> None:
+        for text in pages:
+            self.append(text)
+
+    def _write(self, text: str) -> tuple[int, int]:
+        data = text.encode("utf-8")
+        self._file.seek(self._end)
+        self._file.write(data)
+        span = (self._end, len(data))
+        self._end += len(data)
+        return span
+
+    def __setitem__(self, index: int, text: str) -> None:
+        # The new text is appended; the old bytes are simply unreferenced
+        self._spans[index] = self._write(text)
+
+    def __getitem__(self, index: int) -> str:
+        offset, length = self._spans[index]
+        self._file.seek(offset)
+        return self._file.read(length).decode("utf-8")
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self._spans)):
+            yield self[index]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes written, including replaced pages."""
+        return self._end
+
+    @property
+    def spilled(self) -> bool:
+        """Whether the text has moved to a file on disk."""
+        return self._end > self.spool_bytes
+
+    def head(self, chars: int) -> str:
+        """The first `chars` characters of text(), reading only the pages needed."""
+        parts, size = [], 0
+        for text in self:
+            parts.append(f"{text}\n")
+            size += len(text) + 1
+            if size >= chars:
+                break
+        return "".join(parts)[:chars]
+
+    def text(self) -> str:
+        """Every page joined, each followed by a newline."""
+        return "".join(f"{text}\n" for text in self)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "PageTextBuffer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# Test
+if __name__ == "__main__":
+    print("Testing Page Text Buffer...")
+    buffer = PageTextBuffer(["FORM NO. 16", "Gross Salary 12,00,000", ""], spool_bytes=1024)
+    buffer[2] = "Page three (OCR)"
+    print(f"  Pages: {list(buffer)}")
+    print(f"  Head: {buffer.head(15)!r}")
+
+    buffer.extend(f"Row {i} ₹ 1,000.00" for i in range(200))
+    print(f"  {len(buffer)} pages, {buffer.nbytes:,} bytes, spilled: {buffer.spilled}")
+    print(f"  Page 150: {buffer[150]!r}")
+    buffer.close()
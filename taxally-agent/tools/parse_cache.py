@@ -0,0 +1,346 @@
+"""
+Content-Addressed Parse Cache for TaxAlly
+
+Caches parser output keyed by the SHA-256 of the uploaded file bytes and
+the parser version, so re-uploads of the same Form 16 or statement skip
+PDF parsing entirely.
+
+- Entries live in a SQLite table (`parse_cache`)
+- Total size is bounded; least recently used entries are evicted first.
+  Sizes and LRU times live in a small side table, with a running total,
+  so neither sizing nor eviction reads cached results; hits update LRU
+  times in batches
+- Entries are keyed by parser version too, so old and new workers can
+  share a cache during a rolling deploy; another version's entries are
+  never returned, age out through the LRU, or are dropped explicitly
+  with prune_versions()
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from state.connection import ConnectionManager
+
+
+HASH_CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+TOUCH_BATCH_SIZE = 64        # Hits buffered before their LRU times are written
+TOUCH_FLUSH_INTERVAL = 5.0   # ...or seconds since the last write
+EVICT_BATCH_SIZE = 64        # LRU victims fetched per query
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_bytes(data: bytes) -> str:
+    """SHA-256 hex digest of in-memory content."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ParseCache:
+    """
+    SQLite-backed LRU cache of parse results.
+
+    Usage:
+        cache = ParseCache("taxally.db", parser_version=PARSER_VERSION)  # from pdf_parser
+        parser = TaxDocumentParser(cache=cache)
+        parser.parse_pdf("form16.pdf")   # parsed and cached
+        parser.parse_pdf("form16.pdf")   # served from cache
+    """
+
+    def __init__(
+        self,
+        db_path: str = "taxally.db",
+        parser_version: str = "1",
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        table: str = "parse_cache"
+    ):
+        """
+        Args:
+            db_path: SQLite database file
+            parser_version: Only entries written by this version are returned
+            max_bytes: Size budget before LRU eviction
+            table: Separate tables keep different caches (e.g. parse
+                results and OCR text) apart
+        """
+        self.db_path = db_path
+        self.parser_version = parser_version
+        self.max_bytes = max_bytes
+        self.table = table
+        self.hits = 0
+        self.misses = 0
+        self.db = ConnectionManager(db_path)
+        self._touch_lock = threading.Lock()
+        self._touches: dict[tuple[str, str], tuple[float, int]] = {}  # Unwritten hits, this version
+        self._touched_at = time.time()
+        self._init_db()
+
+    def _init_db(self):
+        """Create the cache tables."""
+        lru, usage = f"{self.table}_lru", f"{self.table}_usage"
+        with self.db.transaction(immediate=True) as cursor:
+            # Caches created before the LRU side table kept size/last_used in
+            # the results table, and older ones keyed entries without the
+            # parser version; being a cache, it is simply rebuilt
+            cursor.execute(f"PRAGMA table_info({self.table})")
+            columns = {row['name']: row['pk'] for row in cursor.fetchall()}
+            if "last_used" in columns or columns.get("parser_version") == 0:
+                cursor.execute(f"DROP TABLE {self.table}")
+                cursor.execute(f"DROP TABLE IF EXISTS {lru}")
+
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    content_hash TEXT NOT NULL,
+                    variant TEXT NOT NULL DEFAULT '',
+                    parser_version TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (content_hash, variant, parser_version)
+                )
+            """)
+            # Bookkeeping lives apart from the (large) results, so sizing and
+            # eviction never read result pages
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {lru} (
+                    content_hash TEXT NOT NULL,
+                    variant TEXT NOT NULL,
+                    parser_version TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    hits INTEGER DEFAULT 0,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (content_hash, variant, parser_version)
+                ) WITHOUT ROWID
+            """)
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{lru}_last_used ON {lru}(last_used)"
+            )
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {usage} (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    bytes INTEGER NOT NULL
+                )
+            """)
+
+            # Recount once per open; put/evict/invalidate keep it current after that
+            cursor.execute(f"""
+                INSERT OR REPLACE INTO {usage} (id, bytes)
+                SELECT 0, COALESCE(SUM(size), 0) FROM {lru}
+            """)
+
+    def get(self, content_hash: str, variant: str = "") -> Optional[dict]:
+        """
+        Cached result for a content hash, or None.
+
+        Args:
+            content_hash: SHA-256 of the file bytes
+            variant: Distinguishes parse modes over the same bytes
+        """
+        with self.db.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT result FROM {self.table}
+                WHERE content_hash = ? AND variant = ? AND parser_version = ?
+            """, (content_hash, variant, self.parser_version))
+            row = cursor.fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._touch(content_hash, variant)
+        return json.loads(row['result'])
+
+    def _touch(self, content_hash: str, variant: str) -> None:
+        """Record a hit; LRU times are written in batches, not per hit."""
+        now = time.time()
+        with self._touch_lock:
+            _, hits = self._touches.get((content_hash, variant), (now, 0))
+            self._touches[(content_hash, variant)] = (now, hits + 1)
+            due = (
+                len(self._touches) >= TOUCH_BATCH_SIZE
+                or now - self._touched_at >= TOUCH_FLUSH_INTERVAL
+            )
+        if due:
+            with self.db.transaction() as cursor:
+                self._write_touches(cursor)
+
+    def _write_touches(self, cursor: sqlite3.Cursor) -> None:
+        with self._touch_lock:
+            touches, self._touches = self._touches, {}
+            self._touched_at = time.time()
+        cursor.executemany(f"""
+            UPDATE {self.table}_lru SET last_used = MAX(last_used, ?), hits = hits + ?
+            WHERE content_hash = ? AND variant = ? AND parser_version = ?
+        """, [(ts, hits, *key, self.parser_version) for key, (ts, hits) in touches.items()])
+
+    def put(self, content_hash: str, result: dict, variant: str = "") -> None:
+        """Store a result and evict least recently used entries over budget."""
+        payload = json.dumps(result, default=str)
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        lru = f"{self.table}_lru"
+        with self.db.transaction(immediate=True) as cursor:
+            cursor.execute(
+                f"SELECT size FROM {lru} "
+                "WHERE content_hash = ? AND variant = ? AND parser_version = ?",
+                (content_hash, variant, self.parser_version)
+            )
+            previous = cursor.fetchone()
+            cursor.execute(f"""
+                INSERT OR REPLACE INTO {self.table} (content_hash, variant, parser_version, result)
+                VALUES (?, ?, ?, ?)
+            """, (content_hash, variant, self.parser_version, payload))
+            cursor.execute(f"""
+                INSERT OR REPLACE INTO {lru} (content_hash, variant, parser_version, size, last_used)
+                VALUES (?, ?, ?, ?, ?)
+            """, (content_hash, variant, self.parser_version, size, time.time()))
+            total = self._add_bytes(cursor, size - (previous[0] if previous else 0))
+            if total > self.max_bytes:
+                self._write_touches(cursor)  # Evict by current recency
+                self._evict(cursor, total - self.max_bytes)
+
+    def _add_bytes(self, cursor: sqlite3.Cursor, delta: int) -> int:
+        """Adjust the running total; returns the new total."""
+        cursor.execute(
+            f"UPDATE {self.table}_usage SET bytes = bytes + ? WHERE id = 0", (delta,)
+        )
+        cursor.execute(f"SELECT bytes FROM {self.table}_usage WHERE id = 0")
+        return cursor.fetchone()[0]
+
+    def _evict(self, cursor: sqlite3.Cursor, excess: int) -> int:
+        """Drop least recently used entries until `excess` bytes are freed."""
+        lru = f"{self.table}_lru"
+        victims = []
+        freed = 0
+        while freed < excess:
+            cursor.execute(f"""
+                SELECT content_hash, variant, parser_version, size FROM {lru}
+                ORDER BY last_used LIMIT ? OFFSET ?
+            """, (EVICT_BATCH_SIZE, len(victims)))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            for row in rows:
+                if freed >= excess:
+                    break
+                victims.append((row['content_hash'], row['variant'], row['parser_version']))
+                freed += row['size']
+
+        for table in (self.table, lru):
+            cursor.executemany(
+                f"DELETE FROM {table} "
+                "WHERE content_hash = ? AND variant = ? AND parser_version = ?",
+                victims
+            )
+        self._add_bytes(cursor, -freed)
+        return len(victims)
+
+    def invalidate(self, content_hash: str) -> int:
+        """Remove every cached variant of a file."""
+        lru = f"{self.table}_lru"
+        with self.db.transaction() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {lru} WHERE content_hash = ?",
+                (content_hash,)
+            )
+            removed, size = cursor.fetchone()
+            for table in (self.table, lru):
+                cursor.execute(f"DELETE FROM {table} WHERE content_hash = ?", (content_hash,))
+            self._add_bytes(cursor, -size)
+        return removed
+
+    def prune_versions(self, keep: Optional[list[str]] = None) -> int:
+        """
+        Drop entries written by other parser versions, e.g. once a deploy
+        has finished (until then they are only evicted by the LRU).
+
+        Args:
+            keep: Versions to keep (default: this cache's parser_version)
+
+        Returns:
+            Entries removed
+        """
+        keep = keep or [self.parser_version]
+        placeholders = ", ".join("?" * len(keep))
+        lru = f"{self.table}_lru"
+        with self.db.transaction(immediate=True) as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {lru} "
+                f"WHERE parser_version NOT IN ({placeholders})",
+                keep
+            )
+            removed, size = cursor.fetchone()
+            for table in (self.table, lru):
+                cursor.execute(
+                    f"DELETE FROM {table} WHERE parser_version NOT IN ({placeholders})", keep
+                )
+            self._add_bytes(cursor, -size)
+        return removed
+
+    def flush(self) -> None:
+        """Write batched LRU times now."""
+        with self.db.transaction() as cursor:
+            self._write_touches(cursor)
+
+    def close(self) -> None:
+        self.flush()
+        self.db.close()
+
+    def stats(self) -> dict:
+        """Entry count, total size and hit/miss counters."""
+        with self.db.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {self.table}_lru")
+            entries = cursor.fetchone()[0]
+            cursor.execute(f"SELECT bytes FROM {self.table}_usage WHERE id = 0")
+            size = cursor.fetchone()[0]
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+# Test
+if __name__ == "__main__":
+    import os
+
+    print("Testing Parse Cache...")
+    cache = ParseCache("parse_cache_test.db", parser_version="1", max_bytes=2000)
+
+    key = hash_bytes(b"%PDF-1.4 form 16")
+    print(f"Miss: {cache.get(key)}")
+    cache.put(key, {"document_type": "form_16", "extracted_fields": {"gross_salary": 1200000.0}})
+    print(f"Hit: {cache.get(key)}")
+
+    for i in range(20):
+        cache.put(hash_bytes(str(i).encode()), {"raw_text": "x" * 200})
+    print(f"After eviction: {cache.stats()}")
+
+    # A rolling deploy: the new version opens the same cache beside the old one
+    cache.put(key, {"document_type": "form_16", "extracted_fields": {"gross_salary": 1200000.0}})
+    upgraded = ParseCache("parse_cache_test.db", parser_version="2", max_bytes=2000)
+    upgraded.put(key, {"document_type": "form_16", "extracted_fields": {}})
+    print(f"After version bump: v1 hit={cache.get(key) is not None}, "
+          f"v2 hit={upgraded.get(key) is not None}, {upgraded.stats()['entries']} entries")
+    print(f"Pruned old versions: {upgraded.prune_versions()} -> {upgraded.stats()}")
+    upgraded.close()
+
+    cache.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists("parse_cache_test.db" + suffix):
+            os.remove("parse_cache_test.db" + suffix)
+    print("\n✅ Parse cache working!")
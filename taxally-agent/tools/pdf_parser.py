@@ -9,29 +9,242 @@ Parses Indian tax documents:
 - ITR Acknowledgements
 """
 
+import io
+import mmap
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Optional, Any
-from dataclasses import dataclass
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Optional, Union
+from dataclasses import dataclass, field
 import json
 
+from .bank_statement import extract_statement
+from .extraction import ExtractionEngine, FieldSpec
+from .form26as import parse_form26as
+from .page_text import PageTextBuffer
+from .parse_cache import ParseCache, hash_bytes, hash_file
+from .pdf_source import PdfSource, as_buffer, open_source, stream_buffer
+
 try:
     import pdfplumber
     PDF_AVAILABLE = True
 except ImportError:
     PDF_AVAILABLE = False
 
-try:
-    from PIL import Image
-    import pytesseract
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
+from .ocr import (
+    OCR_AVAILABLE, DEFAULT_DPI, DEFAULT_LANG, image_coverage, needs_ocr, ocr_page, ocr_pages
+)
+
+
+# Bump whenever parser output changes, so cached results are invalidated
+PARSER_VERSION = "2025.6"
+
+
+# ============ Field Specs ============
+# Compiled once; each parser collects all of its fields in one pass.
+# Patterns within a field are in priority order (first match wins).
+
+_PAN = r'[A-Z]{5}[0-9]{4}[A-Z]'
+_GSTIN = r'[0-9]{2}[A-Z]{5}[0-9]{4}[A-Z][1-9A-Z]Z[0-9A-Z]'
+_TAN = r'[A-Z]{4}[0-9]{5}[A-Z]'
+_DATE = r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}'
+_ASSESSMENT_YEAR = FieldSpec('assessment_year', [
+    ('Assessment Year', r'Assessment Year[:\s]*(20\d{2}-\d{2})'),
+])
+
+_AMOUNT_CLEAN_RE = re.compile(r'₹|Rs\.?|[,\s]')
+
+FORM16_ENGINE = ExtractionEngine([
+    FieldSpec('pan', token=_PAN, flags=0),
+    FieldSpec('tan', token=_TAN, flags=0),
+    _ASSESSMENT_YEAR,
+    FieldSpec('gross_salary', [
+        ('Gross Salary', r'Gross Salary[^0-9]*([\d,]+)'),
+        ('1.', r'1\.\s*Gross salary[^0-9]*([\d,]+)'),
+        ('Total Salary', r'Total Salary[^0-9]*([\d,]+)'),
+    ]),
+    FieldSpec('tax_deducted', [
+        ('Tax Deducted at Source', r'Tax Deducted at Source[^0-9]*([\d,]+)'),
+        ('Total Tax Deducted', r'Total Tax Deducted[^0-9]*([\d,]+)'),
+        ('TDS', r'TDS[^0-9]*([\d,]+)'),
+    ]),
+    FieldSpec('deduction_80c', [('80C', r'80C[^0-9]*([\d,]+)')]),
+    FieldSpec('deduction_80d', [('80D', r'80D[^0-9]*([\d,]+)')]),
+    FieldSpec('employer_name', [
+        ('Name of', r'Name of (?:the )?Employer[:\s]*([^\n]+)'),
+    ]),
+])
+
+FORM26AS_ENGINE = ExtractionEngine([
+    FieldSpec('pan', token=_PAN, flags=0),
+    FieldSpec('tan', token=_TAN, flags=0),
+    _ASSESSMENT_YEAR,
+    FieldSpec('total_tds', [('Total', r'Total[^0-9]*([\d,]+(?:\.\d{2})?)')]),
+    FieldSpec('advance_tax_paid', [('Advance Tax', r'Advance Tax[^0-9]*([\d,]+)')]),
+    FieldSpec('self_assessment_tax', [
+        ('Self Assessment Tax', r'Self Assessment Tax[^0-9]*([\d,]+)'),
+    ]),
+])
+
+BANK_STATEMENT_ENGINE = ExtractionEngine([
+    FieldSpec('account_number', [
+        ('Account', r'Account\s*(?:No|Number)[:\s]*(\d{9,18})'),
+    ]),
+    FieldSpec('ifsc_code', [('IFSC', r'IFSC[:\s]*([A-Z]{4}0[A-Z0-9]{6})')]),
+    FieldSpec('period', [
+        (('Period', 'From'),
+         r'(?:Period|From)[:\s]*(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})\s*(?:to|-)\s*(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})'),
+    ]),
+    FieldSpec('opening_balance', [
+        ('Opening Balance', r'Opening Balance[:\s]*([\d,]+(?:\.\d{2})?)'),
+    ]),
+    FieldSpec('closing_balance', [
+        ('Closing Balance', r'Closing Balance[:\s]*([\d,]+(?:\.\d{2})?)'),
+    ]),
+    FieldSpec(
+        'transactions',
+        token=r'(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})\s+([^\d]+?)\s+([\d,]+(?:\.\d{2})?)',
+        flags=0
+    ),
+])
+
+INVOICE_ENGINE = ExtractionEngine([
+    FieldSpec('gstin', token=_GSTIN, flags=0),
+    FieldSpec('invoice_number', [
+        ('Invoice', r'Invoice\s*(?:No|Number|#)[:\s]*([A-Z0-9/-]+)'),
+    ]),
+    FieldSpec('invoice_date', [
+        (('Invoice', 'Date'), r'(?:Invoice\s*)?Date[:\s]*(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})'),
+    ]),
+    FieldSpec('taxable_value', [
+        ('Taxable', r'Taxable\s*(?:Value|Amount)[:\s]*([\d,]+(?:\.\d{2})?)'),
+    ]),
+    FieldSpec('cgst', [('CGST', r'CGST[^0-9]*([\d,]+(?:\.\d{2})?)')]),
+    FieldSpec('sgst', [('SGST', r'SGST[^0-9]*([\d,]+(?:\.\d{2})?)')]),
+    FieldSpec('igst', [('IGST', r'IGST[^0-9]*([\d,]+(?:\.\d{2})?)')]),
+    FieldSpec('total_amount', [
+        ('Grand Total', r'Grand Total[:\s]*([\d,]+(?:\.\d{2})?)'),
+        ('Total Amount', r'Total Amount[:\s]*([\d,]+(?:\.\d{2})?)'),
+        ('Net Amount', r'Net Amount[:\s]*([\d,]+(?:\.\d{2})?)'),
+    ]),
+])
+
+ITR_ACK_ENGINE = ExtractionEngine([
+    FieldSpec('pan', token=_PAN, flags=0),
+    FieldSpec('acknowledgement_number', [
+        ('Acknowledgement', r'Acknowledgement\s*(?:No|Number)[:\s]*(\d+)'),
+    ]),
+    FieldSpec('itr_form', [('ITR-', r'ITR-(\d)')], flags=0),
+    _ASSESSMENT_YEAR,
+    FieldSpec('filing_date', [
+        (('Filed', 'Date'), r'(?:Filed|Date)[:\s]*(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})'),
+    ]),
+    FieldSpec('total_income', [('Total Income', r'Total Income[:\s]*([\d,]+)')]),
+    FieldSpec('tax_payable', [
+        (('Tax Payable', 'Tax Paid'), r'Tax (?:Payable|Paid)[:\s]*([\d,]+)'),
+    ]),
+    FieldSpec('refund_amount', [('Refund', r'Refund[:\s]*([\d,]+)')]),
+])
+
+GENERIC_ENGINE = ExtractionEngine([
+    FieldSpec('pan', token=_PAN, flags=0),
+    FieldSpec('gstin', token=_GSTIN, flags=0),
+    FieldSpec('amounts', token=r'[₹Rs.\s]*([\d,]+(?:\.\d{2})?)', flags=0),
+    FieldSpec('dates', token=_DATE, flags=0),
+])
+
+# Document type markers (lowercase), in priority order
+DOCUMENT_MARKERS = [
+    ("form_16", ['form no. 16', 'form 16', 'certificate under section 203']),
+    ("form_26as", ['form 26as', 'annual tax statement', 'tax credit statement']),
+    ("bank_statement", ['account statement', 'bank statement', 'opening balance', 'closing balance']),
+    ("invoice", ['tax invoice', 'invoice no', 'gstin', 'cgst', 'sgst', 'igst']),
+    ("itr_ack", ['itr-', 'acknowledgement number', 'income tax return']),
+]
+
+# Characters of text kept on ParsedDocument.raw_text
+RAW_TEXT_CHARS = 5000
+
+
+# Fields (and how many values of each) a parser needs before a streaming
+# parse may stop reading pages. Types not listed read every page.
+STREAMING_STOP_FIELDS = {
+    "form_16": {"pan": 2, "tan": 1, "assessment_year": 1, "gross_salary": 1,
+                "tax_deducted": 1, "employer_name": 1},
+    "invoice": {"gstin": 2, "invoice_number": 1, "invoice_date": 1,
+                "taxable_value": 1, "total_amount": 1},
+    "itr_ack": {"pan": 1, "acknowledgement_number": 1, "itr_form": 1,
+                "assessment_year": 1, "filing_date": 1},
+}
+
+STREAMING_ENGINES = {
+    "form_16": FORM16_ENGINE,
+    "invoice": INVOICE_ENGINE,
+    "itr_ack": ITR_ACK_ENGINE,
+}
+
+# Leading pages used to classify a document in streaming mode
+DETECT_PAGES = 2
+
+
+# ============ Page Extraction ============
+
+# Below this many pages, process start-up costs more than it saves
+PARALLEL_MIN_PAGES = 24
+
+# Shards per worker; several smaller shards even out slow pages
+SHARDS_PER_WORKER = 4
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> list[str]:
+    """
+    Extract text from pages [start, end) of a PDF.
+
+    Runs in a worker process, so it opens the file itself and only
+    loads the pages of its shard.
+    """
+    with pdfplumber.open(pdf_path, pages=range(start + 1, end + 1)) as pdf:
+        return list(_read_pages(pdf.pages))
+
+
+def _read_pages(pages) -> Iterator[str]:
+    """Page texts, closing each page so its layout objects are freed."""
+    for page in pages:
+        text = page.extract_text() or ""
+        page.close()
+        yield text
+
+
+def _page_ranges(pages: int, shards: int) -> list[tuple[int, int]]:
+    """Split `pages` into at most `shards` contiguous, near-equal ranges."""
+    shards = max(1, min(shards, pages))
+    size, extra = divmod(pages, shards)
+    ranges = []
+    start = 0
+    for i in range(shards):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _default_categorizer() -> Callable[[list[dict]], list[dict]]:
+    # Imported here: mvp_tools pulls in the agent package
+    from .mvp_tools import TransactionInterpreter
+    return TransactionInterpreter().categorize
 
 
 @dataclass
 class ParsedDocument:
-    """Parsed document result."""
+    """
+    Parsed document result.
+
+    `raw_text` is the first RAW_TEXT_CHARS characters; the full text is
+    referenced through `text` (page by page) and is not part of to_dict().
+    `text` may be spooled to a temporary file: close() the document (or
+    use it as a context manager) once the text is no longer needed.
+    """
     document_type: str
     confidence: float
     extracted_fields: dict
@@ -39,6 +252,23 @@ class ParsedDocument:
     pages: int
     warnings: list
     metadata: dict
+    text: Optional[PageTextBuffer] = field(default=None, repr=False, compare=False)
+
+    def to_dict(self) -> dict:
+        data = dict(vars(self))
+        data.pop('text')
+        return data
+
+    def close(self) -> None:
+        """Release the page text buffer (and its temporary file)."""
+        if self.text is not None:
+            self.text.close()
+
+    def __enter__(self) -> "ParsedDocument":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
 
 
 class TaxDocumentParser:
@@ -56,92 +286,356 @@ class TaxDocumentParser:
     # Amount pattern (Indian format)
     AMOUNT_PATTERN = r'[₹Rs.\s]*([\d,]+(?:\.\d{2})?)'
 
-    def __init__(self):
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        parallel_min_pages: int = PARALLEL_MIN_PAGES,
+        cache: Optional[ParseCache] = None,
+        categorizer: Optional[Callable[[list[dict]], list[dict]]] = None,
+        ocr: bool = True,
+        ocr_dpi: int = DEFAULT_DPI,
+        ocr_lang: str = DEFAULT_LANG,
+        ocr_cache_path: Optional[str] = None
+    ):
+        """
+        Args:
+            max_workers: Processes for page extraction (default: CPU count)
+            parallel_min_pages: Smaller PDFs are extracted in-process
+            cache: Content-addressed cache of parse results
+            categorizer: Categorizes bank transactions page by page
+                (default: TransactionInterpreter rules)
+            ocr: OCR pages without a text layer (needs pytesseract)
+            ocr_dpi: Rasterization DPI for OCR
+            ocr_lang: Tesseract language(s), e.g. "eng+hin"
+            ocr_cache_path: SQLite file for per-page OCR results
+                (default: the parse cache's database, if any)
+        """
         if not PDF_AVAILABLE:
             raise ImportError(
                 "pdfplumber not installed. Run: pip install pdfplumber"
             )
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.parallel_min_pages = parallel_min_pages
+        self.cache = cache
+        self.categorizer = categorizer or _default_categorizer()
+        self.ocr = ocr
+        self.ocr_dpi = ocr_dpi
+        self.ocr_lang = ocr_lang
+        self.ocr_cache_path = ocr_cache_path or (cache.db_path if cache else None)
+
+    def extract_pages(
+        self,
+        pdf_path: str,
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> list[str]:
+        """
+        Extract text from pages [start, end), in page order.
+
+        Large ranges are sharded across a process pool; each worker opens
+        the file and returns its pages, and shards are merged back in
+        order. Pages without a text layer are OCR'd when enabled.
+        """
+        with self._extract_text_layer(pdf_path, start, end) as texts:
+            self._ocr_scanned_pages(pdf_path, texts, start)
+            return list(texts)
+
+    def _extract_text_layer(
+        self,
+        source: PdfSource,
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> PageTextBuffer:
+        with pdfplumber.open(open_source(source)) as pdf:
+            end = len(pdf.pages) if end is None else min(end, len(pdf.pages))
+            # In-memory documents stay in-process rather than being copied to workers
+            if (self.max_workers < 2 or end - start < self.parallel_min_pages
+                    or not isinstance(source, str)):
+                return PageTextBuffer(_read_pages(pdf.pages[start:end]))
+
+        ranges = [
+            (start + lo, start + hi)
+            for lo, hi in _page_ranges(end - start, self.max_workers * SHARDS_PER_WORKER)
+        ]
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(ranges))) as pool:
+            shards = pool.map(
+                _extract_page_range,
+                [source] * len(ranges),
+                [lo for lo, _ in ranges],
+                [hi for _, hi in ranges]
+            )
+            return PageTextBuffer(text for shard in shards for text in shard)
+
+    def _ocr_scanned_pages(self, source: PdfSource, texts: PageTextBuffer, start: int = 0) -> dict:
+        """
+        Replace the text of scanned pages with OCR output, in place.
+
+        Pages with little text count as scanned only if they are mostly
+        image, so short text pages are kept as they are.
+
+        Returns:
+            {"ocr_pages": [...], "unreadable_pages": [...]} (1-based)
+        """
+        thin = [i for i, text in enumerate(texts) if needs_ocr(text)]
+        coverage = image_coverage(source, [start + i for i in thin])
+        scanned = [i for i in thin if needs_ocr(texts[i], coverage.get(start + i))]
+        report = {"ocr_pages": [], "unreadable_pages": []}
+        if not scanned:
+            return report
+
+        if not (self.ocr and OCR_AVAILABLE):
+            report["unreadable_pages"] = [start + i + 1 for i in scanned]
+            return report
+
+        results = ocr_pages(
+            source, [start + i for i in scanned],
+            dpi=self.ocr_dpi, lang=self.ocr_lang,
+            max_workers=self.max_workers, cache_path=self.ocr_cache_path
+        )
+        for i in scanned:
+            texts[i] = results[start + i]
+            report["ocr_pages"].append(start + i + 1)
+        return report
+
+    def _ocr_single_page(self, source: PdfSource, index: int, text: str, report: dict) -> str:
+        """OCR one page if it is scanned (streaming mode)."""
+        if not needs_ocr(text) or not needs_ocr(text, image_coverage(source, [index]).get(index)):
+            return text
+        if not (self.ocr and OCR_AVAILABLE):
+            report["unreadable_pages"].append(index + 1)
+            return text
+        _, text, _ = ocr_page(source, index, self.ocr_dpi, self.ocr_lang, self.ocr_cache_path)
+        report["ocr_pages"].append(index + 1)
+        return text
+
+    def _apply_scan_report(self, result: dict, report: dict) -> None:
+        """Record OCR'd / unreadable pages on a parser result."""
+        if report["ocr_pages"]:
+            result.setdefault('metadata', {})['ocr_pages'] = report["ocr_pages"]
+        if report["unreadable_pages"]:
+            count = len(report["unreadable_pages"])
+            hint = "" if OCR_AVAILABLE else " (install pytesseract for OCR)"
+            result.setdefault('warnings', []).append(
+                f"{count} page(s) have no text layer and were not OCR'd{hint}"
+            )
 
-    def parse_pdf(self, pdf_path: str) -> ParsedDocument:
+    def parse_pdf(self, pdf_path: str, streaming: bool = False) -> ParsedDocument:
         """
         Parse a PDF and auto-detect document type.
 
         Args:
             pdf_path: Path to PDF file
+            streaming: Extract pages lazily and stop once the detected
+                parser has what it needs (see parse_pdf_streaming)
+
+        With a `cache`, files already parsed by this PARSER_VERSION are
+        returned from the cache (metadata gains `content_hash`, and
+        `cache_hit` on hits).
 
         Returns:
             ParsedDocument with extracted data
         """
-        with pdfplumber.open(pdf_path) as pdf:
-            # Extract all text
-            full_text = ""
-            for page in pdf.pages:
-                full_text += page.extract_text() or ""
-                full_text += "\n"
+        return self._parse_source(pdf_path, streaming)
 
-            pages = len(pdf.pages)
+    def parse_bytes(
+        self,
+        data: Union[bytes, bytearray, memoryview, mmap.mmap, io.BytesIO],
+        streaming: bool = False
+    ) -> ParsedDocument:
+        """
+        Parse a PDF held in memory, e.g. an upload's request body.
 
-        # Detect document type
-        doc_type = self._detect_document_type(full_text)
+        The buffer is read in place: nothing is written to disk or copied,
+        and pages are extracted in-process. Caching works as in parse_pdf.
 
-        # Parse based on type
-        if doc_type == "form_16":
-            result = self._parse_form16(full_text)
-        elif doc_type == "form_26as":
-            result = self._parse_form26as(full_text)
-        elif doc_type == "bank_statement":
-            result = self._parse_bank_statement(full_text)
-        elif doc_type == "invoice":
-            result = self._parse_invoice(full_text)
-        elif doc_type == "itr_ack":
-            result = self._parse_itr_acknowledgement(full_text)
-        else:
-            result = self._parse_generic(full_text)
+        Args:
+            data: PDF bytes, a memoryview/mmap over them, or a BytesIO
+            streaming: See parse_pdf
+        """
+        return self._parse_source(as_buffer(data), streaming)
+
+    def parse_stream(self, stream: BinaryIO, streaming: bool = False) -> ParsedDocument:
+        """
+        Parse a PDF from a binary stream, from its current position.
+
+        BytesIO is read in place and files on disk are memory-mapped;
+        other streams are read into memory once.
+        """
+        return self._parse_source(stream_buffer(stream), streaming)
+
+    def _parse_source(self, source: PdfSource, streaming: bool) -> ParsedDocument:
+        if self.cache is None:
+            return self._parse_pdf(source, streaming)
+
+        # Same bytes, same parser version -> same result
+        content_hash = hash_file(source) if isinstance(source, str) else hash_bytes(source)
+        variant = "streaming" if streaming else ""
+        cached = self.cache.get(content_hash, variant)
+        if cached is not None:
+            cached['metadata']['cache_hit'] = True
+            return ParsedDocument(**cached)
+
+        document = self._parse_pdf(source, streaming)
+        document.metadata['content_hash'] = content_hash
+        self.cache.put(content_hash, document.to_dict(), variant)
+        return document
+
+    def _parse_pdf(self, source: PdfSource, streaming: bool) -> ParsedDocument:
+        if streaming:
+            return self.parse_pdf_streaming(source)
+
+        # Leading pages first: a bank statement's table pass reads every
+        # page's text itself, so it skips the (much slower) pdfplumber pass
+        page_texts = self._extract_text_layer(source, end=DETECT_PAGES)
+        scan_report = self._ocr_scanned_pages(source, page_texts)
+        doc_type = self._detect_document_type(page_texts)
+
+        statement = None
+        if doc_type != "bank_statement":
+            start = len(page_texts)
+            rest = self._extract_text_layer(source, start=start)
+            for key, pages in self._ocr_scanned_pages(source, rest, start).items():
+                scan_report[key].extend(pages)
+            page_texts.extend(rest)
+            rest.close()
+            # Detect from the whole document, as for short documents
+            doc_type = self._detect_document_type(page_texts)
+        if doc_type == "bank_statement":
+            statement = self._read_statement(source, page_texts, scan_report)
+            page_texts = statement['page_texts']
+        pages = len(page_texts)
+
+        result = self._parse_text(doc_type, page_texts, statement)
+        self._apply_scan_report(result, scan_report)
 
         return ParsedDocument(
             document_type=doc_type,
             confidence=result.get('confidence', 0.5),
             extracted_fields=result.get('fields', {}),
-            raw_text=full_text[:5000],  # First 5000 chars
+            raw_text=page_texts.head(RAW_TEXT_CHARS),
             pages=pages,
             warnings=result.get('warnings', []),
-            metadata=result.get('metadata', {})
+            metadata=result.get('metadata', {}),
+            text=page_texts
         )
 
-    def _detect_document_type(self, text: str) -> str:
-        """Detect document type from content."""
-        text_lower = text.lower()
-
-        # Form 16 indicators
-        if any(x in text_lower for x in ['form no. 16', 'form 16', 'certificate under section 203']):
-            return "form_16"
-
-        # Form 26AS indicators
-        if any(x in text_lower for x in ['form 26as', 'annual tax statement', 'tax credit statement']):
-            return "form_26as"
-
-        # Bank statement indicators
-        if any(x in text_lower for x in ['account statement', 'bank statement', 'opening balance', 'closing balance']):
-            return "bank_statement"
-
-        # Invoice indicators
-        if any(x in text_lower for x in ['tax invoice', 'invoice no', 'gstin', 'cgst', 'sgst', 'igst']):
-            return "invoice"
+    def parse_pdf_streaming(
+        self,
+        pdf_path: PdfSource,
+        detect_pages: int = DETECT_PAGES
+    ) -> ParsedDocument:
+        """
+        Parse a PDF reading as few pages as possible.
+
+        The type is detected from the first `detect_pages` pages. Form 16,
+        invoices and ITR acknowledgements then read page by page until
+        their STREAMING_STOP_FIELDS are found; other types (and documents
+        not recognised from the leading pages) read the remaining pages.
+        Fields are extracted from the pages read, exactly as parse_pdf
+        would from the same text. `pdf_path` may also be an in-memory
+        source (see pdf_source).
+        """
+        with pdfplumber.open(open_source(pdf_path)) as pdf:
+            total_pages = len(pdf.pages)
+            page_texts = PageTextBuffer()
+            scan_report = {"ocr_pages": [], "unreadable_pages": []}
+
+            def read_page(index: int) -> str:
+                page = pdf.pages[index]
+                text = page.extract_text() or ""
+                page.close()  # Drop cached layout objects as we go
+                text = self._ocr_single_page(pdf_path, index, text, scan_report)
+                page_texts.append(text)
+                return text
+
+            for index in range(min(detect_pages, total_pages)):
+                read_page(index)
+            doc_type = self._detect_document_type(page_texts)
+
+            engine = STREAMING_ENGINES.get(doc_type)
+            if engine is not None:
+                stop_fields = STREAMING_STOP_FIELDS[doc_type]
+                found = engine.extract_pages(page_texts)
+                index = len(page_texts)
+                while index < total_pages and not all(
+                    found.resolved(name, count) for name, count in stop_fields.items()
+                ):
+                    engine.extract(read_page(index), found)
+                    index += 1
+
+        statement = None
+        if doc_type == "bank_statement":
+            statement = self._read_statement(pdf_path, page_texts, scan_report)
+            page_texts = statement['page_texts']
+        elif engine is None and len(page_texts) < total_pages:
+            start = len(page_texts)
+            rest = self._extract_text_layer(pdf_path, start=start)
+            rest_report = self._ocr_scanned_pages(pdf_path, rest, start)
+            for key, pages in rest_report.items():
+                scan_report[key].extend(pages)
+            page_texts.extend(rest)
+            rest.close()
+            if doc_type == "unknown":
+                doc_type = self._detect_document_type(page_texts)
+
+        result = self._parse_text(doc_type, page_texts, statement)
+        self._apply_scan_report(result, scan_report)
+        metadata = result.get('metadata', {})
+        metadata['pages_read'] = len(page_texts)
 
-        # ITR Acknowledgement
-        if any(x in text_lower for x in ['itr-', 'acknowledgement number', 'income tax return']):
-            return "itr_ack"
+        return ParsedDocument(
+            document_type=doc_type,
+            confidence=result.get('confidence', 0.5),
+            extracted_fields=result.get('fields', {}),
+            raw_text=page_texts.head(RAW_TEXT_CHARS),
+            pages=total_pages,
+            warnings=result.get('warnings', []),
+            metadata=metadata,
+            text=page_texts
+        )
 
-        return "unknown"
+    def _parse_text(
+        self,
+        doc_type: str,
+        pages: Iterable[str],
+        statement: Optional[dict] = None
+    ) -> dict:
+        """Run the parser for a detected document type over page texts."""
+        if doc_type == "form_16":
+            return self._parse_form16(pages)
+        elif doc_type == "form_26as":
+            return self._parse_form26as(pages)
+        elif doc_type == "bank_statement":
+            return self._parse_bank_statement(pages, statement)
+        elif doc_type == "invoice":
+            return self._parse_invoice(pages)
+        elif doc_type == "itr_ack":
+            return self._parse_itr_acknowledgement(pages)
+        else:
+            return self._parse_generic(pages)
+
+    def _detect_document_type(self, pages: Iterable[str]) -> str:
+        """Detect document type from content, reading page by page."""
+        best = len(DOCUMENT_MARKERS)
+        for text in pages:
+            text_lower = text.lower()
+            for rank, (_, markers) in enumerate(DOCUMENT_MARKERS[:best]):
+                if any(x in text_lower for x in markers):
+                    best = rank
+                    break
+            if best == 0:
+                break
+        return DOCUMENT_MARKERS[best][0] if best < len(DOCUMENT_MARKERS) else "unknown"
 
-    def _parse_form16(self, text: str) -> dict:
+    def _parse_form16(self, pages: Iterable[str]) -> dict:
         """Parse Form 16 (TDS Certificate)."""
         fields = {}
         warnings = []
         confidence = 0.0
+        found = FORM16_ENGINE.extract_pages(pages)
 
         # Extract PAN of employee
-        pan_matches = re.findall(self.PAN_PATTERN, text)
+        pan_matches = found.all('pan')
         if pan_matches:
             fields['employee_pan'] = pan_matches[0]
             if len(pan_matches) > 1:
@@ -149,56 +643,36 @@ class TaxDocumentParser:
             confidence += 0.2
 
         # Extract TAN of employer
-        tan_matches = re.findall(self.TAN_PATTERN, text)
+        tan_matches = found.all('tan')
         if tan_matches:
             fields['employer_tan'] = tan_matches[0]
             confidence += 0.2
 
         # Extract Assessment Year
-        ay_match = re.search(r'Assessment Year[:\s]*(20\d{2}-\d{2})', text, re.IGNORECASE)
-        if ay_match:
-            fields['assessment_year'] = ay_match.group(1)
+        if found.has('assessment_year'):
+            fields['assessment_year'] = found.group('assessment_year')
             confidence += 0.1
 
         # Extract Gross Salary
-        gross_patterns = [
-            r'Gross Salary[^0-9]*([\d,]+)',
-            r'1\.\s*Gross salary[^0-9]*([\d,]+)',
-            r'Total Salary[^0-9]*([\d,]+)',
-        ]
-        for pattern in gross_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                fields['gross_salary'] = self._parse_amount(match.group(1))
-                confidence += 0.2
-                break
+        if found.has('gross_salary'):
+            fields['gross_salary'] = self._parse_amount(found.group('gross_salary'))
+            confidence += 0.2
 
         # Extract Tax Deducted
-        tax_patterns = [
-            r'Tax Deducted at Source[^0-9]*([\d,]+)',
-            r'Total Tax Deducted[^0-9]*([\d,]+)',
-            r'TDS[^0-9]*([\d,]+)',
-        ]
-        for pattern in tax_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                fields['tax_deducted'] = self._parse_amount(match.group(1))
-                confidence += 0.2
-                break
+        if found.has('tax_deducted'):
+            fields['tax_deducted'] = self._parse_amount(found.group('tax_deducted'))
+            confidence += 0.2
 
         # Extract deductions under Chapter VI-A
-        deductions_80c = re.search(r'80C[^0-9]*([\d,]+)', text, re.IGNORECASE)
-        if deductions_80c:
-            fields['deduction_80c'] = self._parse_amount(deductions_80c.group(1))
+        if found.has('deduction_80c'):
+            fields['deduction_80c'] = self._parse_amount(found.group('deduction_80c'))
 
-        deductions_80d = re.search(r'80D[^0-9]*([\d,]+)', text, re.IGNORECASE)
-        if deductions_80d:
-            fields['deduction_80d'] = self._parse_amount(deductions_80d.group(1))
+        if found.has('deduction_80d'):
+            fields['deduction_80d'] = self._parse_amount(found.group('deduction_80d'))
 
         # Extract employer name
-        employer_match = re.search(r'Name of (?:the )?Employer[:\s]*([^\n]+)', text, re.IGNORECASE)
-        if employer_match:
-            fields['employer_name'] = employer_match.group(1).strip()
+        if found.has('employer_name'):
+            fields['employer_name'] = found.group('employer_name').strip()
 
         # Validate
         if 'employee_pan' not in fields:
@@ -213,52 +687,65 @@ class TaxDocumentParser:
             'metadata': {'document_type': 'Form 16', 'category': 'TDS Certificate'}
         }
 
-    def _parse_form26as(self, text: str) -> dict:
+    def _parse_form26as(self, pages: Iterable[str]) -> dict:
         """Parse Form 26AS (Tax Credit Statement)."""
         fields = {}
         warnings = []
         confidence = 0.0
+        found = FORM26AS_ENGINE.extract_pages(pages)
 
         # Extract PAN
-        pan_matches = re.findall(self.PAN_PATTERN, text)
+        pan_matches = found.all('pan')
         if pan_matches:
             fields['pan'] = pan_matches[0]
             confidence += 0.2
 
         # Extract Assessment Year
-        ay_match = re.search(r'Assessment Year[:\s]*(20\d{2}-\d{2})', text, re.IGNORECASE)
-        if ay_match:
-            fields['assessment_year'] = ay_match.group(1)
+        if found.has('assessment_year'):
+            fields['assessment_year'] = found.group('assessment_year')
             confidence += 0.1
 
-        # Extract TDS entries
-        # Pattern: TAN, Name, Amount, Tax Deducted
-        tds_entries = []
-        tan_matches = re.findall(self.TAN_PATTERN, text)
-
-        # Look for amounts near TANs
-        for tan in tan_matches[:10]:  # Limit to first 10
-            tds_entries.append({'tan': tan})
-
-        if tds_entries:
-            fields['tds_entries_count'] = len(tds_entries)
-            confidence += 0.2
+        # Section-aware pass: every deductor row, per-TAN totals, Part C/D
+        data = parse_form26as(pages)
+        totals = data.totals()
+
+        if data.entries or data.deductors:
+            fields['tds_entries'] = data.entries
+            fields['tds_entries_count'] = len(data.entries)
+            fields['deductors'] = data.deductor_list()
+            fields['deductor_count'] = len(data.deductors)
+            fields['total_tds'] = totals['total_tds']
+            fields['total_amount_paid'] = totals['total_amount_paid']
+            if totals['total_tcs']:
+                fields['total_tcs'] = totals['total_tcs']
+            confidence += 0.4
+        else:
+            # Unrecognised layout: TANs and the first "Total" only
+            tan_matches = found.all('tan')
+            if tan_matches:
+                fields['tds_entries_count'] = len(set(tan_matches))
+                confidence += 0.2
+            if found.has('total_tds'):
+                fields['total_tds'] = self._parse_amount(found.group('total_tds'))
+                confidence += 0.2
 
-        # Extract total TDS
-        total_match = re.search(r'Total[^0-9]*([\d,]+(?:\.\d{2})?)', text, re.IGNORECASE)
-        if total_match:
-            fields['total_tds'] = self._parse_amount(total_match.group(1))
-            confidence += 0.2
+        # Advance / self-assessment tax: Part C challans, else labels
+        if data.challans:
+            fields['challans'] = data.challans
+            fields['advance_tax_paid'] = totals['advance_tax']
+            fields['self_assessment_tax'] = totals['self_assessment_tax']
+        else:
+            if found.has('advance_tax_paid'):
+                fields['advance_tax_paid'] = self._parse_amount(found.group('advance_tax_paid'))
+            if found.has('self_assessment_tax'):
+                fields['self_assessment_tax'] = self._parse_amount(found.group('self_assessment_tax'))
 
-        # Extract advance tax paid
-        advance_tax = re.search(r'Advance Tax[^0-9]*([\d,]+)', text, re.IGNORECASE)
-        if advance_tax:
-            fields['advance_tax_paid'] = self._parse_amount(advance_tax.group(1))
+        if data.refunds:
+            fields['refunds'] = data.refunds
+            fields['total_refund'] = totals['total_refund']
 
-        # Extract self-assessment tax
-        self_assessment = re.search(r'Self Assessment Tax[^0-9]*([\d,]+)', text, re.IGNORECASE)
-        if self_assessment:
-            fields['self_assessment_tax'] = self._parse_amount(self_assessment.group(1))
+        if data.parts_found:
+            fields['parts_found'] = data.parts_found
 
         return {
             'fields': fields,
@@ -267,58 +754,101 @@ class TaxDocumentParser:
             'metadata': {'document_type': 'Form 26AS', 'category': 'Tax Credit Statement'}
         }
 
-    def _parse_bank_statement(self, text: str) -> dict:
-        """Parse bank statement."""
+    def _read_statement(self, source: PdfSource, page_texts: PageTextBuffer, scan_report: dict) -> dict:
+        """
+        Table pass over every page; its page texts replace `page_texts`.
+
+        Pages already OCR'd keep their OCR text, remaining pages without a
+        text layer are OCR'd, and `scan_report` is updated to match.
+        `page_texts` is closed.
+        """
+        statement = self._extract_statement(source, page_texts)
+        texts = statement['page_texts']
+        for number in scan_report["ocr_pages"]:
+            texts[number - 1] = page_texts[number - 1]
+        page_texts.close()
+
+        report = self._ocr_scanned_pages(source, texts)
+        scan_report["ocr_pages"] = sorted({*scan_report["ocr_pages"], *report["ocr_pages"]})
+        scan_report["unreadable_pages"] = report["unreadable_pages"]
+        return statement
+
+    def _extract_statement(self, source: PdfSource, pages: Iterable[str]) -> dict:
+        """Table-based transaction pass, seeded with the opening balance from `pages`."""
+        opening = BANK_STATEMENT_ENGINE.extract_pages(pages).group('opening_balance')
+        return extract_statement(
+            source,
+            opening_balance=self._parse_amount(opening) if opening else None,
+            categorize=self.categorizer
+        )
+
+    def _parse_bank_statement(self, pages: Iterable[str], statement: Optional[dict] = None) -> dict:
+        """
+        Parse bank statement.
+
+        Transactions come from `statement` (table extraction, every row);
+        without a usable table, from a line pattern over the page texts.
+        """
         fields = {}
         warnings = []
         confidence = 0.0
+        found = BANK_STATEMENT_ENGINE.extract_pages(pages)
 
         # Extract account number
-        acc_match = re.search(r'Account\s*(?:No|Number)[:\s]*(\d{9,18})', text, re.IGNORECASE)
-        if acc_match:
-            fields['account_number'] = acc_match.group(1)
+        if found.has('account_number'):
+            fields['account_number'] = found.group('account_number')
             confidence += 0.2
 
         # Extract IFSC
-        ifsc_match = re.search(r'IFSC[:\s]*([A-Z]{4}0[A-Z0-9]{6})', text, re.IGNORECASE)
-        if ifsc_match:
-            fields['ifsc_code'] = ifsc_match.group(1)
+        if found.has('ifsc_code'):
+            fields['ifsc_code'] = found.group('ifsc_code')
             confidence += 0.1
 
         # Extract statement period
-        period_match = re.search(r'(?:Period|From)[:\s]*(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})\s*(?:to|-)\s*(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})', text, re.IGNORECASE)
-        if period_match:
-            fields['period_from'] = period_match.group(1)
-            fields['period_to'] = period_match.group(2)
+        if found.has('period'):
+            fields['period_from'] = found.group('period', 1)
+            fields['period_to'] = found.group('period', 2)
             confidence += 0.1
 
         # Extract opening/closing balance
-        opening_match = re.search(r'Opening Balance[:\s]*([\d,]+(?:\.\d{2})?)', text, re.IGNORECASE)
-        if opening_match:
-            fields['opening_balance'] = self._parse_amount(opening_match.group(1))
+        if found.has('opening_balance'):
+            fields['opening_balance'] = self._parse_amount(found.group('opening_balance'))
             confidence += 0.15
 
-        closing_match = re.search(r'Closing Balance[:\s]*([\d,]+(?:\.\d{2})?)', text, re.IGNORECASE)
-        if closing_match:
-            fields['closing_balance'] = self._parse_amount(closing_match.group(1))
+        if found.has('closing_balance'):
+            fields['closing_balance'] = self._parse_amount(found.group('closing_balance'))
             confidence += 0.15
 
-        # Try to extract transactions
-        # Look for date patterns followed by descriptions and amounts
-        transactions = []
-        date_pattern = r'(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})\s+([^\d]+?)\s+([\d,]+(?:\.\d{2})?)'
-        matches = re.findall(date_pattern, text)
-
-        for match in matches[:50]:  # Limit to 50
-            transactions.append({
-                'date': match[0],
-                'description': match[1].strip(),
-                'amount': self._parse_amount(match[2])
-            })
+        if statement and statement['columns']:
+            transactions = statement['transactions']
+            balance_check = statement['balance_check'].to_dict()
+            fields['columns'] = sorted(statement['columns'])
+            fields['balance_check'] = balance_check
+            if not balance_check['valid']:
+                warnings.append(
+                    f"Running balance mismatch on {balance_check['mismatch_count']} rows"
+                )
+        else:
+            # Look for date patterns followed by descriptions and amounts
+            transactions = [
+                {
+                    'date': match[0],
+                    'description': match[1].strip(),
+                    'amount': self._parse_amount(match[2])
+                }
+                for match in found.all('transactions')
+            ]
+            if transactions and self.categorizer:
+                transactions = self.categorizer(transactions)
 
         if transactions:
             fields['transaction_count'] = len(transactions)
+            fields['transactions'] = transactions
             fields['sample_transactions'] = transactions[:10]  # First 10
+            fields['total_debits'] = round(sum(
+                t['amount'] for t in transactions if t.get('type') == 'debit'), 2)
+            fields['total_credits'] = round(sum(
+                t['amount'] for t in transactions if t.get('type') == 'credit'), 2)
             confidence += 0.2
 
         return {
@@ -328,14 +858,15 @@ class TaxDocumentParser:
             'metadata': {'document_type': 'Bank Statement', 'category': 'Financial Statement'}
         }
 
-    def _parse_invoice(self, text: str) -> dict:
+    def _parse_invoice(self, pages: Iterable[str]) -> dict:
         """Parse GST invoice."""
         fields = {}
         warnings = []
         confidence = 0.0
+        found = INVOICE_ENGINE.extract_pages(pages)
 
         # Extract GSTIN (seller)
-        gstin_matches = re.findall(self.GSTIN_PATTERN, text)
+        gstin_matches = found.all('gstin')
         if gstin_matches:
             fields['seller_gstin'] = gstin_matches[0]
             if len(gstin_matches) > 1:
@@ -343,51 +874,30 @@ class TaxDocumentParser:
             confidence += 0.2
 
         # Extract invoice number
-        inv_match = re.search(r'Invoice\s*(?:No|Number|#)[:\s]*([A-Z0-9/-]+)', text, re.IGNORECASE)
-        if inv_match:
-            fields['invoice_number'] = inv_match.group(1)
+        if found.has('invoice_number'):
+            fields['invoice_number'] = found.group('invoice_number')
             confidence += 0.15
 
         # Extract invoice date
-        date_match = re.search(r'(?:Invoice\s*)?Date[:\s]*(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})', text, re.IGNORECASE)
-        if date_match:
-            fields['invoice_date'] = date_match.group(1)
+        if found.has('invoice_date'):
+            fields['invoice_date'] = found.group('invoice_date')
             confidence += 0.1
 
         # Extract amounts
         # Taxable value
-        taxable_match = re.search(r'Taxable\s*(?:Value|Amount)[:\s]*([\d,]+(?:\.\d{2})?)', text, re.IGNORECASE)
-        if taxable_match:
-            fields['taxable_value'] = self._parse_amount(taxable_match.group(1))
+        if found.has('taxable_value'):
+            fields['taxable_value'] = self._parse_amount(found.group('taxable_value'))
             confidence += 0.1
 
-        # CGST
-        cgst_match = re.search(r'CGST[^0-9]*([\d,]+(?:\.\d{2})?)', text, re.IGNORECASE)
-        if cgst_match:
-            fields['cgst'] = self._parse_amount(cgst_match.group(1))
-
-        # SGST
-        sgst_match = re.search(r'SGST[^0-9]*([\d,]+(?:\.\d{2})?)', text, re.IGNORECASE)
-        if sgst_match:
-            fields['sgst'] = self._parse_amount(sgst_match.group(1))
-
-        # IGST
-        igst_match = re.search(r'IGST[^0-9]*([\d,]+(?:\.\d{2})?)', text, re.IGNORECASE)
-        if igst_match:
-            fields['igst'] = self._parse_amount(igst_match.group(1))
+        # CGST / SGST / IGST
+        for tax in ('cgst', 'sgst', 'igst'):
+            if found.has(tax):
+                fields[tax] = self._parse_amount(found.group(tax))
 
         # Total
-        total_patterns = [
-            r'Grand Total[:\s]*([\d,]+(?:\.\d{2})?)',
-            r'Total Amount[:\s]*([\d,]+(?:\.\d{2})?)',
-            r'Net Amount[:\s]*([\d,]+(?:\.\d{2})?)',
-        ]
-        for pattern in total_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                fields['total_amount'] = self._parse_amount(match.group(1))
-                confidence += 0.15
-                break
+        if found.has('total_amount'):
+            fields['total_amount'] = self._parse_amount(found.group('total_amount'))
+            confidence += 0.15
 
         # Calculate GST rate if possible
         if 'taxable_value' in fields and 'cgst' in fields:
@@ -404,56 +914,50 @@ class TaxDocumentParser:
             'metadata': {'document_type': 'Invoice', 'category': 'GST Invoice'}
         }
 
-    def _parse_itr_acknowledgement(self, text: str) -> dict:
+    def _parse_itr_acknowledgement(self, pages: Iterable[str]) -> dict:
         """Parse ITR Acknowledgement."""
         fields = {}
         warnings = []
         confidence = 0.0
+        found = ITR_ACK_ENGINE.extract_pages(pages)
 
         # Extract PAN
-        pan_matches = re.findall(self.PAN_PATTERN, text)
+        pan_matches = found.all('pan')
         if pan_matches:
             fields['pan'] = pan_matches[0]
             confidence += 0.2
 
         # Extract Acknowledgement Number
-        ack_match = re.search(r'Acknowledgement\s*(?:No|Number)[:\s]*(\d+)', text, re.IGNORECASE)
-        if ack_match:
-            fields['acknowledgement_number'] = ack_match.group(1)
+        if found.has('acknowledgement_number'):
+            fields['acknowledgement_number'] = found.group('acknowledgement_number')
             confidence += 0.2
 
         # Extract ITR form type
-        itr_match = re.search(r'ITR-(\d)', text)
-        if itr_match:
-            fields['itr_form'] = f"ITR-{itr_match.group(1)}"
+        if found.has('itr_form'):
+            fields['itr_form'] = f"ITR-{found.group('itr_form')}"
             confidence += 0.1
 
         # Extract Assessment Year
-        ay_match = re.search(r'Assessment Year[:\s]*(20\d{2}-\d{2})', text, re.IGNORECASE)
-        if ay_match:
-            fields['assessment_year'] = ay_match.group(1)
+        if found.has('assessment_year'):
+            fields['assessment_year'] = found.group('assessment_year')
             confidence += 0.1
 
         # Extract filing date
-        filed_match = re.search(r'(?:Filed|Date)[:\s]*(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})', text, re.IGNORECASE)
-        if filed_match:
-            fields['filing_date'] = filed_match.group(1)
+        if found.has('filing_date'):
+            fields['filing_date'] = found.group('filing_date')
             confidence += 0.1
 
         # Extract total income
-        income_match = re.search(r'Total Income[:\s]*([\d,]+)', text, re.IGNORECASE)
-        if income_match:
-            fields['total_income'] = self._parse_amount(income_match.group(1))
+        if found.has('total_income'):
+            fields['total_income'] = self._parse_amount(found.group('total_income'))
             confidence += 0.1
 
         # Extract tax payable/refund
-        tax_match = re.search(r'Tax (?:Payable|Paid)[:\s]*([\d,]+)', text, re.IGNORECASE)
-        if tax_match:
-            fields['tax_payable'] = self._parse_amount(tax_match.group(1))
+        if found.has('tax_payable'):
+            fields['tax_payable'] = self._parse_amount(found.group('tax_payable'))
 
-        refund_match = re.search(r'Refund[:\s]*([\d,]+)', text, re.IGNORECASE)
-        if refund_match:
-            fields['refund_amount'] = self._parse_amount(refund_match.group(1))
+        if found.has('refund_amount'):
+            fields['refund_amount'] = self._parse_amount(found.group('refund_amount'))
 
         return {
             'fields': fields,
@@ -462,28 +966,28 @@ class TaxDocumentParser:
             'metadata': {'document_type': 'ITR Acknowledgement', 'category': 'Tax Return'}
         }
 
-    def _parse_generic(self, text: str) -> dict:
+    def _parse_generic(self, pages: Iterable[str]) -> dict:
         """Generic parsing for unrecognized documents."""
         fields = {}
+        found = GENERIC_ENGINE.extract_pages(pages)
 
         # Extract any PANs
-        pan_matches = re.findall(self.PAN_PATTERN, text)
+        pan_matches = found.all('pan')
         if pan_matches:
             fields['pan_found'] = list(set(pan_matches))
 
         # Extract any GSTINs
-        gstin_matches = re.findall(self.GSTIN_PATTERN, text)
+        gstin_matches = found.all('gstin')
         if gstin_matches:
             fields['gstin_found'] = list(set(gstin_matches))
 
         # Extract any amounts
-        amount_matches = re.findall(r'[₹Rs.\s]*([\d,]+(?:\.\d{2})?)', text)
-        amounts = [self._parse_amount(a) for a in amount_matches if self._parse_amount(a) > 100]
+        amounts = [a for a in map(self._parse_amount, found.all('amounts')) if a > 100]
         if amounts:
             fields['amounts_found'] = sorted(set(amounts), reverse=True)[:10]
 
         # Extract dates
-        date_matches = re.findall(r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}', text)
+        date_matches = found.all('dates')
         if date_matches:
             fields['dates_found'] = list(set(date_matches))[:10]
 
@@ -498,8 +1002,7 @@ class TaxDocumentParser:
         """Parse amount string to float."""
         try:
             # Remove commas and currency symbols
-            clean = re.sub(r'[₹Rs.,\s]', '', amount_str)
-            clean = clean.replace(',', '')
+            clean = _AMOUNT_CLEAN_RE.sub('', amount_str)
             return float(clean) if clean else 0.0
         except:
             return 0.0
@@ -523,6 +1026,7 @@ class TaxDocumentParser:
         """
         # Parse document
         result = self.parse_pdf(pdf_path)
+        result.close()  # Only the extracted fields are exported
 
         # Add to Documents sheet
         import uuid
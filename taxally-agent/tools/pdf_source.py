@@ -0,0 +1,131 @@
+"""
+In-Memory PDF Sources for TaxAlly
+
+Lets the parsers read uploads without writing them to disk:
+- bytes, bytearray, memoryview, mmap and BytesIO are wrapped in a
+  memoryview over the caller's buffer (no copy)
+- Every open gets its own seekable reader over that view, so pdfplumber,
+  pdfium and the OCR renderer can each read the same document
+- Files on disk are memory-mapped rather than read into memory
+
+A "source" is either a filesystem path (str) or a memoryview.
+"""
+
+import ctypes
+import io
+import mmap
+from typing import BinaryIO, Union
+
+
+PdfSource = Union[str, memoryview]
+BufferLike = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
+class BufferReader(io.RawIOBase):
+    """Read-only, seekable file object over a buffer, without copying it."""
+
+    def __init__(self, buffer: BufferLike):
+        self._view = memoryview(buffer).cast("B")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = min(len(b), len(self._view) - self._pos)
+        if n <= 0:
+            return 0
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+def as_buffer(data: Union[BufferLike, io.BytesIO]) -> memoryview:
+    """A memoryview over in-memory PDF bytes (BytesIO from its current position)."""
+    if isinstance(data, io.BytesIO):
+        return data.getbuffer()[data.tell():]
+    if isinstance(data, (bytes, bytearray, memoryview, mmap.mmap)):
+        return memoryview(data).cast("B")
+    raise TypeError(f"Expected bytes, bytearray, memoryview, mmap or BytesIO, got {type(data).__name__}")
+
+
+def stream_buffer(stream: BinaryIO) -> memoryview:
+    """
+    A memoryview over a binary stream's remaining bytes.
+
+    BytesIO is viewed in place and real files are memory-mapped; anything
+    else (sockets, request bodies) is read once.
+    """
+    if isinstance(stream, io.BytesIO):
+        return as_buffer(stream)
+
+    try:
+        fileno = stream.fileno()
+        offset = stream.tell()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return memoryview(stream.read())
+
+    try:
+        mapped = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # Empty, or not mappable (pipes)
+        return memoryview(stream.read())
+    return memoryview(mapped)[offset:]
+
+
+def open_source(source: PdfSource):
+    """What pdfplumber.open() takes: a fresh reader over a buffer; paths as-is."""
+    return BufferReader(source) if isinstance(source, memoryview) else source
+
+
+def pdfium_input(source: PdfSource):
+    """
+    What pypdfium2.PdfDocument() takes.
+
+    Whole bytes objects and writable buffers are loaded by pdfium in
+    place; other views are read through a BufferReader. Paths pass as-is.
+    """
+    if not isinstance(source, memoryview):
+        return source
+    if isinstance(source.obj, bytes) and source.nbytes == len(source.obj):
+        return source.obj
+    if not source.readonly:
+        return (ctypes.c_char * source.nbytes).from_buffer(source)
+    return BufferReader(source)
+
+
+# Test
+if __name__ == "__main__":
+    import tempfile
+
+    print("Testing PDF sources...")
+    data = b"%PDF-1.4 example document bytes"
+
+    for label, value in [
+        ("bytes", data),
+        ("bytearray", bytearray(data)),
+        ("memoryview", memoryview(data)),
+        ("BytesIO", io.BytesIO(data)),
+    ]:
+        view = as_buffer(value)
+        reader = open_source(view)
+        print(f"  {label:10} -> {reader.read(8)!r}, pdfium: {type(pdfium_input(view)).__name__}")
+
+    with tempfile.TemporaryFile() as f:
+        f.write(data)
+        f.seek(0)
+        view = stream_buffer(f)
+        print(f"  file       -> {type(view.obj).__name__}, {bytes(view[:8])!r}")